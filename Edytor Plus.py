@@ -1,9 +1,15 @@
 import tkinter as tk
 from tkinter import filedialog, simpledialog
-import subprocess
-import threading
 import re
+import sys
 import jedi
+
+from indent_guides import IndentGuides
+from line_gutter import LineNumberGutter
+from run_console import RunConsole
+import warm_kernel
+from syntax_highlighter import IncrementalHighlighter
+
 try:
     import black
 except ImportError:
@@ -17,14 +23,15 @@ class PythonEditor:
         self.root.title("Edytor Pythona")
 
         self.filename = None
-        self.process = None
 
         # Text widget for code
         self.text = tk.Text(root, wrap="none", undo=True)
         self.text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
-        # Line numbers widget
-        self.line_numbers = tk.Text(root, width=4, padx=4, takefocus=0, border=0, background='#2b2b2b', foreground='white', state='disabled')
+        # Line numbers (only visible lines are drawn)
+        self.line_numbers = LineNumberGutter(
+            root, self.text, markers={"indent_error": "red", "search": "yellow"},
+            fg="white", background="#2b2b2b")
         self.line_numbers.pack(side=tk.LEFT, fill=tk.Y)
 
         # Canvas for indent guides
@@ -36,12 +43,12 @@ class PythonEditor:
         self.scrollbar.pack(side=tk.RIGHT, fill="y")
 
         self.text.config(yscrollcommand=self.on_text_scroll)
-        self.line_numbers.config(yscrollcommand=self.on_text_scroll)
-        self.canvas_indent.config(yscrollcommand=self.on_text_scroll)
 
         # Output area
         self.output = tk.Text(root, height=10, bg="black", fg="lime", insertbackground="white")
         self.output.pack(fill=tk.X)
+        self.console = RunConsole(self.output, report_time=True)
+        self.warm_var = tk.BooleanVar(value=False)
 
         # Autocomplete popup
         self.popup = tk.Listbox(root)
@@ -56,9 +63,12 @@ class PythonEditor:
         self.text.bind("<Control-i>", lambda e: self.check_indentation_errors())
         self.text.bind("<Control-z>", self.undo)
         self.text.bind("<Control-y>", self.redo)
+        self.text.bind("<F5>", lambda e: self.run_code())
+        # Ctrl+F5 przełącza uruchamianie w ciepłym interpreterze
+        self.text.bind("<Control-F5>", lambda e: (self.warm_var.set(not self.warm_var.get()), self.toggle_warm_kernel()))
 
         # Mouse and scroll events
-        self.text.bind("<Configure>", lambda e: self.draw_indent_guides())
+        self.text.bind("<Configure>", lambda e: self.draw_indent_guides(), add="+")
         self.text.bind("<Motion>", lambda e: self.draw_indent_guides())
         self.text.bind("<MouseWheel>", self.on_mousewheel)
         self.text.bind("<Button-1>", self.on_click)
@@ -71,6 +81,10 @@ class PythonEditor:
         self.text.tag_configure("self", foreground="violet")
         self.text.tag_configure("search", background="yellow")
         self.text.tag_configure("indent_error", background="red")
+        self.highlighter = IncrementalHighlighter(
+            self.text, ("keyword", "string", "comment", "function", "self"), lazy=True)
+        self.indent_guides = IndentGuides(self.canvas_indent, self.text)
+        self.highlighter.listeners.append(self.indent_guides.on_change)
 
         # Initialize auto-save, line numbers, and indent guides
         self.auto_save()
@@ -78,49 +92,22 @@ class PythonEditor:
         self.draw_indent_guides()
 
     def draw_indent_guides(self):
-        # Clear previous indent guides
-        self.canvas_indent.delete("all")
-        lines = int(self.text.index("end-1c").split(".")[0])
-
-        for i in range(1, lines + 1):
-            line_index = f"{i}.0"
-            text = self.text.get(line_index, f"{i}.end")
-            spaces = len(text) - len(text.lstrip(' '))
-            indent_level = spaces // 4
-            if spaces == 0:
-                continue
-
-            # Get bounding box of the line to position the indent guides
-            bbox = self.text.bbox(line_index)
-            if not bbox:
-                continue
-            y = bbox[1]
-            line_height = bbox[3]
-
-            # Draw vertical lines for each indentation level
-            for j in range(indent_level):
-                x = 5 + j * 8
-                self.canvas_indent.create_line(x, y, x, y + line_height, fill="#444")
+        # Only the visible lines are drawn; canvas items are reused on scroll
+        self.indent_guides.redraw()
 
     def on_mousewheel(self, event):
         self.text.yview_scroll(int(-1 * (event.delta / 120)), "units")
-        self.line_numbers.yview_scroll(int(-1 * (event.delta / 120)), "units")
-        self.canvas_indent.yview_scroll(int(-1 * (event.delta / 120)), "units")
         self.update_line_numbers()
         self.draw_indent_guides()
         return "break"
 
     def on_scrollbar(self, *args):
         self.text.yview(*args)
-        self.line_numbers.yview(*args)
-        self.canvas_indent.yview(*args)
         self.update_line_numbers()
         self.draw_indent_guides()
 
     def on_text_scroll(self, *args):
         self.scrollbar.set(*args)
-        self.line_numbers.yview_moveto(args[0])
-        self.canvas_indent.yview_moveto(args[0])
         self.update_line_numbers()
         self.draw_indent_guides()
 
@@ -129,12 +116,7 @@ class PythonEditor:
         self.draw_indent_guides()
 
     def update_line_numbers(self):
-        self.line_numbers.config(state="normal")
-        self.line_numbers.delete("1.0", tk.END)
-        line_count = int(self.text.index("end-1c").split(".")[0])
-        lines = "\n".join(str(i) for i in range(1, line_count + 1))
-        self.line_numbers.insert("1.0", lines)
-        self.line_numbers.config(state="disabled")
+        self.line_numbers.redraw()
 
     def auto_save(self):
         if self.filename:
@@ -173,36 +155,27 @@ class PythonEditor:
         self.root.title(title)
 
     def run_code(self):
-        if self.process:
+        if self.console.running:
             self.stop_code()
 
         code = self.text.get("1.0", tk.END)
         self.output.delete("1.0", tk.END)
-
-        def target():
-            try:
-                self.process = subprocess.Popen(
-                    ["python", "-u", "-c", code],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                )
-                for line in self.process.stdout:
-                    self.output.insert(tk.END, line)
-                for line in self.process.stderr:
-                    self.output.insert(tk.END, line)
-            except Exception as e:
-                self.output.insert(tk.END, str(e))
-            finally:
-                self.process = None
-
-        threading.Thread(target=target).start()
+        try:
+            self.console.start([sys.executable, "-u", "-c", code])
+        except Exception as e:
+            self.output.insert(tk.END, str(e))
 
     def stop_code(self):
-        if self.process:
-            self.process.terminate()
-            self.output.insert(tk.END, "\n[Zatrzymano]\n")
-            self.process = None
+        if self.console.running:
+            self.console.stop()
+            self.console.write("\n[Zatrzymano]\n")
+
+    def toggle_warm_kernel(self):
+        """Włącza uruchamianie w ciepłym interpreterze (fork procesu z zaimportowanymi modułami)."""
+        self.console.launcher = warm_kernel.launcher() if self.warm_var.get() else None
+        if self.warm_var.get() and self.console.launcher is None:
+            self.warm_var.set(False)
+            self.console.write("[Ciepły interpreter wymaga systemu z fork (Linux/macOS)]\n")
 
     def on_key_release(self, event):
         self.highlight_syntax()
@@ -210,37 +183,7 @@ class PythonEditor:
         self.draw_indent_guides()
 
     def highlight_syntax(self):
-        code = self.text.get("1.0", tk.END)
-        self.text.tag_remove("keyword", "1.0", tk.END)
-        self.text.tag_remove("string", "1.0", tk.END)
-        self.text.tag_remove("comment", "1.0", tk.END)
-        self.text.tag_remove("function", "1.0", tk.END)
-        self.text.tag_remove("self", "1.0", tk.END)
-
-        for match in re.finditer(r"\b(def|class|return|if|else|elif|while|for|try|except|import|from|as|pass|with|yield|lambda|in|is|and|or|not|global|nonlocal|assert|break|continue|finally|del|raise)\b", code):
-            start = f"1.0+{match.start()}c"
-            end = f"1.0+{match.end()}c"
-            self.text.tag_add("keyword", start, end)
-
-        for match in re.finditer(r"#.*", code):
-            start = f"1.0+{match.start()}c"
-            end = f"1.0+{match.end()}c"
-            self.text.tag_add("comment", start, end)
-
-        for match in re.finditer(r"(['\"])((?:(?!\1).)*)\1", code):
-            start = f"1.0+{match.start()}c"
-            end = f"1.0+{match.end()}c"
-            self.text.tag_add("string", start, end)
-
-        for match in re.finditer(r"\bself\b", code):
-            start = f"1.0+{match.start()}c"
-            end = f"1.0+{match.end()}c"
-            self.text.tag_add("self", start, end)
-
-        for match in re.finditer(r"def\s+(\w+)", code):
-            start = f"1.0+{match.start(1)}c"
-            end = f"1.0+{match.end(1)}c"
-            self.text.tag_add("function", start, end)
+        self.highlighter.update()
 
     def smart_indent(self, event):
         line = self.text.get("insert linestart", "insert")
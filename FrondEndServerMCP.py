@@ -2,10 +2,11 @@ import tkinter as tk
 from tkinter import ttk, scrolledtext
 import requests
 import threading
-import re
+
+import http_client
+from code_block_colorizer import colorize_code_blocks
 
 MCP_URL = "http://localhost:3000"
-TIMEOUT = 120  # długi timeout dla długich odpowiedzi
 
 # Kolory w stylu VS Code / Cursor (Dark Theme)
 COLORS = {
@@ -29,51 +30,6 @@ COLORS = {
     'operator': '#d4d4d4'
 }
 
-def colorize_python_code(text_widget, start_index):
-    try:
-        content = text_widget.get(start_index, tk.END)
-        code_blocks = re.finditer(r'```(?:python)?\s*\n?(.*?)```', content, re.DOTALL | re.IGNORECASE)
-
-        for match in code_blocks:
-            try:
-                code_content = match.group(1)
-                code_start_index = text_widget.index(f"{start_index}+{match.start(1)}c")
-                code_end_index = text_widget.index(f"{start_index}+{match.end(1)}c")
-
-                text_widget.tag_add('code_block', code_start_index, code_end_index)
-
-                keywords = ['def', 'class', 'if', 'elif', 'else', 'for', 'while', 'try', 'except', 'finally', 
-                            'import', 'from', 'as', 'return', 'yield', 'break', 'continue', 'pass', 'lambda',
-                            'and', 'or', 'not', 'in', 'is', 'None', 'True', 'False', 'with', 'async', 'await']
-
-                for keyword in keywords:
-                    pattern = r'\b' + re.escape(keyword) + r'\b'
-                    for kw_match in re.finditer(pattern, code_content):
-                        kw_start_pos = text_widget.index(f"{code_start_index}+{kw_match.start()}c")
-                        kw_end_pos   = text_widget.index(f"{code_start_index}+{kw_match.end()}c")
-                        text_widget.tag_add('keyword', kw_start_pos, kw_end_pos)
-
-                for pattern in [r'"[^"]*"', r"'[^']*'"]:
-                    for str_match in re.finditer(pattern, code_content):
-                        str_start_pos = text_widget.index(f"{code_start_index}+{str_match.start()}c")
-                        str_end_pos   = text_widget.index(f"{code_start_index}+{str_match.end()}c")
-                        text_widget.tag_add('string', str_start_pos, str_end_pos)
-
-                for comment_match in re.finditer(r'#.*$', code_content, re.MULTILINE):
-                    com_start_pos = text_widget.index(f"{code_start_index}+{comment_match.start()}c")
-                    com_end_pos   = text_widget.index(f"{code_start_index}+{comment_match.end()}c")
-                    text_widget.tag_add('comment', com_start_pos, com_end_pos)
-
-                for num_match in re.finditer(r'\b\d+\.?\d*\b', code_content):
-                    num_start_pos = text_widget.index(f"{code_start_index}+{num_match.start()}c")
-                    num_end_pos   = text_widget.index(f"{code_start_index}+{num_match.end()}c")
-                    text_widget.tag_add('number', num_start_pos, num_end_pos)
-
-            except tk.TclError:
-                pass
-    except Exception:
-        pass
-
 def send_request_thread():
     endpoint = endpoint_var.get()
     text = input_text.get("1.0", tk.END).strip()
@@ -100,16 +56,16 @@ def send_request_thread():
         log_text.see(tk.END)
         log_text.update()
 
-        response = requests.post(url, json=body, timeout=TIMEOUT)
+        response = http_client.post(url, json=body)
         response.raise_for_status()
         data = response.json()
 
         content = data['choices'][0]['message']['content']
 
-        log_text.insert(tk.END, f"✅ Odpowiedź:\n", 'success')
-        response_start = log_text.index(tk.END)
+        log_text.insert(tk.END, f"✅ Odpowiedź ({http_client.timing_text(response.timing)}):\n", 'success')
+        response_start = log_text.index("end-1c")
         log_text.insert(tk.END, f"{content}\n\n", 'response')
-        colorize_python_code(log_text, response_start)
+        colorize_code_blocks(log_text, response_start)
 
     except requests.exceptions.RequestException as e:
         log_text.insert(tk.END, f"❌ Błąd żądania: {e}\n\n", 'error')
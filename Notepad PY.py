@@ -1,11 +1,18 @@
 import tkinter as tk
 from tkinter import filedialog, scrolledtext, messagebox
-import subprocess
+import importlib.util
 import os
 import re
-import threading
 import time
 
+from completion_service import CompletionService
+from lsp_client import LanguageServerClient, find_server
+from run_console import RunConsole
+from syntax_highlighter import IncrementalHighlighter
+
+# Polecenie serwera języka (np. "pylsp"); puste = jedi w procesie edytora
+LANGUAGE_SERVER = os.environ.get("PY_EDITOR_LSP", "")
+
 # Próba zaimportowania tkinterdnd2 dla funkcji "przeciągnij i upuść"
 try:
     from tkinterdnd2 import TkinterDnD
@@ -15,12 +22,9 @@ except ImportError:
     is_dnd_supported = False
     _TkBase = tk.Tk
 
-# Próba zaimportowania jedi
-try:
-    import jedi
-    is_jedi_supported = True
-except ImportError:
-    is_jedi_supported = False
+# Sprawdzenie, czy jest jedi (importuje je dopiero completion_service)
+is_jedi_supported = importlib.util.find_spec("jedi") is not None
+if not is_jedi_supported:
     messagebox.showwarning("Brak biblioteki", "Biblioteka 'jedi' nie została znaleziona. Podpowiedzi kodu nie będą działać.")
 
 class PythonEditor(_TkBase):  # type: ignore
@@ -37,6 +41,7 @@ class PythonEditor(_TkBase):  # type: ignore
         self.last_key_press_time = 0
         
         self.setup_ui()
+        self.setup_completion()
         self.bind_shortcuts()
         if is_dnd_supported:
             self.setup_drag_and_drop()
@@ -112,6 +117,12 @@ class PythonEditor(_TkBase):  # type: ignore
         run_menu.add_command(label="Uruchom program", command=self.run_code, accelerator="F5")
         
         self.setup_syntax_highlighting()
+        # Nawiasy i operatory trafiają do wspólnego znacznika "delimiters"
+        self.highlighter = IncrementalHighlighter(self.text_widget, {
+            "keyword": "keyword", "string": "string", "comment": "comment", "number": "number",
+            "function": "function", "class": "class", "self": "self",
+            "bracket": "delimiters", "operator": "delimiters",
+        }, indent_tag="indent", lazy=True)
         
         self.status_bar = tk.Label(self, text="Gotowy", bd=1, relief="sunken", anchor="w",
                                    bg=self.bg_color, fg=self.fg_color)
@@ -138,6 +149,8 @@ class PythonEditor(_TkBase):  # type: ignore
                 self.save_file()
                 if self.unsaved_changes:  # If save_file failed (e.g. user canceled save_as)
                     return
+        if isinstance(self.completion, LanguageServerClient):
+            self.completion.close()
         self.destroy()
 
     def set_unsaved_changes(self, modified=True):
@@ -194,7 +207,7 @@ class PythonEditor(_TkBase):  # type: ignore
         """Obsługuje naciśnięcia klawiszy, w tym podpowiedzi i automatyczne parowanie."""
         self.handle_auto_pair_and_indent(event)
         
-        if not is_jedi_supported:
+        if not self.completion:
             return
 
         self.set_unsaved_changes()
@@ -203,25 +216,68 @@ class PythonEditor(_TkBase):  # type: ignore
         # Wyzwalanie podpowiedzi po kropce lub literze
         if event.char and (event.char == "." or event.char.isalnum() or event.char == "_"):
             self.last_dot_time = current_time
-            line, col = map(int, self.text_widget.index(tk.INSERT).split('.'))
-            code = self.text_widget.get("1.0", tk.END)
-
-            threading.Thread(target=self.get_completions_in_thread, args=(code, line, col)).start()
+            # Zlecenie po wstawieniu znaku przez domyślne wiązanie widgetu
+            self.after_idle(self.request_completions)
         else:
             self.hide_autocomplete_suggestions()
 
-    def get_completions_in_thread(self, code, line, col):
-        """Pobiera podpowiedzi od Jedi w osobnym wątku."""
-        try:
-            script = jedi.Script(code)
-            completions = script.complete(line, col)
-            self.after_idle(self.show_autocomplete_suggestions, completions)
-        except Exception:
-            self.after_idle(self.hide_autocomplete_suggestions)
+    def setup_completion(self):
+        """Wybiera źródło podpowiedzi: serwer języka (podproces) albo jedi w wątku."""
+        self.completion = None
+        server = find_server(LANGUAGE_SERVER) if LANGUAGE_SERVER else None
+        if server:
+            self.completion = LanguageServerClient(
+                self, server, lambda: self.text_widget.get("1.0", "end-1c"), self.show_diagnostics)
+            self.completion.open_document(self.file_path, self.text_widget.get("1.0", "end-1c"))
+            self.highlighter.listeners.append(self.completion.did_change)
+            self.text_widget.bind("<F12>", self.goto_definition)
+        elif is_jedi_supported:
+            self.completion = CompletionService(self)
+
+    def sync_language_server(self):
+        """Otwiera bieżący dokument w serwerze języka (po zmianie pliku)."""
+        if isinstance(self.completion, LanguageServerClient):
+            self.completion.open_document(self.file_path, self.text_widget.get("1.0", "end-1c"))
+
+    def show_diagnostics(self, diagnostics):
+        """Podkreśla problemy zgłoszone przez serwer języka."""
+        self.text_widget.tag_remove("diagnostic", "1.0", "end")
+        for diagnostic in diagnostics:
+            start, end = diagnostic["range"]["start"], diagnostic["range"]["end"]
+            self.text_widget.tag_add("diagnostic", f"{start['line'] + 1}.{start['character']}",
+                                     f"{end['line'] + 1}.{end['character']}")
+        if diagnostics:
+            self.status_bar.config(text=f"Diagnostyka ({len(diagnostics)}): {diagnostics[0]['message']}")
+
+    def goto_definition(self, event=None):
+        # pylint: disable=unused-argument
+        """Przechodzi do definicji symbolu pod kursorem (F12, tylko z serwerem języka)."""
+        line, col = map(int, self.text_widget.index(tk.INSERT).split('.'))
+        self.completion.request_definition(line, col, self.show_definition)
+        return "break"
+
+    def show_definition(self, path, line, col):
+        current = os.path.abspath(self.file_path) if self.file_path else ""
+        if os.path.normcase(os.path.abspath(path)) != os.path.normcase(current):
+            if not os.path.isfile(path):
+                self.status_bar.config(text=f"Definicja: {path}:{line}")
+                return
+            self.open_file_by_path(path)
+        self.text_widget.mark_set(tk.INSERT, f"{line}.{col}")
+        self.text_widget.see(tk.INSERT)
+        self.text_widget.focus_set()
+
+    def request_completions(self):
+        """Zleca podpowiedzi usłudze jedi (nowsze zlecenie zastępuje oczekujące)."""
+        line, col = map(int, self.text_widget.index(tk.INSERT).split('.'))
+        code = self.text_widget.get("1.0", "end-1c")
+        self.completion.request(code, line, col, self.show_autocomplete_suggestions,
+                                version=self.highlighter.version, path=self.file_path)
 
     def show_autocomplete_suggestions(self, completions):
         """Tworzy i wyświetla okno z podpowiedziami."""
         self.hide_autocomplete_suggestions()
+        self.status_bar.config(text=self.completion.latency_text())
 
         if not completions:
             return
@@ -361,6 +417,7 @@ class PythonEditor(_TkBase):  # type: ignore
         self.text_widget.tag_configure("indent", background=self.indent_bg)
         self.text_widget.tag_configure("syntax_error", background="#ff6347", foreground="white")
         self.text_widget.tag_configure("delimiter", background="#3a3a3a")
+        self.text_widget.tag_configure("diagnostic", underline=True)
         
     def setup_drag_and_drop(self):
         """Konfiguruje obsługę przeciągnij i upuść (Drag and Drop)."""
@@ -391,6 +448,7 @@ class PythonEditor(_TkBase):  # type: ignore
                 self.text_widget.delete("1.0", tk.END)
                 self.text_widget.insert("1.0", code)
             self.file_path = path
+            self.sync_language_server()
             self.set_unsaved_changes(False)
             self.title(f"Prosty Edytor Pythona - {os.path.basename(self.file_path)}")
             self.status_bar.config(text=f"Otwarto: {self.file_path}")
@@ -402,87 +460,11 @@ class PythonEditor(_TkBase):  # type: ignore
         # pylint: disable=unused-argument
         """Podświetla składnię, wizualizuje wcięcia i sprawdza błędy."""
         self.highlight_syntax()
-        self.visualize_whitespace()
         self.check_syntax_error()
 
     def highlight_syntax(self):
-        """Podświetla składnię w czasie rzeczywistym."""
-        code = self.text_widget.get("1.0", tk.END)
-        self.text_widget.mark_set("range_start", "1.0")
-        
-        for tag in ["keyword", "string", "comment", "number", "function", "class", "self", "delimiters"]:
-            self.text_widget.tag_remove(tag, "1.0", tk.END)
-        
-        lines = code.split('\n')
-        
-        for line_num, line in enumerate(lines, 1):
-            comment_match = re.search(r'#.*', line)
-            if comment_match:
-                start, end = comment_match.span()
-                self.text_widget.tag_add("comment", f"{line_num}.{start}", f"{line_num}.{end}")
-            
-            # Podświetlanie słów kluczowych, self, liczb, nawiasów i operatorów
-            for match in re.finditer(r'\b\w+\b|\S', line):
-                word = match.group()
-                if word in ["def"]:
-                    start_pos = f"{line_num}.{match.start()}"
-                    end_pos = f"{line_num}.{match.end()}"
-                    self.text_widget.tag_add("keyword", start_pos, end_pos)
-                    
-                    # Dodatkowe podświetlanie nazwy funkcji
-                    func_name_match = re.search(r'\bdef\s+([_a-zA-Z]\w*)\s*\(', line)
-                    if func_name_match:
-                        start_pos = f"{line_num}.{func_name_match.start(1)}"
-                        end_pos = f"{line_num}.{func_name_match.end(1)}"
-                        self.text_widget.tag_add("function", start_pos, end_pos)
-                        
-                elif word in ["class"]:
-                    start_pos = f"{line_num}.{match.start()}"
-                    end_pos = f"{line_num}.{match.end()}"
-                    self.text_widget.tag_add("keyword", start_pos, end_pos)
-                    
-                    # Dodatkowe podświetlanie nazwy klasy
-                    class_name_match = re.search(r'\bclass\s+([_a-zA-Z]\w*)', line)
-                    if class_name_match:
-                        start_pos = f"{line_num}.{class_name_match.start(1)}"
-                        end_pos = f"{line_num}.{class_name_match.end(1)}"
-                        self.text_widget.tag_add("class", start_pos, end_pos)
-                
-                elif word in ["__init__", "None"]:
-                    start_pos = f"{line_num}.{match.start()}"
-                    end_pos = f"{line_num}.{match.end()}"
-                    self.text_widget.tag_add("function", start_pos, end_pos)
-                
-                elif word in ["if", "else", "elif", "for", "while", "import", "from", "as", "return", "True", "False"]:
-                    start_pos = f"{line_num}.{match.start()}"
-                    end_pos = f"{line_num}.{match.end()}"
-                    self.text_widget.tag_add("keyword", start_pos, end_pos)
-                
-                elif word == 'self':
-                    start_pos = f"{line_num}.{match.start()}"
-                    end_pos = f"{line_num}.{match.end()}"
-                    self.text_widget.tag_add("self", start_pos, end_pos)
-                
-                elif re.match(r'^\d+(\.\d*)?$', word):
-                    start_pos = f"{line_num}.{match.start()}"
-                    end_pos = f"{line_num}.{match.end()}"
-                    self.text_widget.tag_add("number", start_pos, end_pos)
-                
-                elif word in '()[]{},:.+-*/%':
-                    start_pos = f"{line_num}.{match.start()}"
-                    end_pos = f"{line_num}.{match.end()}"
-                    self.text_widget.tag_add("delimiters", start_pos, end_pos)
-
-    def visualize_whitespace(self):
-        """Wizualizuje wcięcia i tabulatory."""
-        self.text_widget.tag_remove("indent", "1.0", "end")
-        
-        for line_num in range(1, int(self.text_widget.index(tk.END).split('.')[0])):
-            line_text = self.text_widget.get(f"{line_num}.0", f"{line_num}.end")
-            
-            indent_length = len(line_text) - len(line_text.lstrip())
-            if indent_length > 0:
-                self.text_widget.tag_add("indent", f"{line_num}.0", f"{line_num}.{indent_length}")
+        """Podświetla składnię i wcięcia (tylko zmienione linie w widocznym fragmencie)."""
+        self.highlighter.update()
 
     def check_syntax_error(self):
         """Sprawdza błędy składni w kodzie i je podświetla."""
@@ -522,6 +504,7 @@ class PythonEditor(_TkBase):  # type: ignore
 
         self.text_widget.delete("1.0", tk.END)
         self.file_path = None
+        self.sync_language_server()
         self.set_unsaved_changes(False)
         self.title("Prosty Edytor Pythona - Nowy Plik")
         self.status_bar.config(text="Nowy plik")
@@ -563,30 +546,29 @@ class PythonEditor(_TkBase):  # type: ignore
 
         self.save_file()
         
+        output_window = tk.Toplevel(self)
+        output_window.title("Wynik Uruchomienia")
+        output_window.geometry("600x400")
+        output_text = scrolledtext.ScrolledText(output_window, wrap="word", background="black", foreground="white")
+        output_text.pack(fill="both", expand=True)
+        output_text.tag_config("green", foreground="#7CFC00")
+        output_text.tag_config("red", foreground="#FF6347")
+        output_text.config(state="disabled")
+
+        # Wyjście jest strumieniowane w trakcie działania programu (stderr na czerwono)
+        console = RunConsole(output_text, stderr_tag="red",
+                             on_exit=lambda code: console.write(f"\n--- Zakończono (kod {code}) ---\n", "green"))
+
+        def close_output():
+            console.stop()
+            output_window.destroy()
+
+        output_window.protocol("WM_DELETE_WINDOW", close_output)
         try:
             python_executable = "python3" if os.name == "posix" else "python"
-            process = subprocess.Popen([python_executable, self.file_path],
-                                       stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                                       text=True, encoding='utf-8')
-            stdout, stderr = process.communicate()
-            
-            output_window = tk.Toplevel(self)
-            output_window.title("Wynik Uruchomienia")
-            output_window.geometry("600x400")
-            output_text = scrolledtext.ScrolledText(output_window, wrap="word", background="black", foreground="white")
-            output_text.pack(fill="both", expand=True)
-            
-            if stdout:
-                output_text.insert(tk.END, "--- Standardowe Wyjście ---\n", ("green",))
-                output_text.insert(tk.END, stdout)
-            
-            if stderr:
-                output_text.insert(tk.END, "\n--- Błędy ---\n", ("red",))
-                output_text.insert(tk.END, stderr)
-            
-            output_text.config(state="disabled")
-            
+            console.start([python_executable, "-u", self.file_path])
         except FileNotFoundError:
+            output_window.destroy()
             messagebox.showerror("Błąd", "Nie znaleziono interpretera Pythona. Sprawdź, czy Python jest poprawnie zainstalowany i dodany do ścieżki systemowej (PATH).)")
 
     def on_scroll(self, *args):
@@ -5,9 +5,18 @@ import os
 import re
 import sys
 import shlex
+import shutil
+import tempfile
 import keyword
 import builtins
 
+from syntax_highlighter import IncrementalHighlighter
+from word_index import WordIndex
+from run_console import RunConsole
+import warm_kernel
+import profile_run
+import find_replace
+
 # Próba zaimportowania tkinterdnd2 dla funkcji "przeciągnij i upuść"
 try:
     from tkinterdnd2 import TkinterDnD, DND_FILES
@@ -33,8 +42,17 @@ class PythonEditor(_TkBase):
         self.find_text_var: tk.StringVar = tk.StringVar()
         self.replace_text_var: tk.StringVar = tk.StringVar()
         self.last_found_index: str = "1.0"
-
-        self.process: subprocess.Popen | None = None
+        self.find_regex_var: tk.BooleanVar = tk.BooleanVar(value=False)
+        self.find_case_var: tk.BooleanVar = tk.BooleanVar(value=True)
+        self.find_word_var: tk.BooleanVar = tk.BooleanVar(value=False)
+        # Miejsce, od którego wyszukiwanie w trakcie pisania szuka pierwszego dopasowania
+        self.find_origin: str = "1.0"
+        self.find_jump_pending: bool = False
+
+        # Profilowanie: katalog wyników trwającego uruchomienia i ostatni raport
+        self.profile_dir: str | None = None
+        self.profile_report: profile_run.ProfileReport | None = None
+        self.profile_sort: str = "cumtime"
 
         # Zdefiniowanie motywów
         self.themes = {
@@ -57,7 +75,9 @@ class PythonEditor(_TkBase):
                 "self": "#9cdcfe",
                 "delimiters": "#d4d4d4",
                 "delimiter_match": "#3a3a3a",
-                "find_highlight": "#4a4a4a"
+                "find_highlight": "#4a4a4a",
+                "find_match": "#3b4f66",
+                "heat": ["#3a3320", "#574020", "#74401f", "#93381d", "#b3261b"]
             },
             "Jasny": {
                 "bg_color": "#ffffff",
@@ -78,7 +98,9 @@ class PythonEditor(_TkBase):
                 "self": "#a52a2a",
                 "delimiters": "#000000",
                 "delimiter_match": "#e0e0e0",
-                "find_highlight": "#ffff00"
+                "find_highlight": "#ffff00",
+                "find_match": "#fff2b3",
+                "heat": ["#fff4c2", "#ffe08a", "#ffc266", "#ff9a52", "#ff6a45"]
             }
         }
 
@@ -120,6 +142,16 @@ class PythonEditor(_TkBase):
         self.autocomplete_start_index = None
         # Zbiór słów bazowych: słowa kluczowe i wbudowane nazwy Pythona
         self.base_autocomplete_words = set(keyword.kwlist) | set(dir(builtins))
+        # Indeks słów dokumentu aktualizowany przy każdej edycji (tylko zmienione linie)
+        self.word_index = WordIndex(
+            lambda first, last: self.text_widget.get(f"{first}.0", f"{last}.end"),
+            self.base_autocomplete_words,
+            int(self.text_widget.index("end-1c").split(".")[0]))
+        self.highlighter.listeners.append(self.word_index.on_change)
+        # Indeks wszystkich dopasowań wyszukiwania, aktualizowany przy edycji (tylko zmienione linie)
+        self.search = find_replace.IncrementalSearch(self.text_widget, on_update=self.update_find_status)
+        self.highlighter.listeners.append(self.search.on_change)
+        self.find_text_var.trace_add("write", lambda *args: self.incremental_find())
 
     def setup_ui(self):
         """Konfiguruje interfejs użytkownika edytora."""
@@ -177,8 +209,18 @@ class PythonEditor(_TkBase):
         run_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Uruchom", menu=run_menu)
         run_menu.add_command(label="Uruchom program", command=self.run_code, accelerator="F5")
+        run_menu.add_command(label="Uruchom z profilerem", command=self.profile_code, accelerator="Ctrl+F5")
         run_menu.add_command(label="Zatrzymaj", command=self.stop_code, accelerator="Shift+F5")
         run_menu.add_command(label="Otwórz terminal systemowy", command=self.open_system_terminal, accelerator="Ctrl+T")
+        run_menu.add_separator()
+        self.timestamps_var = tk.BooleanVar(value=False)
+        run_menu.add_checkbutton(label="Znaczniki czasu w terminalu", variable=self.timestamps_var,
+                                 command=lambda: setattr(self.console, "timestamps", self.timestamps_var.get()))
+        self.warm_var = tk.BooleanVar(value=False)
+        run_menu.add_checkbutton(label="Ciepły interpreter (numpy/pandas zaimportowane raz)", variable=self.warm_var,
+                                 command=self.toggle_warm_kernel)
+        self.line_sampling_var = tk.BooleanVar(value=True)
+        run_menu.add_checkbutton(label="Profiler: czas linii (próbkowanie)", variable=self.line_sampling_var)
 
         help_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Pomoc", menu=help_menu)
@@ -192,8 +234,21 @@ class PythonEditor(_TkBase):
                                                                                     background=self.terminal_bg, foreground=self.terminal_fg,
                                                                                     insertbackground="white", border=0,
                                                                                     font=("Consolas", 10))
+        # Pole wejścia programu (Enter wysyła linię, Ctrl+D zamyka wejście)
+        self.stdin_entry = tk.Entry(self.terminal_frame, bg=self.terminal_bg, fg=self.terminal_fg,
+                                    insertbackground=self.terminal_fg, relief="flat", font=("Consolas", 10))
+        self.stdin_entry.pack(side="bottom", fill="x")
+        self.stdin_entry.bind("<Return>", self.send_input)
+        self.stdin_entry.bind("<Control-d>", self.close_input)
         self.terminal_text.pack(fill="both", expand=True)
         self.terminal_text.config(state="disabled")
+        # Wyjście programu czytane w tle i wstawiane porcjami - edytor nie czeka na proces
+        self.console = RunConsole(self.terminal_text, stdout_tag="success", stderr_tag="error",
+                                  on_exit=self.on_process_exit, report_time=True)
+        # Kliknięcie nagłówka tabeli profilu sortuje ją według tej kolumny
+        for key, _, _ in profile_run.COLUMNS:
+            self.terminal_text.tag_bind(f"profile_sort_{key}", "<Button-1>",
+                                        lambda event, key=key: self.show_profile_table(key))
 
         self.status_bar = tk.Label(self, text="Gotowy", bd=1, relief="sunken", anchor="w",
                                     bg=self.bg_color, fg=self.fg_color)
@@ -210,6 +265,8 @@ class PythonEditor(_TkBase):
         self.text_widget.bind("<Button-3>", self.show_popup_menu)
 
         self.setup_syntax_highlighting()
+        # Przyrostowe podświetlanie: analizowane są tylko zmienione linie
+        self.highlighter = IncrementalHighlighter(self.text_widget, indent_tag="indent", lazy=True)
 
     def set_colors(self):
         """Ustawia kolory na podstawie wybranego motywu."""
@@ -225,6 +282,8 @@ class PythonEditor(_TkBase):
         self.terminal_fg = theme["terminal_fg"]
         self.delimiter_match = theme["delimiter_match"]
         self.find_highlight = theme["find_highlight"]
+        self.find_match = theme["find_match"]
+        self.heat_colors = theme["heat"]
 
     def change_theme(self, theme_name):
         """Zmienia motyw edytora."""
@@ -236,6 +295,7 @@ class PythonEditor(_TkBase):
         self.text_widget.config(bg=self.bg_color, fg=self.fg_color, selectbackground=self.selection_bg, insertbackground=self.fg_color)
         self.line_number_bar.config(bg=self.line_num_bg, fg=self.line_num_fg)
         self.terminal_text.config(bg=self.terminal_bg, fg=self.terminal_fg)
+        self.stdin_entry.config(bg=self.terminal_bg, fg=self.terminal_fg, insertbackground=self.terminal_fg)
         self.status_bar.config(bg=self.bg_color, fg=self.fg_color)
         self.error_bar.config(bg=self.bg_color, fg=self.fg_color)
 
@@ -253,6 +313,7 @@ class PythonEditor(_TkBase):
         self.bind("<Control-t>", lambda event: self.open_system_terminal())
         self.bind("<F5>", lambda event: self.run_code())
         self.bind("<Shift-F5>", lambda event: self.stop_code())
+        self.bind("<Control-F5>", lambda event: self.profile_code())
 
     def show_about_dialog(self):
         """Wyświetla okno "O programie"."""
@@ -349,7 +410,8 @@ class PythonEditor(_TkBase):
     def handle_key_release(self, event=None):
         """Obsługuje zdarzenia zwolnienia klawisza."""
         self.update_line_numbers()
-        self.highlight_syntax_and_whitespace_and_check_errors()
+        # Sprawdzanie składni całego pliku odbywa się z opóźnieniem w update_and_mark
+        self.highlight_syntax()
         self.maybe_show_autocomplete(event)
         return None
 
@@ -394,15 +456,9 @@ class PythonEditor(_TkBase):
             self.hide_autocomplete()
 
     def build_suggestions(self, prefix):
-        """Buduje listę podpowiedzi na podstawie treści i bazowych słów."""
-        text = self.text_widget.get("1.0", tk.END)
-        words_in_doc = set(re.findall(r"[A-Za-z_][A-Za-z0-9_]*", text))
-        candidates = (self.base_autocomplete_words | words_in_doc)
-        # Filtruj po prefiksie i odrzuć dokładne dopasowanie
-        filtered = [w for w in candidates if w.startswith(prefix) and w != prefix]
-        # Sortowanie: krótsze i alfabetycznie
-        filtered.sort(key=lambda w: (len(w), w.lower()))
-        return filtered[:200]
+        """Buduje listę podpowiedzi z indeksu słów dokumentu i słów bazowych."""
+        # Ranking: ostatnio wybrane, częstsze, krótsze; na końcu dopasowania rozmyte
+        return self.word_index.complete(prefix, limit=200)
 
     def show_autocomplete_window(self, suggestions, start_index):
         """Wyświetla lub aktualizuje okno podpowiedzi przy kursorze."""
@@ -474,6 +530,7 @@ class PythonEditor(_TkBase):
         if self.autocomplete_start_index is not None:
             self.text_widget.delete(self.autocomplete_start_index, tk.INSERT)
             self.text_widget.insert(self.autocomplete_start_index, word)
+        self.word_index.record_use(word)
         self.hide_autocomplete()
         self.set_unsaved_changes()
         return "break" if event else None
@@ -633,19 +690,24 @@ class PythonEditor(_TkBase):
         self.terminal_text.tag_configure("error", foreground="#ff6347")
         self.terminal_text.tag_configure("info", foreground="#87ceeb")
         self.terminal_text.tag_configure("prompt", foreground="lightgray")
+        self.terminal_text.tag_configure("profile_header", foreground="#87ceeb", underline=True)
+        for level, color in enumerate(self.heat_colors):
+            self.line_number_bar.tag_configure(f"heat_{level}", background=color)
 
+        self.text_widget.tag_configure("find_match", background=theme["find_match"])
         self.text_widget.tag_configure("find_highlight", background=theme["find_highlight"], foreground="white")
+        self.text_widget.tag_raise("find_highlight", "find_match")
 
     def show_find_dialog(self):
         """Wyświetla okno "Znajdź i zamień"."""
         if self.find_dialog is None or not self.find_dialog.winfo_exists():
             self.find_dialog = tk.Toplevel(self)
             self.find_dialog.title("Znajdź i zamień")
-            self.find_dialog.geometry("350x200")
+            self.find_dialog.geometry("380x240")
             self.find_dialog.transient(self)
             self.find_dialog.resizable(False, False)
 
-            self.find_dialog.protocol("WM_DELETE_WINDOW", self.find_dialog.destroy)
+            self.find_dialog.protocol("WM_DELETE_WINDOW", self.close_find_dialog)
 
             find_frame = tk.LabelFrame(self.find_dialog, text="Znajdź")
             find_frame.pack(padx=5, pady=5, fill="x")
@@ -654,6 +716,8 @@ class PythonEditor(_TkBase):
             self.find_entry = tk.Entry(find_frame, textvariable=self.find_text_var, width=30)
             self.find_entry.pack(side="left", padx=5, fill="x", expand=True)
             self.find_entry.focus_set()
+            self.find_count_label = tk.Label(find_frame, text="", width=12, anchor="e")
+            self.find_count_label.pack(side="left", padx=5)
 
             replace_frame = tk.LabelFrame(self.find_dialog, text="Zamień")
             replace_frame.pack(padx=5, pady=5, fill="x")
@@ -662,52 +726,128 @@ class PythonEditor(_TkBase):
             self.replace_entry = tk.Entry(replace_frame, textvariable=self.replace_text_var, width=30)
             self.replace_entry.pack(side="left", padx=5, fill="x", expand=True)
 
+            options_frame = tk.Frame(self.find_dialog)
+            options_frame.pack(padx=5, fill="x")
+            tk.Checkbutton(options_frame, text="Wyrażenie regularne", variable=self.find_regex_var,
+                           command=self.incremental_find).pack(side="left")
+            tk.Checkbutton(options_frame, text="Wielkość liter", variable=self.find_case_var,
+                           command=self.incremental_find).pack(side="left")
+            tk.Checkbutton(options_frame, text="Całe słowa", variable=self.find_word_var,
+                           command=self.incremental_find).pack(side="left")
+
             button_frame = tk.Frame(self.find_dialog)
             button_frame.pack(pady=5)
 
+            tk.Button(button_frame, text="Poprzedni", command=self.find_previous).pack(side="left", padx=5)
             tk.Button(button_frame, text="Znajdź Następny", command=self.find_text).pack(side="left", padx=5)
             tk.Button(button_frame, text="Zamień", command=self.replace_text).pack(side="left", padx=5)
             tk.Button(button_frame, text="Zamień wszystko", command=self.replace_all_text).pack(side="left", padx=5)
 
             self.find_entry.bind("<Return>", lambda event: self.find_text())
+            self.find_entry.bind("<Shift-Return>", lambda event: self.find_previous())
 
-    def find_text(self):
-        """Znajduje następne wystąpienie tekstu."""
-        search_text = self.find_text_var.get()
-        if not search_text:
-            self.text_widget.tag_remove("find_highlight", "1.0", tk.END)
-            self.last_found_index = "1.0"
-            self.status_bar.config(text="Pole wyszukiwania jest puste.")
-            return
+            # Wyszukiwanie w trakcie pisania zaczyna od miejsca kursora
+            self.find_origin = self.text_widget.index(tk.INSERT)
+            self.incremental_find()
 
+    def close_find_dialog(self):
+        """Zamyka okno wyszukiwania i usuwa oznaczenia dopasowań."""
+        self.search.set_pattern(None)
         self.text_widget.tag_remove("find_highlight", "1.0", tk.END)
+        self.find_dialog.destroy()
+        self.find_dialog = None
 
-        start_index = self.text_widget.index(tk.INSERT)
-        pos = self.text_widget.search(search_text, start_index, stopindex=tk.END)
-
-        if not pos:
-            # Wróć na początek pliku, jeśli nic nie znaleziono
-            pos = self.text_widget.search(search_text, "1.0", stopindex=tk.END)
-            if not pos:
-                self.last_found_index = "1.0"
-                self.status_bar.config(text=f"Nie znaleziono '{search_text}'")
-                return
-
-        end_pos = f"{pos}+{len(search_text)}c"
+    def incremental_find(self):
+        """Przelicza indeks dopasowań po zmianie zapytania lub opcji i pokazuje pierwsze od miejsca startu."""
+        if self.find_dialog is None or not self.find_dialog.winfo_exists():
+            return
+        self.text_widget.tag_remove("find_highlight", "1.0", tk.END)
+        pattern = self.get_find_pattern() if self.find_text_var.get() else None
+        self.find_jump_pending = pattern is not None
+        self.search.set_pattern(pattern)
+        self.update_find_status()
+
+    def update_find_status(self):
+        """Pokazuje "k z N" w oknie wyszukiwania (wywoływane też po każdej zmianie indeksu)."""
+        if self.find_jump_pending and self.search.ready:
+            self.find_jump_pending = False
+            self.show_match(self.search.find(self.find_origin))
+            return
+        if self.find_dialog is None or not self.find_dialog.winfo_exists():
+            return
+        if self.search.pattern is None:
+            text = ""
+        elif not self.search.ready:
+            text = "Szukanie..."
+        elif not len(self.search):
+            text = "Brak wyników"
+        else:
+            text = f"Dopasowania: {len(self.search)}"
+            current = self.text_widget.tag_ranges("find_highlight")
+            if current:
+                found = self.search.find(current[0])
+                if found and found[1] == str(current[0]):
+                    text = f"{found[0] + 1} z {len(self.search)}"
+        self.find_count_label.config(text=text)
+
+    def show_match(self, found):
+        """Zaznacza dopasowanie (numer, początek, koniec) zwrócone przez indeks wyszukiwania."""
+        self.text_widget.tag_remove("find_highlight", "1.0", tk.END)
+        search_text = self.find_text_var.get()
+        if found is None:
+            self.last_found_index = "1.0"
+            self.status_bar.config(text=f"Nie znaleziono '{search_text}'")
+            self.update_find_status()
+            return
+        number, pos, end_pos = found
         self.last_found_index = end_pos
 
         self.text_widget.tag_add("find_highlight", pos, end_pos)
         self.text_widget.mark_set(tk.INSERT, end_pos)
         self.text_widget.see(pos)
-        self.status_bar.config(text=f"Znaleziono '{search_text}'")
+        self.status_bar.config(text=f"Znaleziono '{search_text}' ({number + 1} z {len(self.search)})")
+        self.update_find_status()
+
+    def get_find_pattern(self):
+        """Wzorzec z pola wyszukiwania i opcji okna albo None (komunikat na pasku stanu)."""
+        search_text = self.find_text_var.get()
+        if not search_text:
+            self.status_bar.config(text="Pole wyszukiwania jest puste.")
+            return None
+        try:
+            return find_replace.compile_pattern(search_text, self.find_regex_var.get(),
+                                                self.find_case_var.get(), self.find_word_var.get())
+        except re.error as e:
+            self.status_bar.config(text=f"Błędne wyrażenie regularne: {e}")
+            return None
+
+    def find_text(self):
+        """Znajduje następne wystąpienie tekstu (za ostatnim - od początku pliku)."""
+        if self.search.pattern is None:
+            self.text_widget.tag_remove("find_highlight", "1.0", tk.END)
+            self.last_found_index = "1.0"
+            self.get_find_pattern()
+            return
+        if not self.search.ready:
+            # Indeks jeszcze się buduje - przejdź do dopasowania, gdy będzie gotowy
+            self.find_origin = self.text_widget.index(tk.INSERT)
+            self.find_jump_pending = True
+            return
+        self.show_match(self.search.find(tk.INSERT))
+
+    def find_previous(self):
+        """Znajduje poprzednie wystąpienie tekstu (przed pierwszym - od końca pliku)."""
+        if self.search.pattern is None or not self.search.ready:
+            return
+        current = self.text_widget.tag_ranges("find_highlight")
+        self.show_match(self.search.find(current[0] if current else tk.INSERT, backwards=True))
 
     def replace_text(self):
         """Zamienia jedno wystąpienie tekstu."""
         search_text = self.find_text_var.get()
         replace_with = self.replace_text_var.get()
-
-        if not search_text:
-            self.status_bar.config(text="Pole wyszukiwania jest puste.")
+        pattern = self.get_find_pattern()
+        if pattern is None:
             return
 
         current_selection = self.text_widget.tag_ranges("find_highlight")
@@ -715,35 +855,34 @@ class PythonEditor(_TkBase):
         if current_selection:
             start_pos, end_pos = current_selection[0], current_selection[1]
 
-            if self.text_widget.get(start_pos, end_pos) == search_text:
-                self.text_widget.delete(start_pos, end_pos)
-                self.text_widget.insert(start_pos, replace_with)
+            match = pattern.fullmatch(self.text_widget.get(start_pos, end_pos))
+            if match:
+                if self.find_regex_var.get():
+                    try:
+                        replace_with = match.expand(replace_with)
+                    except re.error as e:
+                        self.status_bar.config(text=f"Błędny tekst zamiany: {e}")
+                        return
+                self.text_widget.replace(start_pos, end_pos, replace_with)
                 self.set_unsaved_changes()
                 self.status_bar.config(text=f"Zamieniono '{search_text}' na '{replace_with}'")
 
             self.find_text() # Znajdź następne wystąpienie po zamianie
 
     def replace_all_text(self):
-        """Zamienia wszystkie wystąpienia tekstu."""
+        """Zamienia wszystkie wystąpienia tekstu (jeden krok cofania)."""
         search_text = self.find_text_var.get()
         replace_with = self.replace_text_var.get()
-
-        if not search_text:
-            self.status_bar.config(text="Pole wyszukiwania jest puste.")
+        pattern = self.get_find_pattern()
+        if pattern is None:
             return
 
-        count = 0
-        start_index = "1.0"
-        while True:
-            pos = self.text_widget.search(search_text, start_index, stopindex=tk.END)
-            if not pos:
-                break
-
-            end_pos = f"{pos}+{len(search_text)}c"
-            self.text_widget.delete(pos, end_pos)
-            self.text_widget.insert(pos, replace_with)
-            start_index = f"{pos}+{len(replace_with)}c"
-            count += 1
+        # Dopasowania liczone na migawce bufora, zmiany nakładane naraz
+        try:
+            count = find_replace.replace_all(self.text_widget, pattern, replace_with, self.find_regex_var.get())
+        except re.error as e:
+            self.status_bar.config(text=f"Błędny tekst zamiany: {e}")
+            return
 
         if count > 0:
             self.set_unsaved_changes()
@@ -816,39 +955,12 @@ class PythonEditor(_TkBase):
     def highlight_syntax_and_whitespace_and_check_errors(self):
         """Wywołuje wszystkie funkcje związane z podświetlaniem i sprawdzaniem błędów."""
         self.highlight_syntax()
-        self.visualize_whitespace()
         self.check_syntax_error()
 
     def highlight_syntax(self):
-        """Podświetla składnię kodu."""
-        code = self.text_widget.get("1.0", "end-1c")
-
-        # Usunięcie wszystkich znaczników przed ponownym kolorowaniem
-        for tag in ["keyword", "string", "comment", "number", "function", "class", "self", "delimiters"]:
-            self.text_widget.tag_remove(tag, "1.0", tk.END)
-
-        # Ulepszona logika podświetlania z użyciem bardziej zaawansowanych wyrażeń regularnych
-        keywords = r'\b(if|else|elif|for|while|import|from|as|return|True|False|def|class|try|except|finally|pass|break|continue|in|is|None|not|or|and|yield|lambda|global|nonlocal|with|await|async)\b'
-        self.apply_regex_highlighting(keywords, "keyword")
-
-        functions = r'\b([a-zA-Z_][a-zA-Z0-9_]*)\s*\('
-        self.apply_regex_highlighting(functions, "function", offset_end=1)
-
-        classes = r'\b(class)\s+([a-zA-Z_][a-zA-Z0-9_]*)\b'
-        self.apply_regex_highlighting(classes, "class", group=2)
-
-        self_match = r'\bself\b'
-        self.apply_regex_highlighting(self_match, "self")
-
-        numbers = r'\b\d+(\.\d*)?([eE][+-]?\d+)?\b'
-        self.apply_regex_highlighting(numbers, "number")
-
-        strings_re = r'(".*?"|\'.*?\')'
-        self.apply_regex_highlighting(strings_re, "string")
+        """Podświetla składnię i wcięcia tylko w liniach zmienionych od ostatniego wywołania."""
+        self.highlighter.update()
 
-        comments_re = r'(#.*)'
-        self.apply_regex_highlighting(comments_re, "comment")
-    
     def check_syntax_error(self):
         """Sprawdza błędy składni i podświetla je."""
         self.error_bar.config(text="")
@@ -866,30 +978,6 @@ class PythonEditor(_TkBase):
             
             self.text_widget.tag_add("syntax_error", error_start, error_end)
 
-    def apply_regex_highlighting(self, pattern, tag, offset_end=0, group=0):
-        """Pomocnicza funkcja do podświetlania na podstawie wyrażeń regularnych."""
-        code = self.text_widget.get("1.0", tk.END)
-        for match in re.finditer(pattern, code):
-            start_index = f"1.0+{match.start()}c"
-            end_index = f"1.0+{match.end()}c"
-            if group > 0:
-                start_index = f"1.0+{match.start(group)}c"
-                end_index = f"1.0+{match.end(group)}c"
-            self.text_widget.tag_add(tag, start_index, end_index)
-        
-    def visualize_whitespace(self):
-        """Wizualizuje wcięcia."""
-        self.text_widget.tag_remove("indent", "1.0", tk.END)
-        code_lines = self.text_widget.get("1.0", "end-1c").split('\n')
-        for i, line in enumerate(code_lines):
-            indent_match = re.match(r'^\s*', line)
-            if indent_match:
-                indent_len = len(indent_match.group())
-                if indent_len > 0:
-                    start_index = f"{i+1}.0"
-                    end_index = f"{i+1}.{indent_len}"
-                    self.text_widget.tag_add("indent", start_index, end_index)
-        
     def new_file(self):
         """Tworzy nowy, pusty plik."""
         if self.unsaved_changes:
@@ -951,59 +1039,124 @@ class PythonEditor(_TkBase):
         """Uruchamia kod Pythona w terminalu."""
         if not self.save_file():
             return
+        # Upewnij się, że używamy ścieżki do interpretera, który uruchomił skrypt
+        interpreter = sys.executable
+        # -u: bez buforowania, żeby stdout i stderr przeplatały się w kolejności wypisania
+        self.start_program([interpreter, "-u", self.file_path], "Uruchamianie programu...\n")
 
+    def profile_code(self):
+        """Uruchamia kod pod profilerem; po zakończeniu pokazuje tabelę funkcji i mapę ciepła linii."""
+        if not self.save_file():
+            return
+        profile_dir = tempfile.mkdtemp(prefix="pyeditor_profile_")
+        args = profile_run.profile_args(sys.executable, self.file_path, profile_dir,
+                                        sample_lines=self.line_sampling_var.get())
+        self.start_program(args, "Uruchamianie programu z profilerem...\n", profile_dir)
+
+    def start_program(self, args, message, profile_dir=None):
+        """Czyści terminal i uruchamia proces z `args` w katalogu bieżącego pliku."""
+        self.discard_profile_dir()
+        # Tabela poprzedniego profilu znika z terminalu - nie da się jej już sortować
+        self.terminal_text.mark_unset("profile_table")
         self.terminal_text.config(state="normal")
         self.terminal_text.delete("1.0", tk.END)
-        self.terminal_text.insert(tk.END, "Uruchamianie programu...\n", "info")
+        self.terminal_text.insert(tk.END, message, "info")
         self.terminal_text.config(state="disabled")
 
-        if self.process and self.process.poll() is None:
-            self.stop_code()
-        
         try:
-            # Upewnij się, że używamy ścieżki do interpretera, który uruchomił skrypt
-            interpreter = sys.executable
-            self.process = subprocess.Popen(
-                [interpreter, self.file_path],
-                cwd=os.path.dirname(self.file_path),
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True
-            )
-            self.after(100, self.check_process)
+            self.console.start(args, interactive=True, cwd=os.path.dirname(self.file_path))
+            self.profile_dir = profile_dir
+            self.status_bar.config(text="Program uruchomiony - wejście w polu pod terminalem.")
         except Exception as e:
-            self.terminal_text.config(state="normal")
-            self.terminal_text.insert(tk.END, f"Błąd uruchamiania: {e}\n", "error")
-            self.terminal_text.config(state="disabled")
-
-    def check_process(self):
-        """Sprawdza stan procesu i pobiera dane z stdout/stderr."""
-        if self.process:
-            output = self.process.stdout.read()
-            errors = self.process.stderr.read()
-
-            self.terminal_text.config(state="normal")
-            if output:
-                self.terminal_text.insert(tk.END, output, "success")
-            if errors:
-                self.terminal_text.insert(tk.END, errors, "error")
-
-            if self.process.poll() is not None:
-                self.terminal_text.insert(tk.END, f"\nProgram zakończono z kodem wyjścia {self.process.returncode}.\n", "info")
-                self.process = None
-                self.status_bar.config(text="Program zakończono.")
-            else:
-                self.after(100, self.check_process)
-            self.terminal_text.config(state="disabled")
-            self.terminal_text.see(tk.END)
+            if profile_dir:
+                shutil.rmtree(profile_dir, ignore_errors=True)
+            self.console.write(f"Błąd uruchamiania: {e}\n", "error")
+
+    def toggle_warm_kernel(self):
+        """Włącza uruchamianie w ciepłym interpreterze (fork procesu z zaimportowanymi modułami)."""
+        self.console.launcher = warm_kernel.launcher() if self.warm_var.get() else None
+        if self.warm_var.get() and self.console.launcher is None:
+            self.warm_var.set(False)
+            self.console.write("[Ciepły interpreter wymaga systemu z fork (Linux/macOS)]\n")
+
+    def on_process_exit(self, returncode):
+        """Wywoływane po zakończeniu programu i wyświetleniu całego jego wyjścia."""
+        self.console.write(f"\nProgram zakończono z kodem wyjścia {returncode}.\n", "info")
+        self.status_bar.config(text="Program zakończono.")
+        if self.profile_dir:
+            # Odczyt statystyk w wątku roboczym - duże profile nie blokują edytora
+            profile_dir, self.profile_dir = self.profile_dir, None
+            self.status_bar.config(text="Program zakończono - wczytywanie profilu...")
+            profile_run.load_report_async(self, profile_dir,
+                                          lambda result: self.show_profile_report(result, profile_dir))
+
+    def discard_profile_dir(self):
+        """Usuwa katalog wyników profilowania, którego uruchomienie nie zostanie odczytane."""
+        if self.profile_dir:
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
+            self.profile_dir = None
+
+    def show_profile_report(self, result, profile_dir):
+        """Pokazuje wyniki profilowania: tabelę w terminalu i mapę ciepła w pasku numerów linii."""
+        shutil.rmtree(profile_dir, ignore_errors=True)
+        if isinstance(result, Exception):
+            self.console.write(f"\nBrak wyników profilowania: {result}\n", "error")
+            self.status_bar.config(text="Program zakończono.")
+            return
+        self.profile_report = result
+        if not self.console.running:
+            self.terminal_text.mark_set("profile_table", "end-1c")
+            self.terminal_text.mark_gravity("profile_table", tk.LEFT)
+            self.show_profile_table(self.profile_sort)
+
+        for level in range(len(self.heat_colors)):
+            self.text_widget.tag_remove(f"heat_{level}", "1.0", tk.END)
+        for line, level in profile_run.heat_levels(result.line_costs).items():
+            # Znacznik obejmuje znak nowej linii - przesuwa się razem z edytowanym tekstem
+            self.text_widget.tag_add(f"heat_{level}", f"{line}.0", f"{line + 1}.0")
+        self.update_line_numbers()
+
+        status = f"Profil: {result.elapsed:.2f} s"
+        if result.line_costs:
+            line, seconds = max(result.line_costs.items(), key=lambda item: item[1])
+            status += f"; najdroższa linia {line} ({seconds:.3f} s)"
+        self.status_bar.config(text=status)
+
+    def show_profile_table(self, sort):
+        """Wypisuje (ponownie) tabelę najdroższych funkcji posortowaną według kolumny `sort`."""
+        if self.profile_report is None or "profile_table" not in self.terminal_text.mark_names():
+            return
+        self.profile_sort = sort
+        self.terminal_text.config(state="normal")
+        self.terminal_text.delete("profile_table", tk.END)
+        self.terminal_text.config(state="disabled")
+
+        title = "czas linii z próbkowania" if self.profile_report.sampled else "czas funkcji z cProfile"
+        self.console.write(f"\n[Profil: {self.profile_report.elapsed:.3f} s; mapa ciepła: {title}; "
+                           "kliknij nagłówek, aby sortować]\n", "info")
+        for key, header, width in profile_run.COLUMNS:
+            label = f"{header}{' ▼' if key == sort else ''}"
+            self.console.write(f"{label:>{width}} " if width else f" {label}", ("profile_header", f"profile_sort_{key}"))
+        self.console.write("\n" + "\n".join(profile_run.format_table(self.profile_report.rows, sort)) + "\n")
+
+    def send_input(self, event=None):
+        """Przekazuje linię z pola wejścia do uruchomionego programu."""
+        line = self.stdin_entry.get()
+        if self.console.send(line + "\n"):
+            self.console.write(line + "\n", "prompt")
+            self.stdin_entry.delete(0, tk.END)
+        return "break"
+
+    def close_input(self, event=None):
+        """Zamyka wejście programu (koniec pliku)."""
+        self.console.close_stdin()
+        return "break"
 
     def stop_code(self):
         """Zatrzymuje bieżący proces."""
-        if self.process and self.process.poll() is None:
-            self.process.terminate()
-            self.terminal_text.config(state="normal")
-            self.terminal_text.insert(tk.END, "\nProgram został zatrzymany.\n", "info")
-            self.terminal_text.config(state="disabled")
+        if self.console.running:
+            self.console.stop()
+            self.console.write("\nProgram został zatrzymany.\n", "info")
             self.status_bar.config(text="Program został zatrzymany.")
 
     def open_system_terminal(self):
@@ -1044,6 +1197,8 @@ class PythonEditor(_TkBase):
         self.line_number_bar.yview_moveto(args[0])
         self.scrollbar.set(*args)
         self.update_line_numbers()
+        # Dopasowania wyszukiwania oznaczane są tylko w widocznym oknie
+        self.search.refresh()
 
     def update_line_numbers(self, event=None):
         """Aktualizuje numery linii."""
@@ -1062,6 +1217,13 @@ class PythonEditor(_TkBase):
 
         for i in range(start_line_num, end_line_num):
             self.line_number_bar.insert(tk.END, f"{i}\n")
+
+        # Mapa ciepła ostatniego profilowania (znaczniki heat_* w tekście przesuwają się przy edycji)
+        if self.profile_report is not None:
+            for row, line in enumerate(range(start_line_num, end_line_num), start=1):
+                for tag in self.text_widget.tag_names(f"{line}.0"):
+                    if tag.startswith("heat_"):
+                        self.line_number_bar.tag_add(tag, f"{row}.0", f"{row + 1}.0")
         
         self.line_number_bar.config(state="disabled")
 
@@ -2,12 +2,20 @@ import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
 import requests
 import threading
-import re
 import json
 import os
 import sys
+import time
 from pathlib import Path
 
+import http_client
+from chat_log import ChatLog, MAX_MESSAGES
+from code_block_colorizer import CodeBlockColorizer
+from copy_overlay import CopyOverlay
+from response_cache import deterministic, get_cache
+from sse_parser import SSEParser, chat_deltas
+from stream_renderer import StreamRenderer
+
 # Określenie ścieżki do pliku konfiguracyjnego
 def get_config_path():
     """
@@ -42,7 +50,12 @@ def get_config_path():
     return str(config_path)
 
 CONFIG_FILE = get_config_path()
-TIMEOUT = 120
+# Tryby wyświetlania odpowiedzi: nazwa -> liczba znaków na klatkę (None = od razu)
+RENDER_MODES = {
+    "instant": None,
+    "paced": 24,
+    "typewriter": 2,
+}
 
 # --- Kolory Dark Theme --- #
 COLORS = {
@@ -90,7 +103,9 @@ def load_config():
     # Zwróć domyślną konfigurację
     return {
         "lm_studio": {"ip": "127.0.0.1", "port": 7860},
-        "proxy_agent": {"ip": "localhost", "port": 3000}
+        "proxy_agent": {"ip": "localhost", "port": 3000},
+        "render_mode": "instant",
+        "log_max_messages": MAX_MESSAGES
     }
 
 def save_config():
@@ -100,7 +115,9 @@ def save_config():
     try:
         config_data = {
             "lm_studio": {"ip": lm_ip_var.get(), "port": int(lm_port_var.get())},
-            "proxy_agent": {"ip": proxy_ip_var.get(), "port": int(proxy_port_var.get())}
+            "proxy_agent": {"ip": proxy_ip_var.get(), "port": int(proxy_port_var.get())},
+            "render_mode": render_mode_var.get(),
+            "log_max_messages": chat_log.max_messages
         }
         
         # Upewnij się, że katalog istnieje
@@ -156,19 +173,6 @@ def validate_config_inputs():
 # Załaduj konfigurację
 config = load_config()
 
-# --- Lista przycisków kopiowania --- #
-copy_buttons = []
-
-def clear_copy_buttons():
-    """Usuń wszystkie przyciski kopiowania"""
-    global copy_buttons
-    for button in copy_buttons:
-        try:
-            button.destroy()
-        except:
-            pass
-    copy_buttons.clear()
-
 def copy_code_to_clipboard(code_text):
     """Kopiuje kod do schowka i pokazuje komunikat"""
     try:
@@ -189,121 +193,6 @@ def copy_code_to_clipboard(code_text):
     except Exception as e:
         print(f"Błąd kopiowania: {e}")
 
-def create_copy_button(text_widget, code_start, code_end, code_content):
-    """Tworzy przycisk kopiowania dla bloku kodu"""
-    def try_create_button():
-        try:
-            # Upewnij się, że widget jest widoczny i ma layout
-            text_widget.update_idletasks()
-            
-            # Pobierz pozycję bloku kodu na ekranie
-            bbox = text_widget.bbox(code_start)
-            if bbox:
-                x, y, width, height = bbox
-                
-                # Sprawdź czy pozycja jest sensowna
-                if x >= 0 and y >= 0:
-                    # Utwórz przycisk
-                    copy_btn = tk.Button(text_widget, text="📋 Copy", 
-                                       command=lambda: copy_code_to_clipboard(code_content),
-                                       bg=COLORS['accent'], fg='white', 
-                                       font=('Consolas', 7, 'bold'),
-                                       relief='flat', borderwidth=0, 
-                                       padx=4, pady=2, cursor='hand2')
-                    
-                    # Pobierz szerokość tekstu w tym wierszu aby umieścić przycisk na końcu
-                    line_start = text_widget.index(f"{code_start} linestart")
-                    line_end = text_widget.index(f"{code_start} lineend")
-                    line_bbox = text_widget.bbox(line_end)
-                    
-                    if line_bbox:
-                        btn_x = line_bbox[0] - 60  # 60 pikseli od prawej krawędzi linii
-                        btn_y = y + 2
-                    else:
-                        btn_x = x + max(200, width - 60)  # Fallback
-                        btn_y = y + 2
-                    
-                    # Umieść przycisk
-                    copy_btn.place(x=btn_x, y=btn_y)
-                    
-                    # Dodaj hover effect
-                    def on_copy_enter(event):
-                        event.widget.config(bg=COLORS['accent_hover'])
-                    def on_copy_leave(event):
-                        event.widget.config(bg=COLORS['accent'])
-                        
-                    copy_btn.bind('<Enter>', on_copy_enter)
-                    copy_btn.bind('<Leave>', on_copy_leave)
-                    
-                    # Dodaj do listy do późniejszego usunięcia
-                    copy_buttons.append(copy_btn)
-                    return True
-            return False
-        except Exception as e:
-            print(f"Błąd tworzenia przycisku: {e}")
-            return False
-    
-    # Spróbuj utworzyć przycisk z opóźnieniem
-    def delayed_create(attempt=0):
-        if try_create_button():
-            return
-        elif attempt < 5:  # Maksymalnie 5 prób
-            root.after(200 + attempt * 100, lambda: delayed_create(attempt + 1))
-    
-    # Rozpocznij proces tworzenia
-    root.after(300, delayed_create)
-
-# --- Kolorowanie kodu Python --- #
-def colorize_python_code(text_widget, start_index):
-    try:
-        content = text_widget.get(start_index, tk.END)
-        code_blocks = re.finditer(r'```(?:python|py|javascript|js|java|c\+\+|cpp|c|html|css|sql|json|xml|yaml|yml|bash|shell|powershell)?\s*\n?(.*?)```', content, re.DOTALL | re.IGNORECASE)
-        
-        for match in code_blocks:
-            try:
-                code_content = match.group(1).strip()
-                if not code_content:  # Pomiń puste bloki
-                    continue
-                    
-                code_start_index = text_widget.index(f"{start_index}+{match.start(1)}c")
-                code_end_index = text_widget.index(f"{start_index}+{match.end(1)}c")
-                text_widget.tag_add('code_block', code_start_index, code_end_index)
-
-                # Utwórz przycisk kopiowania dla tego bloku
-                create_copy_button(text_widget, code_start_index, code_end_index, code_content)
-
-                keywords = ['def', 'class', 'if', 'elif', 'else', 'for', 'while', 'try', 'except', 'finally', 
-                            'import', 'from', 'as', 'return', 'yield', 'break', 'continue', 'pass', 'lambda',
-                            'and', 'or', 'not', 'in', 'is', 'None', 'True', 'False', 'with', 'async', 'await',
-                            'function', 'var', 'let', 'const', 'public', 'private', 'static', 'void', 'int', 'string']
-                
-                for keyword in keywords:
-                    for kw_match in re.finditer(r'\b' + re.escape(keyword) + r'\b', code_content):
-                        kw_start_pos = text_widget.index(f"{code_start_index}+{kw_match.start()}c")
-                        kw_end_pos   = text_widget.index(f"{code_start_index}+{kw_match.end()}c")
-                        text_widget.tag_add('keyword', kw_start_pos, kw_end_pos)
-
-                for pattern in [r'"[^"]*"', r"'[^']*'", r'`[^`]*`']:
-                    for str_match in re.finditer(pattern, code_content):
-                        str_start_pos = text_widget.index(f"{code_start_index}+{str_match.start()}c")
-                        str_end_pos   = text_widget.index(f"{code_start_index}+{str_match.end()}c")
-                        text_widget.tag_add('string', str_start_pos, str_end_pos)
-
-                for comment_match in re.finditer(r'(#.*$|//.*$|/\*.*?\*/)', code_content, re.MULTILINE | re.DOTALL):
-                    com_start_pos = text_widget.index(f"{code_start_index}+{comment_match.start()}c")
-                    com_end_pos   = text_widget.index(f"{code_start_index}+{comment_match.end()}c")
-                    text_widget.tag_add('comment', com_start_pos, com_end_pos)
-
-                for num_match in re.finditer(r'\b\d+\.?\d*\b', code_content):
-                    num_start_pos = text_widget.index(f"{code_start_index}+{num_match.start()}c")
-                    num_end_pos   = text_widget.index(f"{code_start_index}+{num_match.end()}c")
-                    text_widget.tag_add('number', num_start_pos, num_end_pos)
-
-            except tk.TclError:
-                pass
-    except Exception:
-        pass
-
 # --- Funkcje requestów --- #
 def get_current_url(endpoint):
     if validate_config_inputs():
@@ -314,59 +203,42 @@ def get_current_url(endpoint):
     else:
         return f"http://{proxy_ip_var.get()}:{proxy_port_var.get()}/v1/agents"
 
-def stream_text_to_log(text, tag='response', chunk_size=3, delay=0.02):
-    """
-    Wyświetla tekst w logu znak po znaku dla efektu płynnego pisania
-    """
-    global stop_streaming
-    
+def begin_response():
+    """Zaznacza początek odpowiedzi w logu (dla kolorowania kodu)"""
+    global response_started
+    response_started = time.perf_counter()
+    colorizer.start('end-1c')
+
+def finish_response():
+    """Koloruje ostatnie bloki kodu odpowiedzi i zapisuje czas renderowania"""
+    colorizer.stop()
+    now = time.perf_counter()
     log_text.configure(state=tk.NORMAL)
-    
-    # Znajdź pozycję startu dla kolorowania kodu
-    response_start = log_text.index(tk.END)
-    
-    # Dodaj tekst znak po znaku
-    for i in range(0, len(text), chunk_size):
-        if stop_streaming:
-            break
-            
-        chunk = text[i:i+chunk_size]
-        log_text.insert(tk.END, chunk, tag)
-        log_text.see(tk.END)
-        log_text.update()
-        
-        # Małe opóźnienie dla efektu płynnego pisania
-        threading.Event().wait(delay)
-    
-    # Po zakończeniu dodaj nową linię i kolorowanie kodu
-    if not stop_streaming:
-        log_text.insert(tk.END, "\n\n", tag)
-        # Usuń stare przyciski przed dodaniem nowych
-        clear_copy_buttons()
-        # Dodaj opóźnienie dla pełnego renderowania
-        root.after(500, lambda: colorize_python_code(log_text, response_start))
-    
-    log_text.see(tk.END)
+    log_text.insert(tk.END, f"⏱ Wyświetlono w {now - response_started:.2f} s "
+                            f"(od wysłania {now - request_started:.2f} s, tryb {render_mode_var.get()})\n\n", 'info')
     log_text.configure(state=tk.DISABLED)
+    log_text.see(tk.END)
 
-def send_request_thread():
-    global streaming_active, stop_streaming
-    
-    streaming_active = True
-    send_button.config(state='disabled', text="⏳ Wysyłam...")
-    stop_button.config(state='normal', command=stop_stream)
-    
+def stream_text_to_log(text, tag='response'):
+    """
+    Wyświetla gotową odpowiedź w logu; tempo wyświetlania zależy od trybu (renderer.pace)
+    """
+    renderer.call(begin_response)
+    renderer.write(text, tag)
+    renderer.write("\n\n", tag)
+    renderer.call(finish_response)
+
+def request_finished():
+    global streaming_active
+    streaming_active = False
+    send_button.config(state='normal', text="▶ Wyślij")
+    stop_button.config(state='disabled')
+
+def send_request_thread(endpoint, text, url, cache=None):
+    """
+    Wysyła żądanie i przekazuje odpowiedź do renderer - wątek nie dotyka widgetów Tk
+    """
     try:
-        endpoint = endpoint_var.get()
-        text = input_text.get("1.0", tk.END).strip()
-        if not text:
-            log_text.configure(state=tk.NORMAL)
-            log_text.insert(tk.END, "❌ Nie wpisano tekstu!\n", 'error')
-            log_text.configure(state=tk.DISABLED)
-            return
-
-        url = get_current_url(endpoint)
-        
         if endpoint == "Chat":
             body = {"model": "deepseek-coder-v2-lite-instruct",
                     "messages": [{"role": "user", "content": text}],
@@ -374,73 +246,50 @@ def send_request_thread():
                     "stream": True}  # Włącz streaming
         else:
             body = {"query": text}
+        if cache:
+            body = deterministic(body)
+
+        renderer.write(f"🔥 Wysyłam do {endpoint}...\n", 'info')
 
-        log_text.configure(state=tk.NORMAL)
-        log_text.insert(tk.END, f"🔥 Wysyłam do {endpoint}...\n", 'info')
-        log_text.see(tk.END)
-        log_text.update()
-        log_text.configure(state=tk.DISABLED)
+        cached = cache.get(url, body) if cache else None
+        if cached is not None:
+            renderer.write("✅ Odpowiedź (z pamięci podręcznej):\n", 'success')
+            stream_text_to_log(cached, 'response')
 
-        if endpoint == "Chat" and "stream" in body:
+        elif endpoint == "Chat" and "stream" in body:
             # Obsługa streamingu dla Chat
-            with requests.post(url, json=body, timeout=TIMEOUT, stream=True) as response:
+            with http_client.post(url, json=body, stream=True) as response:
                 if stop_streaming:
                     return
                     
                 response.raise_for_status()
                 
-                log_text.configure(state=tk.NORMAL)
-                log_text.insert(tk.END, f"✅ Odpowiedź:\n", 'success')
-                log_text.see(tk.END)
-                log_text.update()
+                renderer.write(f"✅ Odpowiedź ({http_client.timing_text(response.timing)}):\n", 'success')
+                renderer.call(begin_response)
+                parts = []
+                parser = SSEParser()
                 
-                response_start = log_text.index(tk.END)
-                content_buffer = ""
-                
-                for line in response.iter_lines():
+                # Surowe porcje (tak, jak przychodzą z sieci) dzieli na zdarzenia SSEParser
+                for content in chat_deltas(response.iter_content(chunk_size=None), parser):
                     if stop_streaming:
-                        log_text.insert(tk.END, "\n[PRZERWANO]\n\n", 'warning')
+                        renderer.call(colorizer.stop)
+                        renderer.write("\n[PRZERWANO]\n\n", 'warning')
                         break
-                        
-                    if line:
-                        line = line.decode('utf-8')
-                        if line.startswith('data: '):
-                            data_str = line[6:]  # Usuń "data: "
-                            if data_str.strip() == '[DONE]':
-                                break
-                            try:
-                                data = json.loads(data_str)
-                                if 'choices' in data and len(data['choices']) > 0:
-                                    delta = data['choices'][0].get('delta', {})
-                                    if 'content' in delta:
-                                        chunk_text = delta['content']
-                                        content_buffer += chunk_text
-                                        
-                                        # Wyświetl znak po znaku
-                                        for char in chunk_text:
-                                            if stop_streaming:
-                                                break
-                                            log_text.insert(tk.END, char, 'response')
-                                            log_text.see(tk.END)
-                                            log_text.update()
-                                            threading.Event().wait(0.008)  # Małe opóźnienie
-                                            
-                            except json.JSONDecodeError:
-                                continue
+                    # Fragment trafia do kolejki - wątek Tk wyświetli go w najbliższej klatce
+                    renderer.write(content, 'response')
+                    parts.append(content)
                 
-                # Po zakończeniu streamingu dodaj kolorowanie
+                # Bloki kodu są kolorowane na bieżąco - po ostatnim zapisz czas renderowania
                 if not stop_streaming:
-                    log_text.insert(tk.END, "\n\n")
-                    # Usuń stare przyciski przed dodaniem nowych
-                    clear_copy_buttons()
-                    # Dodaj opóźnienie dla pełnego renderowania
-                    root.after(500, lambda: colorize_python_code(log_text, response_start))
-                
-                log_text.configure(state=tk.DISABLED)
+                    renderer.write("\n\n")
+                    renderer.call(finish_response)
+                    # Strumień urwany przed [DONE] nie trafia do pamięci
+                    if cache and parser.done:
+                        cache.put(url, body, "".join(parts))
                 
         else:
             # Standardowe żądanie bez streamingu
-            response = requests.post(url, json=body, timeout=TIMEOUT)
+            response = http_client.post(url, json=body)
             response.raise_for_status()
             data = response.json()
 
@@ -467,54 +316,58 @@ def send_request_thread():
                 # Jeśli nie znamy formatu, wyświetl całą odpowiedź
                 content = json.dumps(data, indent=2, ensure_ascii=False)
             
-            log_text.configure(state=tk.NORMAL)
-            log_text.insert(tk.END, f"✅ Odpowiedź:\n", 'success')
-            log_text.see(tk.END)
-            log_text.update()
-            log_text.configure(state=tk.DISABLED)
+            renderer.write(f"✅ Odpowiedź ({http_client.timing_text(response.timing)}):\n", 'success')
             
             # Użyj funkcji streamingu nawet dla zwykłej odpowiedzi
             if content:
-                # Usuń stare przyciski przed streamingiem
-                clear_copy_buttons()
-                stream_text_to_log(content, 'response', chunk_size=2, delay=0.015)
+                stream_text_to_log(content, 'response')
+                if cache:
+                    cache.put(url, body, content)
             else:
-                clear_copy_buttons()
-                stream_text_to_log("Brak treści w odpowiedzi", 'error', chunk_size=2, delay=0.015)
+                stream_text_to_log("Brak treści w odpowiedzi", 'error')
 
     except requests.exceptions.RequestException as e:
-        log_text.configure(state=tk.NORMAL)
-        log_text.insert(tk.END, f"❌ Błąd żądania: {e}\n\n", 'error')
-        log_text.see(tk.END)
-        log_text.configure(state=tk.DISABLED)
+        renderer.write(f"❌ Błąd żądania: {e}\n\n", 'error')
     except KeyError as e:
-        log_text.configure(state=tk.NORMAL)
-        log_text.insert(tk.END, f"❌ Nieprawidłowa odpowiedź od serwera: {e}\n\n", 'error')
-        log_text.see(tk.END)
-        log_text.configure(state=tk.DISABLED)
+        renderer.write(f"❌ Nieprawidłowa odpowiedź od serwera: {e}\n\n", 'error')
     except Exception as e:
-        log_text.configure(state=tk.NORMAL)
-        log_text.insert(tk.END, f"❌ Nieoczekiwany błąd: {e}\n\n", 'error')
-        log_text.see(tk.END)
-        log_text.configure(state=tk.DISABLED)
+        renderer.write(f"❌ Nieoczekiwany błąd: {e}\n\n", 'error')
     finally:
-        streaming_active = False
-        send_button.config(state='normal', text="▶ Wyślij")
-        stop_button.config(state='disabled')
+        if cache:
+            renderer.call(cache_status_var.set, cache.stats_text())
+        renderer.call(chat_log.end)
+        renderer.call(request_finished)
 
 # Zmienne globalne dla kontroli streamingu
 streaming_active = False
 stop_streaming = False
+# Chwila wysłania żądania i rozpoczęcia wyświetlania odpowiedzi (do pomiaru czasu renderowania)
+request_started = response_started = 0.0
 
 def send_request():
-    global streaming_active, stop_streaming
-    if not streaming_active:
-        stop_streaming = False
-        threading.Thread(target=send_request_thread, daemon=True).start()
+    global streaming_active, stop_streaming, request_started
+    if streaming_active:
+        return
+    endpoint = endpoint_var.get()
+    text = input_text.get("1.0", tk.END).strip()
+    if not text:
+        renderer.write("❌ Nie wpisano tekstu!\n", 'error')
+        return
+    url = get_current_url(endpoint)
+    streaming_active = True
+    stop_streaming = False
+    request_started = time.perf_counter()
+    renderer.pace = RENDER_MODES.get(render_mode_var.get())
+    renderer.call(chat_log.begin)
+    send_button.config(state='disabled', text="⏳ Wysyłam...")
+    stop_button.config(state='normal', command=stop_stream)
+    threading.Thread(target=send_request_thread, args=(endpoint, text, url, get_cache(cache_var.get())), daemon=True).start()
     
 def stop_stream():
     global stop_streaming
     stop_streaming = True
+    # Pokaż od razu to, co już nadeszło
+    renderer.skip_pacing()
 
 def on_button_enter(event):
     event.widget.config(bg=COLORS['accent_hover'])
@@ -573,6 +426,23 @@ endpoint_combo.grid(row=0, column=0, sticky='w')
 status_entry = ttk.Entry(endpoint_frame, textvariable=status_var, width=30, style='Dark.TEntry', state='readonly')
 status_entry.grid(row=0, column=1, sticky='w', padx=(10,0))
 
+# Tryb wyświetlania odpowiedzi
+render_mode_var = tk.StringVar(value=config.get("render_mode", "instant"))
+ttk.Label(endpoint_frame, text="Wyświetlanie:", style='Dark.TLabel').grid(row=0, column=2, sticky='e', padx=(10,2))
+render_mode_combo = ttk.Combobox(endpoint_frame, textvariable=render_mode_var, values=list(RENDER_MODES),
+                                 state="readonly", style='Dark.TCombobox', width=11)
+render_mode_combo.grid(row=0, column=3, sticky='w')
+render_mode_combo.bind("<<ComboboxSelected>>", lambda event: setattr(renderer, 'pace', RENDER_MODES[render_mode_var.get()]))
+
+# Tryb deterministyczny: żądania modelu wysyłane z temperature 0 i zapamiętywane (agent - bez pamięci)
+cache_var = tk.BooleanVar(value=False)
+cache_status_var = tk.StringVar()
+tk.Checkbutton(endpoint_frame, text="Temperatura 0 + cache", variable=cache_var,
+               bg=COLORS['bg_primary'], fg=COLORS['fg_primary'], selectcolor=COLORS['bg_input'],
+               activebackground=COLORS['bg_primary'], activeforeground=COLORS['fg_primary'],
+               font=('Consolas', 9)).grid(row=0, column=4, sticky='w', padx=(10,0))
+ttk.Label(endpoint_frame, textvariable=cache_status_var, style='Dark.TLabel').grid(row=0, column=5, sticky='w', padx=(6,0))
+
 # --- Tekst wejściowy --- #
 ttk.Label(main_frame, text="Tekst do wysłania:", style='Dark.TLabel').grid(row=2, column=0, sticky='w', pady=(10,5), columnspan=3)
 
@@ -588,9 +458,8 @@ button_frame.columnconfigure(0, weight=1)
 
 # --- Przycisk Clear --- #
 clear_button = tk.Button(button_frame, text="🗑 Wyczyść", 
-                        command=lambda: (log_text.configure(state=tk.NORMAL), 
-                                       log_text.delete(1.0, tk.END),
-                                       clear_copy_buttons(),
+                        command=lambda: (chat_log.clear(),
+                                       log_text.configure(state=tk.NORMAL),
                                        log_text.insert(tk.END, "🌟 Log wyczyszczony!\n\n", 'info'),
                                        log_text.configure(state=tk.DISABLED)),
                         bg=COLORS['warning'], fg='white', font=('Consolas', 10, 'bold'),
@@ -652,6 +521,24 @@ log_text.tag_configure('comment', foreground=COLORS['comment'], font=('Consolas'
 log_text.tag_configure('number', foreground=COLORS['number'], font=('Consolas', 10))
 log_text.configure(state=tk.DISABLED)
 
+# Wyświetlanie odpowiedzi w rytmie klatek (wątek żądania nie dotyka widgetów)
+renderer = StreamRenderer(log_text, pace=RENDER_MODES.get(render_mode_var.get()))
+# Bloki kodu kolorowane w chwili domknięcia ``` (po każdej klatce z nowym tekstem)
+colorizer = CodeBlockColorizer(log_text)
+# Jeden przycisk kopiowania pokazywany nad blokiem kodu pod kursorem
+copy_overlay = CopyOverlay(log_text, copy_code_to_clipboard, hover_bg=COLORS['accent_hover'],
+                           bg=COLORS['accent'], fg='white', font=('Consolas', 7, 'bold'),
+                           relief='flat', borderwidth=0, padx=4, pady=2)
+renderer.on_frame = colorizer.update
+# Widget trzyma ostatnie wiadomości, pełny log zapisywany jest na dysk (wczytywany przy przewinięciu w górę)
+chat_log = ChatLog(log_text, Path.home() / ".proxy_lm_studio" / "transcripts" / time.strftime("log_%Y%m%d_%H%M%S.jsonl"),
+                   max_messages=config.get("log_max_messages", MAX_MESSAGES))
+
+def on_close():
+    chat_log.close()
+    root.destroy()
+root.protocol("WM_DELETE_WINDOW", on_close)
+
 # --- Bind Ctrl+Enter --- #
 def on_enter_key(event):
     if event.state & 0x4:
@@ -6,8 +6,10 @@ import re
 import json
 import os
 
+import http_client
+from response_cache import deterministic, get_cache
+
 CONFIG_FILE = "config.json"
-TIMEOUT = 120
 
 # --- Kolory Dark Theme --- #
 COLORS = {
@@ -118,18 +120,31 @@ def send_request_thread():
                     "max_tokens": 4000}
         else:
             body = {"query": text}
+        cache = get_cache(cache_var.get())
+        if cache:
+            body = deterministic(body)
 
         log_text.configure(state=tk.NORMAL)
         log_text.insert(tk.END, f"🔥 Wysyłam do {endpoint}...\n", 'info')
         log_text.see(tk.END)
         log_text.update()
 
-        response = requests.post(url, json=body, timeout=TIMEOUT)
-        response.raise_for_status()
-        data = response.json()
+        data = cache.get(url, body) if cache else None
+        cached = data is not None
+        if cached:
+            source = "z pamięci podręcznej"
+        else:
+            response = http_client.post(url, json=body)
+            response.raise_for_status()
+            data = response.json()
+            source = http_client.timing_text(response.timing)
 
         content = data['choices'][0]['message']['content']
-        log_text.insert(tk.END, f"✅ Odpowiedź:\n", 'success')
+        if cache:
+            if not cached:
+                cache.put(url, body, data)
+            cache_status_var.set(cache.stats_text())
+        log_text.insert(tk.END, f"✅ Odpowiedź ({source}):\n", 'success')
         response_start = log_text.index(tk.END)
         log_text.insert(tk.END, f"{content}\n\n", 'response')
         colorize_python_code(log_text, response_start)
@@ -198,6 +213,15 @@ endpoint_combo.grid(row=0, column=0, sticky='w')
 status_entry = ttk.Entry(endpoint_frame, textvariable=status_var, width=30, style='Dark.TEntry', state='readonly')
 status_entry.grid(row=0, column=1, sticky='w', padx=(10,0))
 
+# Tryb deterministyczny: żądania modelu wysyłane z temperature 0 i zapamiętywane (agent - bez pamięci)
+cache_var = tk.BooleanVar(value=False)
+cache_status_var = tk.StringVar()
+tk.Checkbutton(endpoint_frame, text="Temperatura 0 + cache", variable=cache_var,
+               bg=COLORS['bg_primary'], fg=COLORS['fg_primary'], selectcolor=COLORS['bg_input'],
+               activebackground=COLORS['bg_primary'], activeforeground=COLORS['fg_primary'],
+               font=('Consolas', 9)).grid(row=0, column=2, sticky='w', padx=(10,0))
+ttk.Label(endpoint_frame, textvariable=cache_status_var, style='Dark.TLabel').grid(row=0, column=3, sticky='w', padx=(6,0))
+
 # --- Tekst wejściowy --- #
 ttk.Label(main_frame, text="Tekst do wysłania:", style='Dark.TLabel').grid(row=2, column=0, sticky='w', pady=(10,5), columnspan=3)
 
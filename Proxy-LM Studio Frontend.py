@@ -6,8 +6,9 @@ import re
 import json
 import os
 
+import http_client
+
 CONFIG_FILE = "config.json"
-TIMEOUT = 120
 
 # Kolory Dark Theme
 COLORS = {
@@ -124,12 +125,12 @@ def send_request_thread():
         log_text.see(tk.END)
         log_text.update()
 
-        response = requests.post(url, json=body, timeout=TIMEOUT)
+        response = http_client.post(url, json=body)
         response.raise_for_status()
         data = response.json()
 
         content = data['choices'][0]['message']['content']
-        log_text.insert(tk.END, f"✅ Odpowiedź:\n", 'success')
+        log_text.insert(tk.END, f"✅ Odpowiedź ({http_client.timing_text(response.timing)}):\n", 'success')
         response_start = log_text.index(tk.END)
         log_text.insert(tk.END, f"{content}\n\n", 'response')
         colorize_python_code(log_text, response_start)
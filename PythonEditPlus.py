@@ -12,11 +12,15 @@ Author AI & Tomek Masłowski / Poland
 import tkinter as tk
 from tkinter import filedialog
 from tkinter import ttk
-import subprocess
-import threading
 import re
+import sys
 import jedi
 
+from line_gutter import LineNumberGutter
+from run_console import RunConsole
+import warm_kernel
+from syntax_highlighter import IncrementalHighlighter
+
 try:
     import black
 except ImportError:
@@ -29,7 +33,6 @@ class PythonEditor:
     def __init__(self, root):
         self.root = root
         self.filename = None
-        self.process = None
 
         self.create_widgets()
         self.bind_events()
@@ -55,6 +58,9 @@ class PythonEditor:
         run_menu.add_command(
             label="Uruchom", command=self.run_code, accelerator="F5")
         run_menu.add_command(label="Zatrzymaj", command=self.stop_code)
+        self.warm_var = tk.BooleanVar(value=False)
+        run_menu.add_checkbutton(label="Ciepły interpreter", variable=self.warm_var,
+                                 command=self.toggle_warm_kernel)
         menubar.add_cascade(label="Kod", menu=run_menu)
 
         self.root.config(menu=menubar)
@@ -65,19 +71,18 @@ class PythonEditor:
         self.v_scroll = ttk.Scrollbar(frame, orient=tk.VERTICAL)
         self.v_scroll.pack(side=tk.RIGHT, fill=tk.Y)
 
-        self.line_numbers = tk.Text(
-            frame, width=4, padx=4, takefocus=0, border=0,
-            background="#282a36", foreground="#6272a4", state="disabled",
-            font=("Consolas", 12)  # ta sama czcionka i rozmiar co edytor
-        )
-        self.line_numbers.pack(side=tk.LEFT, fill=tk.Y)
-
         self.text = tk.Text(frame, undo=True, wrap="none", font=(
             "Consolas", 12), yscrollcommand=self.on_text_scroll,
             background="#1e1e1e", foreground="#d4d4d4", insertbackground="#d4d4d4")
 
         self.text.pack(fill=tk.BOTH, expand=1, side=tk.LEFT)
 
+        # numery rysowane tylko dla widocznych linii, ta sama czcionka co edytor
+        self.line_numbers = LineNumberGutter(
+            frame, self.text, markers={"search": "#264F78"},
+            fg="#6272a4", font=("Consolas", 12), background="#282a36")
+        self.line_numbers.pack(side=tk.LEFT, fill=tk.Y, before=self.text)
+
         self.v_scroll.config(command=self.on_scrollbar)
 
         self.text.tag_config("keyword", foreground="#569CD6")
@@ -90,17 +95,20 @@ class PythonEditor:
         self.text.tag_config("self", foreground="#9CDCFE", font=(
             "Consolas", 12, "bold"))
         self.text.tag_config("current_line", background="#44475a")
+        self.highlighter = IncrementalHighlighter(
+            self.text, ("keyword", "string", "comment", "function", "bracket", "self"), lazy=True)
 
         self.output = tk.Text(self.root, height=8, bg="#1e1e1e",
                               fg="#d4d4d4", font=("Consolas", 10))
         self.output.pack(fill=tk.X)
+        self.console = RunConsole(self.output, report_time=True)
 
         self.popup = tk.Listbox(
             self.root, height=6, bg="#252526", fg="#d4d4d4", selectbackground="#094771")
         self.popup.bind("<<ListboxSelect>>", self.insert_completion)
 
     def on_text_scroll(self, *args):
-        self.line_numbers.yview_moveto(args[0])
+        self.line_numbers.redraw()
         self.v_scroll.set(*args)
 
     def on_line_numbers_scroll(self, *args):
@@ -109,7 +117,6 @@ class PythonEditor:
 
     def on_scrollbar(self, *args):
         self.text.yview(*args)
-        self.line_numbers.yview(*args)
 
     def bind_events(self):
         self.text.bind("<KeyRelease>", self.on_key_release)
@@ -138,7 +145,6 @@ class PythonEditor:
     def on_mousewheel(self, event):
         delta = int(-1 * (event.delta / 120))
         self.text.yview_scroll(delta, "units")
-        self.line_numbers.yview_scroll(delta, "units")
         return "break"
 
     def auto_save(self):
@@ -189,57 +195,27 @@ class PythonEditor:
         self.save_file()
         if self.filename:
             self.output.delete(1.0, tk.END)
-            self.process = subprocess.Popen(
-                ["python", self.filename],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True
-            )
-            threading.Thread(target=self.read_output, daemon=True).start()
-
-    def read_output(self):
-        for line in self.process.stdout:
-            self.output.insert(tk.END, line)
-            self.output.see(tk.END)
-        self.process = None
+            self.console.start([sys.executable, "-u", self.filename])
 
     def stop_code(self):
-        if self.process:
-            self.process.kill()
-            self.process = None
-            self.output.insert(tk.END, "\n[Zatrzymano]\n")
+        if self.console.running:
+            self.console.stop()
+            self.console.write("\n[Zatrzymano]\n")
+
+    def toggle_warm_kernel(self):
+        """Włącza uruchamianie w ciepłym interpreterze (fork procesu z zaimportowanymi modułami)."""
+        self.console.launcher = warm_kernel.launcher() if self.warm_var.get() else None
+        if self.warm_var.get() and self.console.launcher is None:
+            self.warm_var.set(False)
+            self.console.write("[Ciepły interpreter wymaga systemu z fork (Linux/macOS)]\n")
 
     # ==== SYNTAX ====
     def highlight_syntax(self):
-        code = self.text.get(1.0, tk.END)
-        for tag in ["keyword", "string", "comment", "function", "search", "bracket", "self"]:
-            self.text.tag_remove(tag, "1.0", tk.END)
-
-        patterns = [
-            (r"\b(?:def|class|return|if|else|elif|try|except|import|from|as|while|for|in|with|break|continue|pass|raise|yield|lambda|global|nonlocal|assert|is|not|and|or|True|False|None)\b", "keyword"),
-            (r"([\"'])(?:(?=(\\?))\2.)*?\1", "string"),
-            (r"#.*", "comment"),
-            (r"\b\w+(?=\()", "function"),
-            (r"[\(\)\[\]\{\}]", "bracket"),
-            (r"\bself\b|\bcls\b", "self"),
-        ]
-
-        for pattern, tag in patterns:
-            for match in re.finditer(pattern, code):
-                start = f"1.0+{match.start()}c"
-                end = f"1.0+{match.end()}c"
-                self.text.tag_add(tag, start, end)
+        self.highlighter.update()
 
     # ==== LINIE ====
     def update_line_numbers(self):
-        self.line_numbers.config(state="normal")
-        self.line_numbers.delete(1.0, tk.END)
-
-        last_line = int(self.text.index("end-1c").split(".")[0])
-        for i in range(1, last_line + 1):
-            self.line_numbers.insert(tk.END, f"{i}\n")
-
-        self.line_numbers.config(state="disabled")
+        self.line_numbers.redraw()
 
     def highlight_current_line(self, event=None):
         self.text.tag_remove("current_line", "1.0", tk.END)
@@ -9,12 +9,19 @@ It was created with substantial help from AI and my own programming ideas.
 Version 1.0.0.1.
 Author AI & Tomek Masłowski / Poland
 """
+import os
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-import subprocess
-import threading
 import re
-import jedi
+import sys
+
+from background_analysis import AnalysisScheduler, check_syntax, find_indent_errors
+from completion_service import CompletionService
+from line_gutter import LineNumberGutter
+from lsp_client import LanguageServerClient, find_server
+from run_console import RunConsole
+import warm_kernel
+from syntax_highlighter import IncrementalHighlighter
 
 try:
     import black
@@ -29,18 +36,22 @@ except ImportError:
     raise
 
 AUTO_SAVE_INTERVAL = 30_000  # 30 sekund
+ANALYSIS_DELAY = 300  # ms bez naciśnięć klawiszy przed analizą w tle
+# Polecenie serwera języka (np. "pylsp"); puste = jedi w procesie edytora
+LANGUAGE_SERVER = os.environ.get("PY_EDITOR_LSP", "")
 
 
 class PythonEditor:
     def __init__(self, root):
         self.root = root
         self.filename = None
-        self.process = None
+        self.last_syntax_error = None
 
         self.create_widgets()
         self.bind_events()
         self.auto_save()
         self.update_title()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
         # Rejestrujemy drag & drop na edytorze tekstowym
         self.text.drop_target_register(DND_FILES)
@@ -55,6 +66,7 @@ class PythonEditor:
             self.text.delete(1.0, tk.END)
             self.text.insert(tk.END, content)
             self.filename = filepath
+            self.sync_language_server()
             self.highlight_syntax()
             self.update_line_numbers()
             self.text.edit_reset()
@@ -89,6 +101,9 @@ class PythonEditor:
             label="Uruchom", command=self.run_code, accelerator="F5")
         run_menu.add_command(
             label="Zatrzymaj", command=self.stop_code, accelerator="Ctrl+Q")
+        self.warm_var = tk.BooleanVar(value=False)
+        run_menu.add_checkbutton(label="Ciepły interpreter", variable=self.warm_var,
+                                 command=self.toggle_warm_kernel)
         menubar.add_cascade(label="Kod", menu=run_menu)
 
         help_menu = tk.Menu(menubar, tearoff=0)
@@ -104,14 +119,6 @@ class PythonEditor:
         self.v_scroll = ttk.Scrollbar(frame, orient=tk.VERTICAL)
         self.v_scroll.pack(side=tk.RIGHT, fill=tk.Y)
 
-        # Panel numerów linii
-        self.line_numbers = tk.Text(
-            frame, width=4, padx=4, takefocus=0, border=0,
-            background="#282a36", foreground="#ffffff", state="disabled",
-            font=("Consolas", 12)
-        )
-        self.line_numbers.pack(side=tk.LEFT, fill=tk.Y)
-
         # Główny edytor tekstu
         self.text = tk.Text(frame, undo=True, wrap="none", font=(
             "Consolas", 12), yscrollcommand=self.on_text_scroll,
@@ -119,6 +126,13 @@ class PythonEditor:
 
         self.text.pack(fill=tk.BOTH, expand=1, side=tk.LEFT)
 
+        # Panel numerów linii (tylko widoczne linie) ze znacznikami błędów
+        self.line_numbers = LineNumberGutter(
+            frame, self.text,
+            markers={"syntax_error": "#FF4444", "indent_error": "#FF0000", "search": "#264F78"},
+            fg="#ffffff", font=("Consolas", 12), background="#282a36")
+        self.line_numbers.pack(side=tk.LEFT, fill=tk.Y, before=self.text)
+
         self.v_scroll.config(command=self.on_scrollbar)
 
         # Konfiguracja tagów kolorów
@@ -136,24 +150,43 @@ class PythonEditor:
         self.text.tag_config("indent_error", background="#FF0000")
         # czerwone tło błędu składni
         self.text.tag_config("syntax_error", background="#FF4444")
+        # podkreślenie problemów zgłoszonych przez serwer języka
+        self.text.tag_config("diagnostic", underline=True)
+        self.highlighter = IncrementalHighlighter(
+            self.text, ("keyword", "string", "comment", "function", "bracket", "self"), lazy=True)
+        self.analysis = AnalysisScheduler(
+            self.text, self.analyze_source, ("indent_error", "syntax_error"),
+            self.show_analysis, delay=ANALYSIS_DELAY)
 
         self.output = tk.Text(self.root, height=8, bg="#1e1e1e",
                               fg="#d4d4d4", font=("Consolas", 10))
         self.output.pack(fill=tk.X)
+        self.console = RunConsole(self.output, report_time=True)
+
+        self.status = tk.Label(self.root, text="", anchor="w", bg="#252526", fg="#d4d4d4")
+        self.status.pack(fill=tk.X)
 
         self.popup = tk.Listbox(
             self.root, height=6, bg="#252526", fg="#d4d4d4", selectbackground="#094771")
         self.popup.bind("<Double-Button-1>", self.select_autocomplete)
         self.popup.bind("<Return>", self.select_autocomplete)
 
+        server = find_server(LANGUAGE_SERVER) if LANGUAGE_SERVER else None
+        if server:
+            self.completion = LanguageServerClient(
+                self.root, server, lambda: self.text.get("1.0", "end-1c"), self.show_diagnostics)
+            self.completion.open_document(self.filename, self.text.get("1.0", "end-1c"))
+            self.highlighter.listeners.append(self.completion.did_change)
+        else:
+            self.completion = CompletionService(self.root)
+
     def on_text_scroll(self, *args):
         self.v_scroll.set(*args)
-        self.line_numbers.yview_moveto(args[0])
+        self.line_numbers.redraw()
 
     def on_scrollbar(self, *args):
         self.text.yview(*args)
         self.v_scroll.set(*args)
-        self.line_numbers.yview_moveto(args[0])
 
     def bind_events(self):
         # Skróty globalne
@@ -172,6 +205,7 @@ class PythonEditor:
 
         self.text.bind("<KeyRelease>", self.on_key_release)
         self.text.bind("<Control-space>", self.show_autocomplete)
+        self.text.bind("<F12>", self.goto_definition)
         self.text.bind("<Tab>", self.select_autocomplete)
         self.text.bind("<Escape>", lambda e: self.popup.place_forget())
         self.text.bind("<Return>", self.smart_indent)
@@ -187,13 +221,11 @@ class PythonEditor:
         self.highlight_syntax()
         self.update_line_numbers()
         self.highlight_current_line()
-        self.highlight_indent_errors()
-        self.highlight_syntax_errors()
+        self.analysis.schedule()
 
     def on_mousewheel(self, event):
         delta = int(-1 * (event.delta / 120))
         self.text.yview_scroll(delta, "units")
-        self.line_numbers.yview_scroll(delta, "units")
         return "break"
 
     def auto_save(self):
@@ -212,6 +244,7 @@ class PythonEditor:
     def new_file(self):
         self.text.delete(1.0, tk.END)
         self.filename = None
+        self.sync_language_server()
         self.update_line_numbers()
         self.update_title()
 
@@ -223,6 +256,7 @@ class PythonEditor:
                 self.text.delete(1.0, tk.END)
                 self.text.insert(tk.END, f.read())
                 self.filename = file_path
+                self.sync_language_server()
                 self.highlight_syntax()
                 self.update_line_numbers()
                 self.text.edit_reset()
@@ -244,60 +278,30 @@ class PythonEditor:
         self.save_file()
         if self.filename:
             self.output.delete(1.0, tk.END)
-            self.process = subprocess.Popen(
-                ["python", self.filename],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True
-            )
-            threading.Thread(target=self.read_output, daemon=True).start()
-
-    def read_output(self):
-        for line in self.process.stdout:
-            self.output.insert(tk.END, line)
-            self.output.see(tk.END)
-        self.process = None
+            self.console.start([sys.executable, "-u", self.filename])
 
     def stop_code(self, event=None):
-        if self.process:
-            self.process.kill()
-            self.process = None
-            self.output.insert(tk.END, "\n[Zatrzymano]\n")
+        if self.console.running:
+            self.console.stop()
+            self.console.write("\n[Zatrzymano]\n")
         else:
             self.output.insert(
                 tk.END, "\n[Brak uruchomionego procesu do zatrzymania]\n")
 
+    def toggle_warm_kernel(self):
+        """Włącza uruchamianie w ciepłym interpreterze (fork procesu z zaimportowanymi modułami)."""
+        self.console.launcher = warm_kernel.launcher() if self.warm_var.get() else None
+        if self.warm_var.get() and self.console.launcher is None:
+            self.warm_var.set(False)
+            self.console.write("[Ciepły interpreter wymaga systemu z fork (Linux/macOS)]\n")
+
     # ==== SYNTAX ====
     def highlight_syntax(self):
-        code = self.text.get(1.0, tk.END)
-        for tag in ["keyword", "string", "comment", "function", "search", "bracket", "self"]:
-            self.text.tag_remove(tag, "1.0", tk.END)
-
-        patterns = [
-            (r"\b(?:def|class|return|if|else|elif|try|except|import|from|as|while|for|in|with|break|continue|pass|raise|yield|lambda|global|nonlocal|assert|is|not|and|or|True|False|None)\b", "keyword"),
-            (r"([\"'])(?:(?=(\\?))\2.)*?\1", "string"),
-            (r"#.*", "comment"),
-            (r"\b\w+(?=\()", "function"),
-            (r"[\(\)\[\]\{\}]", "bracket"),
-            (r"\bself\b|\bcls\b", "self"),
-        ]
-
-        for pattern, tag in patterns:
-            for match in re.finditer(pattern, code):
-                start = f"1.0+{match.start()}c"
-                end = f"1.0+{match.end()}c"
-                self.text.tag_add(tag, start, end)
+        self.highlighter.update()
 
     # ==== LINIE ====
     def update_line_numbers(self):
-        self.line_numbers.config(state="normal")
-        self.line_numbers.delete(1.0, tk.END)
-
-        last_line = int(self.text.index("end-1c").split(".")[0])
-        for i in range(1, last_line + 1):
-            self.line_numbers.insert(tk.END, f"{i}\n")
-
-        self.line_numbers.config(state="disabled")
+        self.line_numbers.redraw()
 
     def highlight_current_line(self, event=None):
         self.text.tag_remove("current_line", "1.0", tk.END)
@@ -313,9 +317,12 @@ class PythonEditor:
     def show_autocomplete(self, event=None):
         cursor = self.text.index(tk.INSERT)
         line, col = map(int, cursor.split("."))
-        source = self.text.get("1.0", tk.END)
-        script = jedi.Script(source, path=self.filename or "")
-        completions = script.complete(line, col)
+        source = self.text.get("1.0", "end-1c")
+        self.completion.request(source, line, col, self.show_completions,
+                                version=self.highlighter.version, path=self.filename)
+
+    def show_completions(self, completions):
+        self.status.config(text=self.completion.latency_text())
         if not completions:
             self.popup.place_forget()
             return
@@ -332,6 +339,37 @@ class PythonEditor:
         self.popup.lift()
         self.popup.focus_set()
 
+    # ==== SERWER JĘZYKA ====
+    def sync_language_server(self):
+        if isinstance(self.completion, LanguageServerClient):
+            self.completion.open_document(self.filename, self.text.get("1.0", "end-1c"))
+
+    def show_diagnostics(self, diagnostics):
+        self.text.tag_remove("diagnostic", "1.0", tk.END)
+        for diagnostic in diagnostics:
+            start, end = diagnostic["range"]["start"], diagnostic["range"]["end"]
+            self.text.tag_add("diagnostic", f"{start['line'] + 1}.{start['character']}",
+                              f"{end['line'] + 1}.{end['character']}")
+        if diagnostics:
+            self.status.config(text=f"Diagnostyka ({len(diagnostics)}): {diagnostics[0]['message']}")
+
+    def goto_definition(self, event=None):
+        if not isinstance(self.completion, LanguageServerClient):
+            self.status.config(text="Przejście do definicji wymaga serwera języka (PY_EDITOR_LSP)")
+            return "break"
+        line, col = map(int, self.text.index(tk.INSERT).split("."))
+        self.completion.request_definition(line, col, self.show_definition)
+        return "break"
+
+    def show_definition(self, path, line, col):
+        current = os.path.abspath(self.filename) if self.filename else ""
+        if os.path.normcase(os.path.abspath(path)) != os.path.normcase(current):
+            self.status.config(text=f"Definicja: {path}:{line}")
+            return
+        self.text.mark_set(tk.INSERT, f"{line}.{col}")
+        self.text.see(tk.INSERT)
+        self.highlight_current_line()
+
     def select_autocomplete(self, event=None):
         if self.popup.winfo_ismapped():
             selection = self.popup.curselection()
@@ -388,15 +426,13 @@ class PythonEditor:
 
     # ==== KONTROLA I PODŚWIETLANIE BŁĘDÓW WCIĘĆ ====
     def check_indentation(self):
-        lines = self.text.get(1.0, tk.END).splitlines()
+        source = self.text.get(1.0, tk.END)
+        lines = source.splitlines()
         errors = []
-        for i, line in enumerate(lines, start=1):
-            if line.strip() == "":
-                continue
-            indent = len(line) - len(line.lstrip(" "))
-            if indent % 4 != 0:
-                errors.append(
-                    f"Linia {i}: Niepoprawne wcięcie ({indent} spacji)")
+        for i in find_indent_errors(source):
+            indent = len(lines[i - 1]) - len(lines[i - 1].lstrip(" "))
+            errors.append(
+                f"Linia {i}: Niepoprawne wcięcie ({indent} spacji)")
         self.output.insert(tk.END, "\nKontrola wcięć:\n")
         if errors:
             for err in errors:
@@ -407,27 +443,30 @@ class PythonEditor:
 
     def highlight_indent_errors(self):
         self.text.tag_remove("indent_error", "1.0", tk.END)
-        lines = self.text.get(1.0, tk.END).splitlines()
-        for i, line in enumerate(lines, start=1):
-            if line.strip() == "":
-                continue
-            indent = len(line) - len(line.lstrip(" "))
-            if indent % 4 != 0:
-                self.text.tag_add("indent_error", f"{i}.0", f"{i}.end")
-
-    # ==== PODŚWIETLANIE BŁĘDÓW SKŁADNI ====
-    def highlight_syntax_errors(self):
-        self.text.tag_remove("syntax_error", "1.0", tk.END)
-        code = self.text.get(1.0, tk.END)
-        try:
-            compile(code, self.filename or "<string>", "exec")
-        except SyntaxError as e:
-            lineno = e.lineno
-            msg = e.msg
-            self.output.insert(tk.END, f"Błąd składni: {msg}\n")
-            if lineno:
-                self.text.tag_add(
-                    "syntax_error", f"{lineno}.0", f"{lineno}.end")
+        for i in find_indent_errors(self.text.get(1.0, tk.END)):
+            self.text.tag_add("indent_error", f"{i}.0", f"{i}.end")
+
+    # ==== ANALIZA W TLE (BŁĘDY SKŁADNI I WCIĘĆ) ====
+    def analyze_source(self, source):
+        """Wykonywane w wątku roboczym - nie może odwoływać się do widgetów."""
+        error = check_syntax(source, self.filename or "<string>")
+        return {
+            "indent_error": find_indent_errors(source),
+            "syntax_error": [error[0]] if error and error[0] else [],
+            "error": error,
+        }
+
+    def show_analysis(self, result):
+        error = result["error"]
+        if error and error != self.last_syntax_error:
+            self.output.insert(tk.END, f"Błąd składni: {error[1]}\n")
+        self.last_syntax_error = error
+        self.line_numbers.redraw(force=True)
+
+    def on_close(self):
+        if isinstance(self.completion, LanguageServerClient):
+            self.completion.close()
+        self.root.destroy()
 
     def show_about(self):
         messagebox.showinfo(
@@ -1,11 +1,16 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox, filedialog
-import requests
 import json
-import threading
 from datetime import datetime
 import os
 
+from async_lm_client import AsyncLMClient, HTTPError
+from chat_log import ChatLog, MAX_MESSAGES
+from history_store import HistoryStore
+
+# Liczba ostatnich wiadomości dnia wczytywanych przy starcie
+HISTORY_TAIL = 200
+
 class LMStudioChatClient:
     def __init__(self, root):
         self.root = root
@@ -16,6 +21,14 @@ class LMStudioChatClient:
         self.api_base = "http://localhost:1234/v1"
         self.current_model = None
         self.chat_history = []
+        # Historia dnia dopisywana wiadomość po wiadomości (JSONL)
+        self.history_store = HistoryStore()
+        # Liczba wiadomości trzymanych w oknie chatu (starsze wczytywane z dysku przy przewijaniu)
+        self.log_max_messages = MAX_MESSAGES
+        # Klient asyncio - jedna pula połączeń dla wszystkich rozmów i modeli
+        self.client = AsyncLMClient(self.root)
+        self.generation_count = 0
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
         # Tworzenie interfejsu
         self.create_widgets()
@@ -71,6 +84,10 @@ class LMStudioChatClient:
         self.chat_display.tag_config("user", foreground="blue", font=("Consolas", 10, "bold"))
         self.chat_display.tag_config("assistant", foreground="green")
         self.chat_display.tag_config("system", foreground="gray", font=("Consolas", 9, "italic"))
+        self.chat_log = ChatLog(
+            self.chat_display,
+            os.path.join("chat_history", f"transcript_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"),
+            max_messages=self.log_max_messages)
         
         # Frame dolny - input
         input_frame = ttk.Frame(chat_frame)
@@ -94,6 +111,9 @@ class LMStudioChatClient:
         send_btn = ttk.Button(button_frame, text="Wyślij", command=self.send_message)
         send_btn.pack(fill=tk.X, pady=2)
         
+        stop_btn = ttk.Button(button_frame, text="Zatrzymaj", command=self.client.cancel_all)
+        stop_btn.pack(fill=tk.X, pady=2)
+        
         clear_btn = ttk.Button(button_frame, text="Wyczyść", command=self.clear_chat)
         clear_btn.pack(fill=tk.X, pady=2)
         
@@ -112,36 +132,35 @@ class LMStudioChatClient:
         server = self.server_var.get()
         self.api_base = f"http://{server}/v1"
         
-        try:
-            response = requests.get(f"{self.api_base}/models", timeout=5)
-            if response.status_code == 200:
-                self.status_var.set("Połączono")
-                self.status_var.set("Połączono ✓")
-                # Zmiana koloru na zielony (może wymagać dodatkowego Label)
-                self.load_models()
-                self.add_system_message(f"Połączono z serwerem: {server}")
-            else:
-                raise requests.RequestException(f"Status: {response.status_code}")
-        except requests.RequestException as e:
+        def on_connected(models_data):
+            self.status_var.set("Połączono ✓")
+            self.show_models(models_data)
+            self.add_system_message(f"Połączono z serwerem: {server}")
+        
+        def on_error(e):
             self.status_var.set("Błąd połączenia")
             messagebox.showerror("Błąd", f"Nie można połączyć z serwerem:\n{e}")
+        
+        self.client.get_json(f"{self.api_base}/models", on_connected, on_error, timeout=5)
     
     def load_models(self):
         """Ładowanie dostępnych modeli"""
-        try:
-            response = requests.get(f"{self.api_base}/models", timeout=5)
-            if response.status_code == 200:
-                models_data = response.json()
-                models = [model["id"] for model in models_data.get("data", [])]
-                self.model_combo["values"] = models
-                if models:
-                    self.model_combo.set(models[0])
-                    self.current_model = models[0]
-                    self.add_system_message(f"Załadowano {len(models)} modeli")
-            else:
+        def on_error(e):
+            if isinstance(e, HTTPError):
                 self.add_system_message("Błąd podczas ładowania modeli")
-        except requests.RequestException:
-            self.add_system_message("Brak połączenia z serwerem")
+            else:
+                self.add_system_message("Brak połączenia z serwerem")
+        
+        self.client.get_json(f"{self.api_base}/models", self.show_models, on_error, timeout=5)
+    
+    def show_models(self, models_data):
+        """Wypełnia listę modeli odpowiedzią serwera"""
+        models = [model["id"] for model in models_data.get("data", [])]
+        self.model_combo["values"] = models
+        if models:
+            self.model_combo.set(models[0])
+            self.current_model = models[0]
+            self.add_system_message(f"Załadowano {len(models)} modeli")
     
     def send_message(self):
         """Wysyłanie wiadomości do AI"""
@@ -159,137 +178,110 @@ class LMStudioChatClient:
         
         # Dodaj do historii
         self.chat_history.append({"role": "user", "content": message, "timestamp": datetime.now()})
+        self.save_message(self.chat_history[-1])
         
-        # Wyślij do AI w osobnym wątku
-        threading.Thread(target=self.get_ai_response, args=(message,), daemon=True).start()
+        # Odpowiedź jest strumieniowana; kolejne wiadomości (także do innych modeli) można wysyłać od razu
+        self.get_ai_response(self.model_var.get())
     
-    def get_ai_response(self, user_message):
-        """Otrzymywanie odpowiedzi od AI"""
-        try:
-            # Przygotuj historię dla API
-            messages = [{"role": msg["role"], "content": msg["content"]} 
-                       for msg in self.chat_history[-10:]]  # Ostatnie 10 wiadomości
-            
-            payload = {
-                "model": self.model_var.get(),
-                "messages": messages,
-                "temperature": 0.7,
-                "max_tokens": 1000,
-                "stream": False
-            }
-            
-            response = requests.post(
-                f"{self.api_base}/chat/completions",
-                json=payload,
-                timeout=60
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                ai_response = data["choices"][0]["message"]["content"]
-                
-                # Wyświetl odpowiedź AI
-                self.root.after(0, self.add_ai_message, ai_response)
-                
-                # Dodaj do historii
+    def get_ai_response(self, model):
+        """Rozpoczyna strumieniowanie odpowiedzi AI do własnego miejsca w oknie chatu"""
+        # Przygotuj historię dla API
+        messages = [{"role": msg["role"], "content": msg["content"]} 
+                   for msg in self.chat_history[-10:]]  # Ostatnie 10 wiadomości
+        
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": 0.7,
+            "max_tokens": 1000
+        }
+        
+        # Nagłówek odpowiedzi i znacznik, przed którym dopisywane są kolejne fragmenty
+        self.generation_count += 1
+        mark = f"generation{self.generation_count}"
+        message = self.chat_log.begin()
+        self.chat_display.config(state=tk.NORMAL)
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        self.chat_display.insert(tk.END, f"[{timestamp}] {model}: ", "assistant")
+        self.chat_display.insert(tk.END, "\n\n")
+        self.chat_display.mark_set(mark, "end-1c -2c")
+        self.chat_display.config(state=tk.DISABLED)
+        self.chat_display.see(tk.END)
+        
+        def insert(text, *tags):
+            self.chat_display.config(state=tk.NORMAL)
+            self.chat_display.insert(mark, text, tags)
+            self.chat_display.config(state=tk.DISABLED)
+            self.chat_display.see(tk.END)
+        
+        def on_done(ai_response, first_token, cancelled):
+            if cancelled:
+                insert(" [przerwano]", "system")
+            self.chat_display.mark_unset(mark)
+            self.chat_log.end(message)
+            if first_token is not None:
+                self.status_var.set(f"Połączono ✓ (pierwszy token po {first_token * 1000:.0f} ms)")
+            if ai_response and not cancelled:
+                # Dodaj do historii i zapisz (urwana odpowiedź nie trafia do kolejnych zapytań)
                 self.chat_history.append({
                     "role": "assistant", 
                     "content": ai_response, 
                     "timestamp": datetime.now()
                 })
-                
-                # Zapisz historię
-                self.root.after(0, self.save_chat_history)
-            else:
-                error_msg = f"Błąd API: {response.status_code}"
-                self.root.after(0, self.add_system_message, error_msg)
-                
-        except requests.RequestException as e:
-            error_msg = f"Błąd połączenia: {str(e)}"
-            self.root.after(0, self.add_system_message, error_msg)
+                self.save_message(self.chat_history[-1])
+        
+        def on_error(e):
+            insert(f"Błąd: {e}", "system")
+            self.chat_display.mark_unset(mark)
+            self.chat_log.end(message)
+        
+        self.client.stream_chat(f"{self.api_base}/chat/completions", payload, insert, on_done, on_error)
     
     def add_user_message(self, message):
         """Dodaj wiadomość użytkownika do wyświetlania"""
-        self.chat_display.config(state=tk.NORMAL)
         timestamp = datetime.now().strftime("%H:%M:%S")
-        self.chat_display.insert(tk.END, f"[{timestamp}] Ty: ", "user")
-        self.chat_display.insert(tk.END, f"{message}\n\n")
-        self.chat_display.config(state=tk.DISABLED)
-        self.chat_display.see(tk.END)
+        self.chat_log.append(f"[{timestamp}] Ty: ", "user", f"{message}\n\n", ())
     
     def add_ai_message(self, message):
         """Dodaj odpowiedź AI do wyświetlania"""
-        self.chat_display.config(state=tk.NORMAL)
         timestamp = datetime.now().strftime("%H:%M:%S")
         model_name = self.model_var.get() or "AI"
-        self.chat_display.insert(tk.END, f"[{timestamp}] {model_name}: ", "assistant")
-        self.chat_display.insert(tk.END, f"{message}\n\n")
-        self.chat_display.config(state=tk.DISABLED)
-        self.chat_display.see(tk.END)
+        self.chat_log.append(f"[{timestamp}] {model_name}: ", "assistant", f"{message}\n\n", ())
     
     def add_system_message(self, message):
         """Dodaj wiadomość systemową"""
-        self.chat_display.config(state=tk.NORMAL)
         timestamp = datetime.now().strftime("%H:%M:%S")
-        self.chat_display.insert(tk.END, f"[{timestamp}] System: {message}\n", "system")
-        self.chat_display.config(state=tk.DISABLED)
-        self.chat_display.see(tk.END)
+        self.chat_log.append(f"[{timestamp}] System: {message}\n", "system")
     
     def clear_chat(self):
         """Wyczyść okno chatu"""
         if messagebox.askyesno("Potwierdzenie", "Czy na pewno chcesz wyczyścić chat?"):
-            self.chat_display.config(state=tk.NORMAL)
-            self.chat_display.delete("1.0", tk.END)
-            self.chat_display.config(state=tk.DISABLED)
+            self.chat_log.clear()
             self.chat_history.clear()
             self.add_system_message("Chat wyczyszczony")
     
-    def save_chat_history(self):
-        """Zapisz historię chatu do pliku JSON"""
+    def save_message(self, message):
+        """Dopisz wiadomość do dzisiejszego pliku historii"""
         try:
-            if not os.path.exists("chat_history"):
-                os.makedirs("chat_history")
-            
-            history_data = []
-            for msg in self.chat_history:
-                history_data.append({
-                    "role": msg["role"],
-                    "content": msg["content"],
-                    "timestamp": msg["timestamp"].isoformat()
-                })
-            
-            filename = f"chat_history/chat_{datetime.now().strftime('%Y%m%d')}.json"
-            with open(filename, "w", encoding="utf-8") as f:
-                json.dump(history_data, f, ensure_ascii=False, indent=2)
-                
+            self.history_store.append(message)
         except Exception as e:
             self.add_system_message(f"Błąd zapisu historii: {e}")
     
     def load_chat_history(self):
-        """Wczytaj historię chatu z dzisiejszego pliku"""
+        """Wczytaj ostatnie wiadomości z dzisiejszego pliku historii"""
         try:
-            filename = f"chat_history/chat_{datetime.now().strftime('%Y%m%d')}.json"
-            if os.path.exists(filename):
-                with open(filename, "r", encoding="utf-8") as f:
-                    history_data = json.load(f)
-                
-                self.chat_history.clear()
-                for msg in history_data:
-                    self.chat_history.append({
-                        "role": msg["role"],
-                        "content": msg["content"],
-                        "timestamp": datetime.fromisoformat(msg["timestamp"])
-                    })
-                
-                # Wyświetl ostatnie wiadomości
-                for msg in self.chat_history[-10:]:  # Ostatnie 10
-                    if msg["role"] == "user":
-                        self.add_user_message(msg["content"])
-                    else:
-                        self.add_ai_message(msg["content"])
-                        
-                if self.chat_history:
-                    self.add_system_message(f"Wczytano historię: {len(self.chat_history)} wiadomości")
+            self.chat_history.clear()
+            self.chat_history.extend(self.history_store.tail(HISTORY_TAIL))
+            
+            # Wyświetl ostatnie wiadomości
+            for msg in self.chat_history[-10:]:  # Ostatnie 10
+                if msg["role"] == "user":
+                    self.add_user_message(msg["content"])
+                else:
+                    self.add_ai_message(msg["content"])
+                    
+            if self.chat_history:
+                self.add_system_message(f"Wczytano historię: {len(self.chat_history)} wiadomości")
                     
         except Exception as e:
             pass  # Ignoruj błędy ładowania - może nie ma historii
@@ -331,6 +323,13 @@ class LMStudioChatClient:
             except Exception as e:
                 messagebox.showerror("Błąd", f"Nie można zapisać pliku:\n{e}")
     
+    def on_close(self):
+        """Przerywa trwające generacje i zamyka okno"""
+        self.client.close()
+        self.chat_log.close()
+        self.history_store.close()
+        self.root.destroy()
+    
     def load_chat_from_file(self):
         """Wczytaj chat z pliku"""
         filename = filedialog.askopenfilename(
@@ -1,10 +1,11 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext
-import requests
 import threading
 
+import http_client
+from response_cache import deterministic, get_cache
+
 MCP_URL = "http://localhost:3000"
-TIMEOUT = 120  # 2 minuty, dłuższe odpowiedzi
 
 def send_request_thread():
     endpoint = endpoint_var.get()
@@ -39,17 +40,30 @@ def send_request_thread():
                 "max_tokens": 1000}
     elif endpoint == "Agent":
         body = {"query": text}
+    cache = get_cache(cache_var.get())
+    if cache:
+        body = deterministic(body)
 
     try:
-        response = requests.post(url, json=body, timeout=TIMEOUT)
-        response.raise_for_status()
-        data = response.json()
+        data = cache.get(url, body) if cache else None
+        cached = data is not None
+        if cached:
+            source = "z pamięci podręcznej"
+        else:
+            response = http_client.post(url, json=body)
+            response.raise_for_status()
+            data = response.json()
+            source = http_client.timing_text(response.timing)
         if endpoint in ["Chat", "Edit", "Agent"]:
             content = data['choices'][0]['message']['content']
         elif endpoint == "Autocomplete":
             content = data['choices'][0]['text']
 
-        log_text.insert(tk.END, f"✅ Odpowiedź:\n{content}\n\n")
+        if cache:
+            if not cached:
+                cache.put(url, body, data)
+            cache_status_var.set(cache.stats_text())
+        log_text.insert(tk.END, f"✅ Odpowiedź ({source}):\n{content}\n\n")
     except Exception as e:
         log_text.insert(tk.END, f"❌ Błąd: {e}\n\n")
     finally:
@@ -81,4 +95,10 @@ ttk.Label(root, text="Odpowiedź:").grid(row=2, column=0, sticky="w", padx=5, pa
 log_text = scrolledtext.ScrolledText(root)
 log_text.grid(row=3, column=0, sticky="nsew", padx=5, pady=5)
 
+# Tryb deterministyczny: żądania modelu wysyłane z temperature 0 i zapamiętywane (agent - bez pamięci)
+cache_var = tk.BooleanVar(value=False)
+cache_status_var = tk.StringVar()
+ttk.Checkbutton(root, text="Temperatura 0 + cache", variable=cache_var).grid(row=4, column=0, sticky="w", padx=5, pady=5)
+ttk.Label(root, textvariable=cache_status_var).grid(row=4, column=0, sticky="e", padx=5, pady=5)
+
 root.mainloop()
@@ -0,0 +1,321 @@
+"""
+Asynchroniczny klient API LM Studio (zgodnego z OpenAI) dla aplikacji Tk.
+
+Jedna pętla asyncio działa w wątku tła i obsługuje wszystkie żądania:
+dowolnie wiele równoległych generacji (np. kilka modeli naraz) bez wątku
+na każde zapytanie. Połączenia HTTP/1.1 są utrzymywane w jednej puli
+(keep-alive), odpowiedzi strumieniowane (SSE) trafiają do wątku Tk przez TkDispatcher
+(pętla wątku tła nie wywołuje Tk) - zebrane w porcje co `FRAME_INTERVAL` s,
+a nie token po tokenie. Każdą generację można przerwać w trakcie.
+
+Klient nie wymaga dodatkowych bibliotek - korzysta tylko ze strumieni asyncio.
+"""
+import asyncio
+import itertools
+import json
+import ssl
+import threading
+import time
+from urllib.parse import urlsplit
+
+from sse_parser import DONE, SSEParser, delta_content
+from tk_dispatch import TkDispatcher
+
+# Limit czasu na nawiązanie połączenia i na kolejną porcję odpowiedzi (s)
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 120
+# Największa liczba jednoczesnych połączeń do jednego serwera
+MAX_CONNECTIONS = 8
+# Odstęp, w jakim fragmenty odpowiedzi są przekazywane do wątku Tk (s)
+FRAME_INTERVAL = 0.016
+
+
+class HTTPError(Exception):
+    """Odpowiedź serwera ze statusem innym niż 2xx albo zerwane połączenie."""
+
+
+class _Connection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.reused = False
+
+    def close(self):
+        self.writer.close()
+
+
+class _Response:
+    """Odpowiedź HTTP, której treść czyta się porcjami (`chunks`)."""
+
+    def __init__(self, status, headers, connection, pool, key, limit, timeout):
+        self.status = status
+        self.headers = headers
+        self._connection = connection
+        self._pool = pool
+        self._key = key
+        self._limit = limit
+        self._timeout = timeout
+        self._complete = False
+
+    async def chunks(self):
+        reader = self._connection.reader
+        timeout = self._timeout
+        if self.headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size = int((await asyncio.wait_for(reader.readline(), timeout)).split(b";")[0], 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                yield await asyncio.wait_for(reader.readexactly(size), timeout)
+                await reader.readexactly(2)
+        elif "content-length" in self.headers:
+            remaining = int(self.headers["content-length"])
+            while remaining:
+                data = await asyncio.wait_for(reader.read(min(remaining, 65536)), timeout)
+                if not data:
+                    raise HTTPError("Połączenie zerwane w trakcie odpowiedzi")
+                remaining -= len(data)
+                yield data
+        else:
+            while True:
+                data = await asyncio.wait_for(reader.read(65536), timeout)
+                if not data:
+                    break
+                yield data
+            self.headers["connection"] = "close"
+        self._complete = True
+
+    def close(self):
+        """Oddaje połączenie do puli (po pełnej odpowiedzi) albo je zamyka."""
+        if self._connection is None:
+            return
+        if self._complete and self.headers.get("connection", "").lower() != "close":
+            self._pool.release(self._key, self._connection)
+        else:
+            self._connection.close()
+        self._connection = None
+        self._limit.release()
+
+
+class _ConnectionPool:
+    """Pula połączeń keep-alive (działa wyłącznie w wątku pętli)."""
+
+    def __init__(self, max_connections):
+        self.max_connections = max_connections
+        self._idle = {}
+        self._limits = {}
+
+    def limit(self, key):
+        if key not in self._limits:
+            self._limits[key] = asyncio.Semaphore(self.max_connections)
+        return self._limits[key]
+
+    async def acquire(self, key):
+        idle = self._idle.get(key)
+        while idle:
+            connection = idle.pop()
+            if not connection.reader.at_eof():
+                connection.reused = True
+                return connection
+            connection.close()
+        host, port, use_ssl = key
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port, ssl=ssl.create_default_context() if use_ssl else None),
+            CONNECT_TIMEOUT)
+        return _Connection(reader, writer)
+
+    def release(self, key, connection):
+        self._idle.setdefault(key, []).append(connection)
+
+    def close(self):
+        for idle in self._idle.values():
+            for connection in idle:
+                connection.close()
+        self._idle.clear()
+
+
+class AsyncLMClient:
+    """
+    Rdzeń asyncio uruchomiony w osobnym wątku, z mostem do Tk.
+
+    Wszystkie metody publiczne (i konstruktor) wywołuje się z wątku Tk;
+    wywołania zwrotne też są wykonywane w wątku Tk (przez TkDispatcher).
+    """
+
+    def __init__(self, widget, max_connections=MAX_CONNECTIONS):
+        self.widget = widget
+        self._tk = TkDispatcher(widget, interval=int(FRAME_INTERVAL * 1000))
+        self.loop = asyncio.new_event_loop()
+        self._pool = _ConnectionPool(max_connections)
+        self._tasks = {}
+        self._ids = itertools.count(1)
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+
+    # ==== Most Tk <-> asyncio ====
+    def _to_tk(self, callback, *args):
+        if callback:
+            self._tk.call(callback, *args)
+
+    def _start(self, coro):
+        """Uruchamia korutynę w pętli tła; zwraca identyfikator zadania."""
+        task_id = next(self._ids)
+
+        def create():
+            task = self.loop.create_task(coro)
+            self._tasks[task_id] = task
+            task.add_done_callback(lambda _: self._tasks.pop(task_id, None))
+
+        self.loop.call_soon_threadsafe(create)
+        return task_id
+
+    def cancel(self, task_id):
+        """Przerywa generację (albo inne żądanie) o podanym identyfikatorze."""
+        self.loop.call_soon_threadsafe(lambda: self._tasks[task_id].cancel() if task_id in self._tasks else None)
+
+    def cancel_all(self):
+        self.loop.call_soon_threadsafe(lambda: [task.cancel() for task in list(self._tasks.values())])
+
+    def close(self):
+        """Przerywa wszystkie żądania, zamyka połączenia i zatrzymuje pętlę."""
+        async def shutdown():
+            for task in list(self._tasks.values()):
+                task.cancel()
+            self._pool.close()
+            self.loop.stop()
+        asyncio.run_coroutine_threadsafe(shutdown(), self.loop)
+
+    # ==== HTTP ====
+    async def _request(self, method, url, payload=None, timeout=READ_TIMEOUT):
+        """
+        Wysyła żądanie i czyta nagłówki odpowiedzi; zwraca _Response.
+
+        Wywołujący musi zamknąć odpowiedź (`close`) - połączenie wraca do
+        puli tylko wtedy, gdy cała treść została przeczytana.
+        """
+        parts = urlsplit(url)
+        use_ssl = parts.scheme == "https"
+        key = (parts.hostname, parts.port or (443 if use_ssl else 80), use_ssl)
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {parts.netloc}\r\n"
+                f"Accept: application/json, text/event-stream\r\nConnection: keep-alive\r\n")
+        if payload is not None:
+            head += f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+        request = (head + "\r\n").encode("latin-1") + body
+
+        limit = self._pool.limit(key)
+        await limit.acquire()
+        try:
+            while True:
+                connection = await self._pool.acquire(key)
+                try:
+                    connection.writer.write(request)
+                    await connection.writer.drain()
+                    raw_head = await asyncio.wait_for(connection.reader.readuntil(b"\r\n\r\n"), timeout)
+                    break
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    connection.close()
+                    # Serwer zamknął bezczynne połączenie z puli - ponów na kolejnym
+                    if not connection.reused:
+                        raise
+                except BaseException:
+                    connection.close()
+                    raise
+        except BaseException:
+            limit.release()
+            raise
+
+        lines = raw_head.decode("latin-1").split("\r\n")
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            if name:
+                headers[name.strip().lower()] = value.strip()
+        return _Response(int(lines[0].split()[1]), headers, connection, self._pool, key, limit, timeout)
+
+    async def _read_json(self, method, url, payload=None, timeout=READ_TIMEOUT):
+        response = await self._request(method, url, payload, timeout)
+        try:
+            data = b"".join([chunk async for chunk in response.chunks()])
+        finally:
+            response.close()
+        if not 200 <= response.status < 300:
+            raise HTTPError(f"Status: {response.status}")
+        return json.loads(data)
+
+    # ==== API ====
+    def get_json(self, url, on_result, on_error=None, timeout=READ_TIMEOUT):
+        """Pobiera dokument JSON; wynik albo wyjątek trafia do wątku Tk."""
+        async def run():
+            try:
+                result = await self._read_json("GET", url, timeout=timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._to_tk(on_error, e)
+                return
+            self._to_tk(on_result, result)
+        return self._start(run())
+
+    def stream_chat(self, url, payload, on_delta, on_done, on_error=None):
+        """
+        Rozpoczyna strumieniowaną generację (`stream: true`); zwraca jej identyfikator.
+
+        `on_delta(tekst)` dostaje kolejne fragmenty odpowiedzi (zebrane w
+        porcje), `on_done(pełny_tekst, czas_do_pierwszego_tokenu, przerwano)`
+        wywoływane jest na końcu, także po `cancel`.
+        """
+        payload = dict(payload, stream=True)
+
+        async def run():
+            started = time.perf_counter()
+            first_token = None
+            parts = []
+            pending = []
+            flush = None
+
+            def flush_pending():
+                nonlocal flush
+                flush = None
+                if pending:
+                    self._to_tk(on_delta, "".join(pending))
+                    pending.clear()
+
+            response = None
+            try:
+                response = await self._request("POST", url, payload)
+                if not 200 <= response.status < 300:
+                    raise HTTPError(f"Status: {response.status}")
+                parser = SSEParser()
+                async for chunk in response.chunks():
+                    for data in parser.feed(chunk):
+                        if data == DONE:
+                            break
+                        delta = delta_content(data)
+                        if delta:
+                            if first_token is None:
+                                first_token = time.perf_counter() - started
+                            parts.append(delta)
+                            pending.append(delta)
+                    if pending and flush is None:
+                        flush = self.loop.call_later(FRAME_INTERVAL, flush_pending)
+            except asyncio.CancelledError:
+                if flush:
+                    flush.cancel()
+                flush_pending()
+                self._to_tk(on_done, "".join(parts), first_token, True)
+                raise
+            except Exception as e:
+                if flush:
+                    flush.cancel()
+                flush_pending()
+                self._to_tk(on_error, e)
+                return
+            finally:
+                if response:
+                    response.close()
+            if flush:
+                flush.cancel()
+            flush_pending()
+            self._to_tk(on_done, "".join(parts), first_token, False)
+        return self._start(run())
@@ -0,0 +1,154 @@
+"""
+Analiza kodu w tle dla edytorów opartych na tk.Text.
+
+AnalysisScheduler łączy szybkie naciśnięcia klawiszy w jedno zadanie
+(opóźnienie `delay` ms), pobiera zawartość bufora raz na wersję i wykonuje
+analizy - czyste funkcje Pythona bez dostępu do Tk - w wątku roboczym.
+Wyniki nieaktualnej wersji są odrzucane, a w wątku Tk nakładane są tylko
+różnice znaczników. Pisanie nigdy nie czeka na analizę.
+
+Wątek roboczy nie wywołuje Tk: wyniki trafiają do kolejki, którą odczytuje
+pętla `after` uruchamiana z wątku Tk na czas oczekiwania na analizę.
+"""
+import queue
+import threading
+
+DEFAULT_DELAY = 300
+# Odstęp odczytu kolejki wyników (ms)
+POLL_INTERVAL = 30
+
+
+def check_syntax(source, filename="<string>"):
+    """Zwraca (numer_linii, komunikat) pierwszego błędu składni albo None."""
+    try:
+        compile(source, filename, "exec")
+    except SyntaxError as e:
+        return e.lineno, e.msg
+    except ValueError as e:
+        return None, str(e)
+    return None
+
+
+def find_indent_errors(source, width=4):
+    """Zwraca numery linii, których wcięcie nie jest wielokrotnością `width` spacji."""
+    errors = []
+    for i, line in enumerate(source.splitlines(), start=1):
+        if line.strip() == "":
+            continue
+        indent = len(line) - len(line.lstrip(" "))
+        if indent % width != 0:
+            errors.append(i)
+    return errors
+
+
+class AnalysisScheduler:
+    """
+    Planuje analizy bufora w wątku roboczym.
+
+    `analyze(source)` wykonuje się poza wątkiem Tk i zwraca słownik; klucze
+    z `tags` to nazwy znaczników, a wartości - zbiory numerów linii do
+    oznaczenia. Pozostałe klucze trafiają bez zmian do `on_result`,
+    wywoływanego w wątku Tk po nałożeniu znaczników.
+    """
+
+    def __init__(self, text_widget, analyze, tags, on_result=None, delay=DEFAULT_DELAY):
+        self.text = text_widget
+        self.analyze = analyze
+        self.tags = tuple(tags)
+        self.on_result = on_result
+        self.delay = delay
+        self.version = 0
+        self._after_id = None
+        self._poll_id = None
+        self._pending = None
+        self._sent = None
+        self._results = queue.Queue()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        threading.Thread(target=self._worker, daemon=True).start()
+
+    def schedule(self, event=None):
+        # pylint: disable=unused-argument
+        """Oznacza bufor jako zmieniony i odkłada analizę o `delay` ms."""
+        self.version += 1
+        if self._after_id is not None:
+            self.text.after_cancel(self._after_id)
+        self._after_id = self.text.after(self.delay, self._snapshot)
+
+    def cancel(self):
+        """Porzuca zaplanowaną i trwającą analizę."""
+        self.version += 1
+        if self._after_id is not None:
+            self.text.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _snapshot(self):
+        """Pobiera zawartość bufora (raz na wersję) i przekazuje ją do wątku roboczego."""
+        self._after_id = None
+        source = self.text.get("1.0", "end-1c")
+        with self._lock:
+            # Wygrywa najnowsze zadanie - starsze, jeszcze nieodebrane, przepada
+            self._pending = (self.version, source)
+        self._sent = self.version
+        self._wakeup.set()
+        if self._poll_id is None:
+            self._poll_id = self.text.after(POLL_INTERVAL, self._poll)
+
+    def _worker(self):
+        while True:
+            self._wakeup.wait()
+            with self._lock:
+                self._wakeup.clear()
+                if self._pending is None:
+                    continue
+                version, source = self._pending
+                self._pending = None
+            result = None
+            if version == self.version:
+                try:
+                    result = self.analyze(source)
+                except Exception:
+                    # Błąd analizy nie zatrzymuje wątku - wynik przepada jak nieaktualny
+                    result = None
+            # Odpowiedź także bez wyniku: pętla odczytu wie, że zadanie się zakończyło
+            self._results.put((version, result))
+
+    def _poll(self):
+        """Odbiera wyniki (wątek Tk); kończy, gdy wróci ostatnie wysłane zadanie."""
+        self._poll_id = None
+        finished = False
+        while True:
+            try:
+                version, result = self._results.get_nowait()
+            except queue.Empty:
+                break
+            finished = finished or version == self._sent
+            if result is not None:
+                self._apply(version, result)
+        if not finished:
+            self._poll_id = self.text.after(POLL_INTERVAL, self._poll)
+
+    def _apply(self, version, result):
+        """Nakłada różnice znaczników, jeśli wynik dotyczy bieżącej wersji bufora."""
+        if version != self.version:
+            return
+        for tag in self.tags:
+            self._apply_tag(tag, set(result.get(tag, ())))
+        if self.on_result:
+            self.on_result(result)
+
+    def _apply_tag(self, tag, lines):
+        ranges = self.text.tag_ranges(tag)
+        current = set()
+        for start, end in zip(ranges[::2], ranges[1::2]):
+            first = int(str(start).split(".")[0])
+            last_line, last_col = map(int, str(end).split("."))
+            current.update(range(first, last_line + (1 if last_col else 0)))
+        for line in sorted(current - lines):
+            self.text.tag_remove(tag, f"{line}.0", f"{line + 1}.0")
+        # Ponowne dodanie istniejących linii wyrównuje zakres do wydłużonej linii
+        added = []
+        for line in sorted(lines):
+            added.extend((f"{line}.0", f"{line}.end"))
+        if added:
+            self.text.tag_add(tag, *added)
@@ -0,0 +1,220 @@
+"""
+Log czatu w tk.Text z limitem liczby wyświetlanych wiadomości.
+
+Widget trzyma tylko ostatnie `max_messages` wiadomości - starsze są
+usuwane od góry, więc wstawianie nie zwalnia po wielu godzinach pracy.
+Pełny zapis rozmowy (tekst z tagami) trafia na dysk do pliku JSONL, po
+jednej wiadomości w linii; w pamięci zostaje tylko przesunięcie każdej
+linii w pliku. Gdy użytkownik przewinie log na sam początek, starsze
+wiadomości są wczytywane z pliku porcjami po `LOAD_BATCH`.
+
+Wiadomość to tekst między jej początkiem (`begin`) a początkiem
+następnej. Zakończoną (`end`) wiadomość z następczynią zapisuje się na
+dysk; usuwane z widgetu są wyłącznie wiadomości zapisane.
+"""
+import json
+import os
+import tkinter as tk
+
+# Domyślna liczba wiadomości utrzymywanych w widgecie
+MAX_MESSAGES = 200
+# Liczba wiadomości wczytywanych naraz przy przewinięciu na początek
+LOAD_BATCH = 20
+
+
+def _advance(line, col, text):
+    newlines = text.count("\n")
+    if not newlines:
+        return line, col + len(text)
+    return line + newlines, len(text) - text.rfind("\n") - 1
+
+
+class ChatLog:
+    """
+    Wiadomości logu i ich zapis na dysku; wszystkie metody wywołuje się w wątku Tk.
+
+    `append(tekst, tagi, ...)` dodaje gotową wiadomość, a para
+    `begin()`/`end(id)` obejmuje wiadomość wstawianą fragmentami (np.
+    strumieniowaną odpowiedź). Kilka wiadomości może być otwartych naraz.
+    """
+
+    def __init__(self, text_widget, path, max_messages=MAX_MESSAGES, batch=LOAD_BATCH):
+        self.text = text_widget
+        self.path = str(path)
+        self.max_messages = max_messages
+        self.batch = batch
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, "ab")
+        self._reader = None
+        # Przesunięcia zapisanych wiadomości w pliku (id -> bajt)
+        self._offsets = {}
+        # Wiadomości w widgecie: id w kolejności, otwarte (bez `end`)
+        self._shown = []
+        self._open = set()
+        self._next_id = 0
+        # Najstarsza wiadomość, którą wolno wczytać (po `clear` - pierwsza nowa)
+        self._floor = 0
+        self._loading = False
+        self._scroll_command = self.text.tk.splitlist(self.text.cget("yscrollcommand"))
+        self.text.configure(yscrollcommand=self._on_scroll)
+
+    def _mark(self, message):
+        return f"chatlog{message}"
+
+    # ==== Wiadomości ====
+    def begin(self):
+        """Zaczyna nową wiadomość na końcu logu; zwraca jej id."""
+        message = self._next_id
+        self._next_id += 1
+        self.text.mark_set(self._mark(message), "end-1c")
+        self.text.mark_gravity(self._mark(message), tk.LEFT)
+        self._shown.append(message)
+        self._open.add(message)
+        # Poprzednia wiadomość ma już stały zakres - można ją zapisać
+        if len(self._shown) > 1 and self._shown[-2] not in self._open:
+            self._persist(self._shown[-2])
+        return message
+
+    def end(self, message=None):
+        """Kończy wiadomość (domyślnie ostatnio rozpoczętą) i przycina log."""
+        if message is None:
+            message = self._next_id - 1
+        if message not in self._open:
+            return
+        self._open.discard(message)
+        position = self._shown.index(message)
+        if position + 1 < len(self._shown):
+            self._persist(message)
+        self._trim()
+
+    def append(self, *chunks):
+        """Dodaje gotową wiadomość: `append(tekst, tagi, tekst, tagi, ...)`."""
+        message = self.begin()
+        self._insert(tk.END, chunks)
+        self.text.see(tk.END)
+        self.end(message)
+
+    def clear(self):
+        """Czyści widget; zapis na dysku zostaje, ale nie jest już wczytywany do widoku."""
+        self._insert_state(lambda: self.text.delete("1.0", tk.END))
+        for message in self._shown:
+            if message not in self._open:
+                self.text.mark_unset(self._mark(message))
+        self._open.clear()
+        self._shown.clear()
+        self._floor = self._next_id
+
+    def close(self):
+        """Zapisuje zakończone wiadomości, które jeszcze nie trafiły na dysk, i zamyka plik."""
+        for message in self._shown:
+            if message not in self._open and message not in self._offsets:
+                self._persist(message)
+        self._file.close()
+        if self._reader:
+            self._reader.close()
+
+    # ==== Zapis i przycinanie ====
+    def _runs(self, start, end):
+        """Tekst z tagami między indeksami jako lista [tekst, [tagi]] (sąsiednie o tych samych tagach złączone)."""
+        runs = []
+        tags = dict.fromkeys(tag for tag in self.text.tag_names(start) if tag != "sel")
+        for key, value, _ in self.text.dump(start, end, text=True, tag=True):
+            if key == "tagon":
+                if value != "sel":
+                    tags[value] = None
+            elif key == "tagoff":
+                tags.pop(value, None)
+            elif key == "text":
+                current = list(tags)
+                if runs and runs[-1][1] == current:
+                    runs[-1][0] += value
+                else:
+                    runs.append([value, current])
+        return runs
+
+    def _persist(self, message):
+        if message in self._offsets:
+            return
+        position = self._shown.index(message)
+        end = self._mark(self._shown[position + 1]) if position + 1 < len(self._shown) else "end-1c"
+        runs = self._runs(self._mark(message), end)
+        self._offsets[message] = self._file.tell()
+        self._file.write(json.dumps(runs, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n")
+        self._file.flush()
+
+    def _trim(self):
+        """Usuwa najstarsze zapisane wiadomości ponad limit - tylko gdy widok jest przewinięty na dół."""
+        excess = len(self._shown) - self.max_messages
+        if excess <= 0 or self.text.yview()[1] < 1.0:
+            return
+        count = 0
+        for message in self._shown[:excess]:
+            if message not in self._offsets:
+                break
+            count += 1
+        if not count:
+            return
+        end = self._mark(self._shown[count])
+        self._insert_state(lambda: self.text.delete("1.0", end))
+        for message in self._shown[:count]:
+            self.text.mark_unset(self._mark(message))
+        del self._shown[:count]
+
+    # ==== Wczytywanie starszych wiadomości ====
+    def _on_scroll(self, first, last):
+        if self._scroll_command:
+            self.text.tk.call(*self._scroll_command, first, last)
+        # Tylko gdy jest co przewijać - inaczej każde przycięcie od razu wczytywałoby wiadomości z powrotem
+        if float(first) <= 0.0 and float(last) < 1.0 and not self._loading and self._first_hidden() is not None:
+            self._loading = True
+            self.text.after_idle(self._load_older)
+
+    def _first_hidden(self):
+        """Id najnowszej wiadomości, która nie jest w widgecie i może być wczytana, albo None."""
+        first = self._shown[0] if self._shown else self._next_id
+        message = first - 1
+        return message if message >= self._floor and message in self._offsets else None
+
+    def _load_older(self):
+        self._loading = False
+        newest = self._first_hidden()
+        if newest is None:
+            return
+        messages = [message for message in range(max(self._floor, newest - self.batch + 1), newest + 1)
+                    if message in self._offsets]
+        if self._reader is None:
+            self._reader = open(self.path, "rb")
+        chunks = []
+        starts = []
+        line, col = 1, 0
+        for message in messages:
+            self._reader.seek(self._offsets[message])
+            starts.append((message, f"{line}.{col}"))
+            for text, tags in json.loads(self._reader.readline()):
+                chunks += (text, tuple(tags))
+                line, col = _advance(line, col, text)
+        if self._shown:
+            # Początek dotychczas pierwszej wiadomości ma się przesunąć za wstawiony tekst
+            self.text.mark_gravity(self._mark(self._shown[0]), tk.RIGHT)
+        self._insert("1.0", chunks)
+        if self._shown:
+            self.text.mark_gravity(self._mark(self._shown[0]), tk.LEFT)
+        for message, start in starts:
+            self.text.mark_set(self._mark(message), start)
+            self.text.mark_gravity(self._mark(message), tk.LEFT)
+        self._shown[:0] = messages
+        # Widok zostaje na tekście, który był u góry przed wczytaniem
+        self.text.yview(f"{line}.{col}")
+
+    def _insert(self, index, chunks):
+        if chunks:
+            self._insert_state(lambda: self.text.insert(index, *chunks))
+
+    def _insert_state(self, action):
+        """Wykonuje zmianę tekstu także w widgecie zablokowanym (state=disabled)."""
+        disabled = str(self.text.cget("state")) == tk.DISABLED
+        if disabled:
+            self.text.configure(state=tk.NORMAL)
+        action()
+        if disabled:
+            self.text.configure(state=tk.DISABLED)
@@ -0,0 +1,144 @@
+"""
+Kolorowanie bloków kodu (```) w logach czatu opartych na tk.Text.
+
+Każdy blok jest tokenizowany raz, w jednym przebiegu: bloki Pythona
+lekserem z syntax_highlighter, pozostałe języki jednym wspólnym wyrażeniem
+regularnym. Pozycje linia.kolumna liczone są w Pythonie (bez zapytań
+`index` do Tcl na każdy token), a znaczniki nakładane jednym wywołaniem
+`tag add` na rodzaj znacznika.
+
+CodeBlockColorizer pracuje przyrostowo: podczas strumieniowania koloruje
+blok w chwili, gdy nadejdzie jego zamykający ```, i nie wraca już do
+tekstu przed nim.
+"""
+import re
+from collections import defaultdict
+
+from syntax_highlighter import lex_source
+
+# Znaczniki nakładane na kod (muszą być skonfigurowane w widgecie)
+CODE_TAGS = ("keyword", "string", "comment", "number")
+
+_FENCE_RE = re.compile(r"```([\w+#.-]*)[^\S\n]*\n?(.*?)```", re.DOTALL)
+_PYTHON_LANGUAGES = frozenset(("", "python", "py", "python3"))
+_GENERIC_KEYWORDS = frozenset((
+    "def", "class", "if", "elif", "else", "for", "while", "try", "except", "finally",
+    "import", "from", "as", "return", "yield", "break", "continue", "pass", "lambda",
+    "and", "or", "not", "in", "is", "None", "True", "False", "with", "async", "await",
+    "function", "var", "let", "const", "public", "private", "static", "void", "int", "string",
+    "new", "this", "null", "true", "false", "catch", "throw", "switch", "case", "struct", "fn",
+))
+_GENERIC_RE = re.compile(
+    r"(?P<comment>#[^\n]*|//[^\n]*|/\*.*?\*/)"
+    r"|(?P<string>\"(?:\\.|[^\"\\\n])*\"|'(?:\\.|[^'\\\n])*'|`[^`]*`)"
+    r"|(?P<number>\b\d+(?:\.\d+)?\b)"
+    r"|(?P<word>[A-Za-z_]\w*)",
+    re.DOTALL)
+
+
+def _split_index(index):
+    line, col = str(index).split(".")
+    return int(line), int(col)
+
+
+def _advance(line, col, text):
+    """Pozycja (linia, kolumna) po tekście `text` zaczynającym się w (linia, kolumna)."""
+    newlines = text.count("\n")
+    if not newlines:
+        return line, col + len(text)
+    return line + newlines, len(text) - text.rfind("\n") - 1
+
+
+def tokenize_block(code, language=""):
+    """Zwraca fragmenty (linia_od_0, kolumna, linia_końca, kolumna_końca, znacznik) kodu bloku."""
+    if language.lower() in _PYTHON_LANGUAGES:
+        return [(line - 1, col, line - 1, col + length, kind)
+                for line, col, length, kind in lex_source(code) if kind in CODE_TAGS]
+    spans = []
+    line = 0
+    line_start = 0
+    for match in _GENERIC_RE.finditer(code):
+        kind = match.lastgroup
+        if kind == "word":
+            if match.group() not in _GENERIC_KEYWORDS:
+                continue
+            kind = "keyword"
+        start = match.start()
+        # Linie liczone przyrostowo - dopasowania są uporządkowane
+        newlines = code.count("\n", line_start, start)
+        if newlines:
+            line += newlines
+            line_start = code.rfind("\n", 0, start) + 1
+        end_line, end_col = _advance(line, start - line_start, match.group())
+        spans.append((line, start - line_start, end_line, end_col, kind))
+        if end_line != line:
+            line = end_line
+            line_start = match.end() - end_col
+    return spans
+
+
+def colorize_code_blocks(text_widget, start_index, end_index="end-1c"):
+    """
+    Koloruje zamknięte bloki kodu między `start_index` a `end_index`.
+
+    Zwraca indeks za ostatnim zamkniętym blokiem albo None, gdy żadnego nie było.
+    """
+    base_line, base_col = _split_index(text_widget.index(start_index))
+    content = text_widget.get(start_index, end_index)
+    ranges = defaultdict(list)
+    line, col = base_line, base_col
+    offset = 0
+    for match in _FENCE_RE.finditer(content):
+        code = match.group(2)
+        # Pozycje liczone przyrostowo od poprzedniego bloku
+        line, col = _advance(line, col, content[offset:match.start(2)])
+        end_line, end_col = _advance(line, col, code)
+        offset = match.end(2)
+        if code.strip():
+            start, end = f"{line}.{col}", f"{end_line}.{end_col}"
+            ranges["code_block"] += (start, end)
+            for first, first_col, last, last_col, tag in tokenize_block(code, match.group(1)):
+                if first == 0:
+                    first_col += col
+                if last == 0:
+                    last_col += col
+                ranges[tag] += (f"{line + first}.{first_col}", f"{line + last}.{last_col}")
+        line, col = end_line, end_col
+    if not offset:
+        return None
+    for tag, tag_ranges in ranges.items():
+        text_widget.tag_add(tag, *tag_ranges)
+    # Za zamykającym ```
+    return f"{line}.{col + 3}"
+
+
+class CodeBlockColorizer:
+    """
+    Przyrostowe kolorowanie bloków kodu w strumieniowanej odpowiedzi.
+
+    `start(index)` ustawia początek odpowiedzi, a każde `update()` (np. po
+    każdej klatce wyświetlania) koloruje bloki zamknięte od poprzedniego
+    wywołania. Znacznik tekstu `mark` pamięta miejsce za ostatnim blokiem.
+    """
+
+    def __init__(self, text_widget, mark="code_scan"):
+        self.text = text_widget
+        self.mark = mark
+        self.active = False
+
+    def start(self, index):
+        self.text.mark_set(self.mark, index)
+        self.text.mark_gravity(self.mark, "left")
+        self.active = True
+
+    def update(self):
+        if not self.active:
+            return
+        end = colorize_code_blocks(self.text, self.mark)
+        if end:
+            self.text.mark_set(self.mark, end)
+
+    def stop(self):
+        """Koloruje ostatnie zamknięte bloki i kończy śledzenie odpowiedzi."""
+        self.update()
+        self.active = False
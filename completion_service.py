@@ -0,0 +1,99 @@
+"""
+Długo działająca usługa podpowiedzi jedi dla edytorów opartych na Tk.
+
+Jeden wątek roboczy obsługuje wszystkie zlecenia. Oczekuje co najwyżej
+jedno zlecenie - nowsze zastępuje starsze (wygrywa najnowsze), a wynik,
+który zdezaktualizował się w trakcie liczenia, nie jest pokazywany.
+Obiekt jedi.Project jest tworzony raz na katalog, a jedi.Script raz na
+wersję bufora, więc kolejne zapytania bez edycji nie parsują kodu ponownie.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+from tk_dispatch import TkDispatcher
+
+try:
+    import jedi
+except ImportError:
+    jedi = None
+
+# Liczba ostatnich pomiarów, z których liczone są percentyle opóźnień
+LATENCY_WINDOW = 200
+
+
+class CompletionService:
+    """
+    Podpowiedzi jedi w jednym wątku z kolejką „wygrywa najnowsze”.
+
+    Wyniki trafiają do `callback(completions)` w wątku Tk (przez
+    TkDispatcher - obiekt trzeba utworzyć w wątku Tk). `version` to numer wersji bufora - ta sama para
+    (ścieżka, wersja) pozwala użyć już sparsowanego skryptu.
+    """
+
+    def __init__(self, widget):
+        self.widget = widget
+        self._tk = TkDispatcher(widget)
+        self._projects = {}
+        self._script_key = None
+        self._script = None
+        self._pending = None
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        threading.Thread(target=self._worker, daemon=True).start()
+
+    def request(self, code, line, col, callback, version=None, path=None):
+        """Zleca podpowiedzi dla pozycji (linia, kolumna); zastępuje oczekujące zlecenie."""
+        with self._lock:
+            self._pending = (time.perf_counter(), code, line, col, callback, version, path)
+        self._wakeup.set()
+
+    def latency(self):
+        """Zwraca (p50, p99) czasu od zlecenia do wyniku w ms albo None przed pierwszym pomiarem."""
+        samples = sorted(self._latencies)
+        if not samples:
+            return None
+        p50 = samples[len(samples) // 2]
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        return p50 * 1000, p99 * 1000
+
+    def latency_text(self):
+        """Opis opóźnień do paska stanu."""
+        latency = self.latency()
+        if latency is None:
+            return "Podpowiedzi: brak pomiarów"
+        return f"Podpowiedzi: p50 {latency[0]:.0f} ms, p99 {latency[1]:.0f} ms"
+
+    def _project_for(self, path):
+        directory = os.path.dirname(os.path.abspath(path)) if path else os.getcwd()
+        if directory not in self._projects:
+            self._projects[directory] = jedi.Project(directory)
+        return self._projects[directory]
+
+    def _script_for(self, code, version, path):
+        key = (path, version)
+        if version is None or key != self._script_key:
+            self._script = jedi.Script(code, path=path or None, project=self._project_for(path))
+            self._script_key = key
+        return self._script
+
+    def _worker(self):
+        while True:
+            self._wakeup.wait()
+            with self._lock:
+                self._wakeup.clear()
+                if self._pending is None:
+                    continue
+                started, code, line, col, callback, version, path = self._pending
+                self._pending = None
+            try:
+                completions = self._script_for(code, version, path).complete(line, col)
+            except Exception:
+                completions = []
+            self._latencies.append(time.perf_counter() - started)
+            with self._lock:
+                stale = self._pending is not None
+            if not stale:
+                self._tk.call(callback, completions)
@@ -0,0 +1,70 @@
+"""
+Jeden pływający przycisk kopiowania nad blokami kodu w tk.Text.
+
+Zamiast osobnego przycisku dla każdego bloku (setki widgetów przy długiej
+historii) nad blokiem wskazywanym myszą pojawia się jeden wspólny
+przycisk. Zakresy bloków nie są przechowywane osobno - indeksem jest sam
+znacznik `code_block` w widgecie (tag_prevrange/tag_nextrange), więc
+pozostaje poprawny po przycięciu logu i wczytaniu starszych wiadomości.
+"""
+import tkinter as tk
+
+# Odstęp przycisku od prawej krawędzi widgetu (piksele)
+MARGIN = 20
+
+
+class CopyOverlay:
+    """
+    Przycisk kopiowania pokazywany nad zakresem znacznika `tag` pod kursorem.
+
+    `on_copy(kod)` dostaje tekst bloku bez otaczających białych znaków;
+    pozostałe argumenty trafiają do tk.Button.
+    """
+
+    def __init__(self, text_widget, on_copy, tag="code_block", hover_bg=None, **button_options):
+        self.text = text_widget
+        self.on_copy = on_copy
+        self.tag = tag
+        self.block = None
+        self.button = tk.Button(text_widget, text="📋 Copy", command=self._copy, cursor="hand2", **button_options)
+        if hover_bg:
+            normal_bg = self.button.cget("bg")
+            self.button.bind("<Enter>", lambda event: self.button.config(bg=hover_bg))
+            self.button.bind("<Leave>", lambda event: self.button.config(bg=normal_bg))
+        text_widget.bind("<Motion>", self._on_motion, add="+")
+        text_widget.bind("<Leave>", self._on_leave, add="+")
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>", "<Configure>"):
+            text_widget.bind(sequence, lambda event: self.hide(), add="+")
+
+    def block_at(self, index):
+        """Zakres (początek, koniec) bloku zawierającego `index` albo None."""
+        if self.tag not in self.text.tag_names(index):
+            return None
+        return self.text.tag_prevrange(self.tag, f"{index}+1c")
+
+    def _on_motion(self, event):
+        block = self.block_at(self.text.index(f"@{event.x},{event.y}"))
+        if not block:
+            self.hide()
+            return
+        if block == self.block and self.button.winfo_ismapped():
+            return
+        self.block = block
+        # Przy górnej krawędzi bloku, a gdy jego początek jest przewinięty poza widok - u góry widgetu
+        line = self.text.dlineinfo(block[0])
+        y = line[1] + 2 if line else 2
+        self.button.place(x=self.text.winfo_width() - MARGIN, y=y, anchor="ne")
+        self.button.lift()
+
+    def _on_leave(self, event):
+        # Wejście kursora na sam przycisk też jest opuszczeniem widgetu tekstu
+        if self.text.winfo_containing(event.x_root, event.y_root) is not self.button:
+            self.hide()
+
+    def hide(self):
+        self.block = None
+        self.button.place_forget()
+
+    def _copy(self):
+        if self.block:
+            self.on_copy(self.text.get(*self.block).strip())
@@ -0,0 +1,384 @@
+"""
+Wyszukiwanie i zamiana na migawce bufora tk.Text.
+
+Zawartość widgetu pobierana jest raz (`get`), dopasowania liczy moduł
+`re` w Pythonie, a zmiany nakładane są na końcu: od ostatniej do
+pierwszej, żeby wcześniejsze pozycje pozostały aktualne, jako jeden krok
+cofania. Każda zmiana to osobne `replace` tylko zastępowanego fragmentu,
+więc znaczniki i pozycje poza nim (zakładki, mapa ciepła, podświetlenia)
+zostają na miejscu.
+
+IncrementalSearch utrzymuje posortowany indeks wszystkich dopasowań,
+aktualizowany przy edycji bez przeszukiwania całego bufora - dla
+wyszukiwania w trakcie pisania i nawigacji "k z N".
+
+    python find_replace.py [liczba]   - porównanie z zamianą w pętli search/delete/insert
+"""
+import bisect
+import queue
+import re
+import sys
+import threading
+import time
+import tkinter as tk
+
+# Bufory do tej liczby znaków przeszukiwane są od razu, większe - w wątku roboczym
+SYNC_LIMIT = 200_000
+# Zmiana obejmująca więcej linii uruchamia pełne przeszukanie zamiast częściowego
+RESCAN_LINES = 2_000
+# Opóźnienie pełnego przeszukania po edycji (ms)
+RESCAN_DELAY = 300
+
+
+def compile_pattern(query, regex=False, match_case=True, whole_word=False):
+    """Wzorzec dla zapytania; zgłasza re.error dla błędnego wyrażenia regularnego."""
+    source = query if regex else re.escape(query)
+    if whole_word:
+        # Zamiast \b - działa też dla zapytań zaczynających się od znaku spoza słowa
+        source = rf"(?<!\w)(?:{source})(?!\w)"
+    flags = re.MULTILINE | (0 if match_case else re.IGNORECASE)
+    return re.compile(source, flags)
+
+
+def find_all(source, pattern):
+    """Pozycje (początek, koniec) wszystkich niepustych dopasowań w `source`."""
+    return [match.span() for match in pattern.finditer(source) if match.end() > match.start()]
+
+
+def plan_replace(source, pattern, replacement, regex=False):
+    """Lista zmian (początek, koniec, nowy_tekst); dla wyrażeń regularnych `replacement` może używać \\1, \\g<nazwa>."""
+    edits = []
+    for match in pattern.finditer(source):
+        if match.end() == match.start():
+            continue
+        edits.append((match.start(), match.end(), match.expand(replacement) if regex else replacement))
+    return edits
+
+
+class TextPositions:
+    """Zamiana przesunięć znaków migawki na indeksy Tk ("linia.kolumna") i odwrotnie."""
+
+    def __init__(self, source):
+        self.starts = [0]
+        position = source.find("\n")
+        while position != -1:
+            self.starts.append(position + 1)
+            position = source.find("\n", position + 1)
+
+    def position(self, offset):
+        line = bisect.bisect_right(self.starts, offset)
+        return line, offset - self.starts[line - 1]
+
+    def index(self, offset):
+        return "%d.%d" % self.position(offset)
+
+    def offset(self, index):
+        line, col = map(int, str(index).split("."))
+        return self.starts[min(line, len(self.starts)) - 1] + col
+
+
+def apply_edits(text_widget, source, edits):
+    """
+    Nakłada zmiany zaplanowane na migawce `source` jako jeden krok cofania.
+
+    Kursor zostaje przy tym samym fragmencie tekstu (przesunięty o zmiany
+    przed nim). Zwraca liczbę zmian.
+    """
+    if not edits:
+        return 0
+    positions = TextPositions(source)
+    cursor = positions.offset(text_widget.index(tk.INSERT))
+    new_cursor = cursor + sum(len(new) - (end - start) for start, end, new in edits if end <= cursor)
+    autoseparators = text_widget.cget("autoseparators")
+    text_widget.configure(autoseparators=False)
+    text_widget.edit_separator()
+    try:
+        for start, end, new in reversed(edits):
+            text_widget.replace(positions.index(start), positions.index(end), new)
+    finally:
+        text_widget.edit_separator()
+        text_widget.configure(autoseparators=autoseparators)
+    text_widget.mark_set(tk.INSERT, f"1.0+{new_cursor}c")
+    return len(edits)
+
+
+def replace_all(text_widget, pattern, replacement, regex=False):
+    """Zamienia wszystkie dopasowania `pattern` w widgecie; zwraca ich liczbę."""
+    source = text_widget.get("1.0", "end-1c")
+    return apply_edits(text_widget, source, plan_replace(source, pattern, replacement, regex))
+
+
+def _scan(source, pattern):
+    """Dopasowania w `source` jako krotki (linia, kolumna, linia_końca, kolumna_końca)."""
+    positions = TextPositions(source)
+    return [positions.position(start) + positions.position(end) for start, end in find_all(source, pattern)]
+
+
+class IncrementalSearch:
+    """
+    Indeks wszystkich dopasowań wzorca w widgecie, aktualizowany przy edycji.
+
+    Pełne przeszukanie wykonuje się na migawce bufora (większej niż
+    SYNC_LIMIT - w wątku roboczym). Dopasowania (linia, kolumna,
+    linia_końca, kolumna_końca) leżą na liście posortowanej, więc następne
+    i poprzednie dopasowanie oraz jego numer wyznacza wyszukiwanie
+    binarne. Edycję (`on_change`, słuchacz IncrementalHighlighter)
+    obsługuje ponowne przeszukanie tylko zmienionych linii. Przesunięcie
+    numerów linii dalszych dopasowań jest odkładane: część listy za
+    miejscem ostatniej edycji ma wspólną różnicę `_delta`, więc kolejne
+    zmiany w jednym miejscu nie przepisują całej listy. Wzorce, które mogą
+    dopasować znak nowej linii, po edycji przeszukują ponownie cały bufor.
+
+    Znacznikiem `tag` oznaczane są tylko dopasowania w widocznym oknie.
+    `on_update()` wywoływane jest w wątku Tk po każdej zmianie indeksu.
+    """
+
+    def __init__(self, text_widget, tag="find_match", on_update=None):
+        self.text = text_widget
+        self.tag = tag
+        self.on_update = on_update
+        self.pattern = None
+        # Czy indeks odpowiada zawartości bufora (False w trakcie pełnego przeszukania)
+        self.ready = True
+        self._matches = []
+        # Dopasowania od `_split` mają numery linii mniejsze o `_delta` od rzeczywistych
+        self._split = 0
+        self._delta = 0
+        self._dirty = None
+        self._multiline = False
+        self._version = 0
+        self._results = queue.Queue()
+        self._rescan_job = None
+        self._full_job = None
+        self._refresh_job = None
+
+    def __len__(self):
+        return len(self._matches)
+
+    def set_pattern(self, pattern):
+        """Przeszukuje bufor od nowa dla wzorca `pattern` (None kończy wyszukiwanie)."""
+        self.pattern = pattern
+        self._version += 1
+        self._matches = []
+        self._split = self._delta = 0
+        self._dirty = None
+        if self._full_job is not None:
+            self.text.after_cancel(self._full_job)
+            self._full_job = None
+        if pattern is None:
+            self.ready = True
+            self.text.tag_remove(self.tag, "1.0", tk.END)
+            return
+        # Wzorzec dopasowujący sam znak nowej linii może obejmować kilka linii
+        self._multiline = pattern.search("\n") is not None
+        source = self.text.get("1.0", "end-1c")
+        if len(source) <= SYNC_LIMIT:
+            self._install(_scan(source, pattern))
+            return
+        self.ready = False
+        version = self._version
+        threading.Thread(target=lambda: self._results.put((version, _scan(source, pattern))), daemon=True).start()
+        self.text.after(50, self._poll)
+        if self.on_update:
+            self.on_update()
+
+    def _poll(self):
+        try:
+            version, matches = self._results.get_nowait()
+        except queue.Empty:
+            self.text.after(50, self._poll)
+            return
+        # Wynik wzorca zmienionego w międzyczasie albo sprzed edycji jest odrzucany
+        if version == self._version:
+            self._install(matches)
+
+    def _install(self, matches):
+        self._matches = matches
+        self._split = len(matches)
+        self._delta = 0
+        self._multiline = self._multiline or any(match[0] != match[2] for match in matches)
+        self.ready = True
+        self._updated()
+
+    def _updated(self):
+        self.refresh()
+        if self.on_update:
+            self.on_update()
+
+    # ==== Indeks ====
+    def _real(self, k):
+        match = self._matches[k]
+        if k >= self._split and self._delta:
+            return match[0] + self._delta, match[1], match[2] + self._delta, match[3]
+        return match
+
+    def _move_split(self, k):
+        """Przenosi granicę odłożonego przesunięcia na pozycję `k` (przepisuje tylko dopasowania pomiędzy)."""
+        delta = self._delta
+        if delta and k > self._split:
+            self._matches[self._split:k] = [(a + delta, b, c + delta, d) for a, b, c, d in self._matches[self._split:k]]
+        elif delta and k < self._split:
+            self._matches[k:self._split] = [(a - delta, b, c - delta, d) for a, b, c, d in self._matches[k:self._split]]
+        self._split = k
+        if k == len(self._matches):
+            self._delta = 0
+
+    def _bisect(self, position):
+        """Numer pierwszego dopasowania zaczynającego się w `position` (linia, kolumna) lub dalej."""
+        lo, hi = 0, len(self._matches)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._real(mid)[:2] < position:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def find(self, index, backwards=False):
+        """
+        Dopasowanie zaczynające się w `index` lub za nim (`backwards` - przed nim),
+        z zawinięciem na końcu bufora: (numer od 0, początek, koniec) albo None.
+        """
+        self._rescan()
+        if not self._matches:
+            return None
+        line, col = map(int, str(self.text.index(index)).split("."))
+        k = self._bisect((line, col))
+        k = (k - 1 if backwards else k) % len(self._matches)
+        start_line, start_col, end_line, end_col = self._real(k)
+        return k, f"{start_line}.{start_col}", f"{end_line}.{end_col}"
+
+    # ==== Aktualizacja przy edycji ====
+    def on_change(self, start, end, text):
+        """Słuchacz IncrementalHighlighter: zakres (linia, kolumna) sprzed zmiany zastępowany tekstem."""
+        if self.pattern is None:
+            return
+        self._version += 1
+        if not self.ready or self._multiline or end[0] - start[0] > RESCAN_LINES:
+            self._schedule_full()
+            return
+        # Widget odpowiada jeszcze stanowi sprzed tej zmiany - zaległe linie można przeszukać teraz
+        self._rescan()
+        first, last = start[0], end[0]
+        added = text.count("\n")
+        k0 = self._bisect((first, 0))
+        k1 = self._bisect((last + 1, 0))
+        self._move_split(k1)
+        del self._matches[k0:k1]
+        self._split = k0
+        self._delta += added - (last - first)
+        if self._split == len(self._matches):
+            self._delta = 0
+        self._dirty = (first, first + added)
+        if self._rescan_job is None:
+            self._rescan_job = self.text.after_idle(self._rescan)
+
+    def _rescan(self):
+        """Przeszukuje linie zmienione od ostatniego przeszukania i wstawia ich dopasowania do indeksu."""
+        self._rescan_job = None
+        if self._dirty is None:
+            return
+        first, last = self._dirty
+        self._dirty = None
+        last = min(last, int(self.text.index("end-1c").split(".")[0]))
+        if last - first > RESCAN_LINES:
+            self._schedule_full()
+            return
+        found = [(a + first - 1, b, c + first - 1, d)
+                 for a, b, c, d in _scan(self.text.get(f"{first}.0", f"{last}.end"), self.pattern)]
+        if any(match[0] != match[2] for match in found):
+            self._multiline = True
+            self._schedule_full()
+            return
+        k = self._bisect((first, 0))
+        self._move_split(k)
+        self._matches[k:k] = found
+        self._split = k + len(found)
+        if self._split == len(self._matches):
+            self._delta = 0
+        self._updated()
+
+    def _schedule_full(self):
+        self.ready = False
+        self._dirty = None
+        if self._full_job is not None:
+            self.text.after_cancel(self._full_job)
+        self._full_job = self.text.after(RESCAN_DELAY, self._full_rescan)
+        if self.on_update:
+            self.on_update()
+
+    def _full_rescan(self):
+        self._full_job = None
+        if self.pattern is not None:
+            self.set_pattern(self.pattern)
+
+    # ==== Podświetlanie ====
+    def refresh(self):
+        """Odkłada oznaczenie dopasowań w widocznym oknie (np. po przewinięciu)."""
+        if self._refresh_job is None:
+            self._refresh_job = self.text.after_idle(self._highlight_visible)
+
+    def _highlight_visible(self):
+        self._refresh_job = None
+        self.text.tag_remove(self.tag, "1.0", tk.END)
+        if not self.ready or not self._matches:
+            return
+        first = int(self.text.index("@0,0").split(".")[0])
+        last = int(self.text.index(f"@0,{self.text.winfo_height()}").split(".")[0])
+        ranges = []
+        for k in range(self._bisect((first, 0)), self._bisect((last + 1, 0))):
+            start_line, start_col, end_line, end_col = self._real(k)
+            ranges += (f"{start_line}.{start_col}", f"{end_line}.{end_col}")
+        if ranges:
+            self.text.tag_add(self.tag, *ranges)
+
+
+def _legacy_replace_all(text_widget, search_text, replace_with):
+    """Dotychczasowa zamiana: search/delete/insert dla każdego wystąpienia."""
+    count = 0
+    start_index = "1.0"
+    while True:
+        pos = text_widget.search(search_text, start_index, stopindex=tk.END)
+        if not pos:
+            break
+        text_widget.delete(pos, f"{pos}+{len(search_text)}c")
+        text_widget.insert(pos, replace_with)
+        start_index = f"{pos}+{len(replace_with)}c"
+        count += 1
+    return count
+
+
+def _benchmark(count=50_000, legacy_limit=5_000):
+    """Zamiana `count` wystąpień w widgecie z podświetlaniem składni (jak w edytorze)."""
+    from syntax_highlighter import IncrementalHighlighter
+    root = tk.Tk()
+    root.withdraw()
+    sample = "value = compute(value, 'value')  # value\n"
+    for method, occurrences in (("pętla search/delete/insert", min(count, legacy_limit)), ("migawka + re", count)):
+        text = tk.Text(root, undo=True)
+        highlighter = IncrementalHighlighter(text, lazy=True)
+        highlighter.listeners.append(lambda start, end, new: None)
+        text.insert("1.0", sample * (occurrences // 4))
+        text.edit_reset()
+        started = time.perf_counter()
+        if method.startswith("pętla"):
+            replaced = _legacy_replace_all(text, "value", "result")
+        else:
+            replaced = replace_all(text, compile_pattern("value"), "result")
+        elapsed = time.perf_counter() - started
+        undo_steps = 0
+        while True:
+            # Z pominięciem IncrementalHighlighter - jego obsługa poleceń połyka TclError pustego stosu
+            try:
+                text.tk.call(highlighter._orig, "edit", "undo")
+            except tk.TclError:
+                break
+            undo_steps += 1
+        print(f"{method}: {replaced} wystąpień w {elapsed:.2f} s "
+              f"({elapsed / replaced * 1e6:.0f} µs/wystąpienie), kroków cofania: {undo_steps}")
+        text.destroy()
+    root.destroy()
+
+
+if __name__ == "__main__":
+    _benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
@@ -0,0 +1,221 @@
+"""
+Historia czatu w plikach JSONL dopisywanych wiadomość po wiadomości.
+
+Każdy dzień ma własny plik `chat_YYYYMMDD.jsonl` z jednym rekordem
+(`role`, `content`, `timestamp`) w linii. Zapis wiadomości to dopisanie
+jednej linii - koszt nie rośnie z długością historii. Dane trafiają do
+systemu po każdej wiadomości, a na dysk (fsync) co `FSYNC_BATCH`
+wiadomości albo `FSYNC_INTERVAL` sekund i przy zamknięciu.
+
+Wczytywanie czyta plik od końca tylko do potrzebnej liczby rekordów.
+Urwana ostatnia linia (np. po awarii) jest pomijana; `compact` usuwa
+takie linie offline.
+
+    python history_store.py compact [katalog]   - porządkuje pliki historii
+    python history_store.py bench [liczba]      - porównanie z zapisem całego JSON
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+DEFAULT_DIR = "chat_history"
+# Co ile wiadomości / sekund wymuszać zapis na dysk
+FSYNC_BATCH = 32
+FSYNC_INTERVAL = 2.0
+# Rozmiar bloku czytanego od końca pliku przy wczytywaniu ostatnich rekordów
+TAIL_BLOCK = 64 * 1024
+
+
+def _record(message):
+    return {"role": message["role"], "content": message["content"],
+            "timestamp": message["timestamp"].isoformat()}
+
+
+def _message(record):
+    return {"role": record["role"], "content": record["content"],
+            "timestamp": datetime.fromisoformat(record["timestamp"])}
+
+
+def _parse(line):
+    """Wiadomość z linii pliku albo None dla linii urwanej lub uszkodzonej."""
+    try:
+        return _message(json.loads(line))
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+class HistoryStore:
+    """Dopisywanie i wczytywanie wiadomości z plików dziennych."""
+
+    def __init__(self, directory=DEFAULT_DIR, fsync_batch=FSYNC_BATCH, fsync_interval=FSYNC_INTERVAL):
+        self.directory = directory
+        self.fsync_batch = fsync_batch
+        self.fsync_interval = fsync_interval
+        self._file = None
+        self._file_path = None
+        self._pending = 0
+        self._synced = time.monotonic()
+
+    def path(self, day=None):
+        day = day or datetime.now()
+        return os.path.join(self.directory, f"chat_{day.strftime('%Y%m%d')}.jsonl")
+
+    def _open(self, path):
+        if self._file_path != path:
+            self.close()
+            os.makedirs(self.directory, exist_ok=True)
+            self._migrate(path)
+            self._file = open(path, "ab+")
+            self._file_path = path
+            # Urwana ostatnia linia nie może skleić się z następnym rekordem
+            if self._file.seek(0, os.SEEK_END):
+                self._file.seek(-1, os.SEEK_END)
+                if self._file.read(1) != b"\n":
+                    self._file.write(b"\n")
+        return self._file
+
+    def _migrate(self, path):
+        """Przenosi dawny plik dnia (cała lista w JSON) do formatu JSONL."""
+        legacy = path[:-1]
+        if os.path.exists(path) or not os.path.exists(legacy):
+            return
+        with open(legacy, "r", encoding="utf-8") as f:
+            records = json.load(f)
+        with open(path, "wb") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+        os.replace(legacy, legacy + ".bak")
+
+    def append(self, message):
+        """Dopisuje wiadomość (słownik z `role`, `content`, `timestamp`) do pliku bieżącego dnia."""
+        f = self._open(self.path())
+        f.write(json.dumps(_record(message), ensure_ascii=False).encode("utf-8") + b"\n")
+        f.flush()
+        self._pending += 1
+        if self._pending >= self.fsync_batch or time.monotonic() - self._synced >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        if self._file and self._pending:
+            os.fsync(self._file.fileno())
+        self._pending = 0
+        self._synced = time.monotonic()
+
+    def close(self):
+        if self._file:
+            self.sync()
+            self._file.close()
+            self._file = None
+            self._file_path = None
+
+    def tail(self, count, day=None):
+        """Ostatnie `count` wiadomości dnia (od najstarszej)."""
+        path = self.path(day)
+        if self._file_path != path:
+            self._migrate(path)
+        if count <= 0 or not os.path.exists(path):
+            return []
+        messages = []
+        with open(path, "rb") as f:
+            position = f.seek(0, os.SEEK_END)
+            rest = b""
+            # Uszkodzone linie są pomijane - czytamy dalej, aż zbierze się `count` wiadomości
+            while position and len(messages) < count:
+                step = min(TAIL_BLOCK, position)
+                position -= step
+                f.seek(position)
+                lines = (f.read(step) + rest).split(b"\n")
+                # Pierwsza linia bloku może być niepełna - dokończy ją poprzedni blok
+                rest = lines.pop(0) if position else b""
+                for line in reversed(lines):
+                    message = _parse(line) if line else None
+                    if message:
+                        messages.append(message)
+                        if len(messages) == count:
+                            break
+        messages.reverse()
+        return messages
+
+    def count(self, day=None):
+        """Górne oszacowanie liczby wiadomości dnia (liczy linie bez parsowania, także uszkodzone)."""
+        path = self.path(day)
+        if self._file_path != path:
+            self._migrate(path)
+        if not os.path.exists(path):
+            return 0
+        total = 0
+        with open(path, "rb") as f:
+            while True:
+                block = f.read(1024 * 1024)
+                if not block:
+                    return total
+                total += block.count(b"\n")
+
+
+def compact(directory=DEFAULT_DIR):
+    """Przepisuje pliki historii bez urwanych i uszkodzonych linii; zwraca liczbę usuniętych linii."""
+    removed = 0
+    for name in sorted(os.listdir(directory)):
+        if not (name.startswith("chat_") and name.endswith(".jsonl")):
+            continue
+        path = os.path.join(directory, name)
+        with open(path, "rb") as f:
+            lines = [line for line in f.read().split(b"\n") if line.strip()]
+        valid = []
+        for line in lines:
+            try:
+                _message(json.loads(line))
+            except (ValueError, KeyError, TypeError):
+                continue
+            valid.append(line)
+        removed += len(lines) - len(valid)
+        temp = path + ".tmp"
+        with open(temp, "wb") as f:
+            f.write(b"".join(line + b"\n" for line in valid))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, path)
+    return removed
+
+
+def _benchmark(count=10_000, legacy_limit=1_000):
+    """Dzień z `count` wiadomościami: dopisywanie JSONL kontra zapis całej listy po każdej wiadomości."""
+    content = "Przykładowa odpowiedź modelu z fragmentem kodu `print(42)`. " * 8
+    messages = [{"role": "user" if i % 2 == 0 else "assistant", "content": content, "timestamp": datetime.now()}
+                for i in range(count)]
+    with tempfile.TemporaryDirectory() as directory:
+        store = HistoryStore(directory)
+        started = time.perf_counter()
+        for message in messages:
+            store.append(message)
+        store.close()
+        elapsed = time.perf_counter() - started
+        print(f"JSONL ({count} wiadomości): {elapsed:.2f} s, {elapsed / count * 1e6:.0f} µs/wiadomość")
+
+        started = time.perf_counter()
+        tail = store.tail(10)
+        print(f"ostatnie 10 z {store.count()}: {(time.perf_counter() - started) * 1000:.2f} ms")
+        assert len(tail) == 10
+
+        # Dotychczasowy zapis rośnie kwadratowo - mierzony na krótszym dniu i szacowany dla pełnego
+        limit = min(count, legacy_limit)
+        path = os.path.join(directory, "legacy.json")
+        started = time.perf_counter()
+        for i in range(1, limit + 1):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump([_record(message) for message in messages[:i]], f, ensure_ascii=False, indent=2)
+        elapsed = time.perf_counter() - started
+        estimate = elapsed * (count / limit) ** 2
+        print(f"cały JSON po każdej wiadomości ({limit}): {elapsed:.2f} s, "
+              f"dla {count} ok. {estimate:.0f} s")
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "bench"
+    if command == "compact":
+        print(f"Usunięto linii: {compact(sys.argv[2] if len(sys.argv) > 2 else DEFAULT_DIR)}")
+    else:
+        _benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 10_000)
@@ -0,0 +1,149 @@
+"""
+Wspólna warstwa HTTP dla frontendów LM Studio.
+
+Wszystkie żądania idą przez jedną sesję `requests.Session` z pulą
+połączeń, więc kolejne zapytania do tego samego serwera używają już
+otwartego połączenia (keep-alive) zamiast nawiązywać nowe. Błędy
+połączenia są ponawiane z losowo rozrzuconym, rosnącym opóźnieniem, a
+limit czasu na nawiązanie połączenia jest oddzielony od limitu na
+odczyt odpowiedzi.
+
+Dla każdego żądania mierzony jest czas nawiązania połączenia (0 przy
+ponownym użyciu połączenia z puli) i czas do pierwszego bajtu odpowiedzi.
+"""
+import random
+import threading
+import time
+from collections import deque, namedtuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# Limit czasu na nawiązanie połączenia (s)
+CONNECT_TIMEOUT = 5
+# Limit czasu między kolejnymi porcjami odpowiedzi (s) - modele potrafią długo milczeć
+READ_TIMEOUT = 120
+# Liczba połączeń utrzymywanych na jeden serwer
+POOL_SIZE = 8
+# Liczba ponowień po błędzie połączenia i bazowe opóźnienie (s)
+RETRIES = 3
+BACKOFF = 0.25
+# Liczba ostatnich pomiarów przechowywanych do statystyk
+TIMING_WINDOW = 100
+
+# Czasy żądania w sekundach; `attempts` to liczba prób (1 = bez ponowień)
+Timing = namedtuple("Timing", "connect ttfb attempts")
+
+_local = threading.local()
+_session = None
+_session_lock = threading.Lock()
+_timings = deque(maxlen=TIMING_WINDOW)
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _local.connect = getattr(_local, "connect", 0.0) + time.perf_counter() - started
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _local.connect = getattr(_local, "connect", 0.0) + time.perf_counter() - started
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _PooledAdapter(HTTPAdapter):
+    """Adapter z pulą połączeń mierzących czas nawiązania połączenia."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+def get_session():
+    """Zwraca wspólną sesję (tworzoną przy pierwszym użyciu)."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = _PooledAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def request(method, url, timeout=None, retries=RETRIES, **kwargs):
+    """
+    Wysyła żądanie przez wspólną sesję i zwraca odpowiedź.
+
+    `timeout` to liczba (limit odczytu) albo para (połączenie, odczyt).
+    Błędy połączenia są ponawiane najwyżej `retries` razy; przekroczenie
+    limitu odczytu nie jest ponawiane. Pomiar czasu trafia do
+    `response.timing`.
+    """
+    if timeout is None:
+        timeout = (CONNECT_TIMEOUT, READ_TIMEOUT)
+    elif not isinstance(timeout, tuple):
+        timeout = (CONNECT_TIMEOUT, timeout)
+    session = get_session()
+    _local.connect = 0.0
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+            break
+        except requests.exceptions.ConnectionError:
+            if attempt > retries:
+                raise
+            # Wykładnicze opóźnienie z losowym rozrzutem, żeby ponowienia nie szły falą
+            time.sleep(BACKOFF * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+    # `elapsed` kończy się po odebraniu nagłówków, także dla stream=True
+    response.timing = Timing(_local.connect, response.elapsed.total_seconds(), attempt)
+    _timings.append(response.timing)
+    return response
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+def timing_text(timing):
+    """Opis pomiaru jednego żądania do wyświetlenia w logu."""
+    connect = "połączenie z puli" if timing.connect == 0 else f"połączenie {timing.connect * 1000:.0f} ms"
+    retries = f", ponowienia: {timing.attempts - 1}" if timing.attempts > 1 else ""
+    return f"{connect}, pierwszy bajt po {timing.ttfb * 1000:.0f} ms{retries}"
+
+
+def stats_text():
+    """Podsumowanie ostatnich żądań: mediana czasu do pierwszego bajtu i odsetek połączeń z puli."""
+    samples = list(_timings)
+    if not samples:
+        return "HTTP: brak pomiarów"
+    ttfb = sorted(timing.ttfb for timing in samples)[len(samples) // 2]
+    reused = sum(1 for timing in samples if timing.connect == 0) / len(samples)
+    return f"HTTP: pierwszy bajt p50 {ttfb * 1000:.0f} ms, połączenia z puli {reused:.0%}"
@@ -0,0 +1,90 @@
+"""
+Prowadnice wcięć rysowane na Canvas obok tk.Text.
+
+Poziom wcięcia liczony jest raz na linię i unieważniany tylko dla linii
+zmienionych przez edycję (słuchacz IncrementalHighlighter). Rysowany jest
+wyłącznie widoczny fragment, a odcinki Canvas pochodzą z puli - przy
+przewijaniu zmienia się tylko ich położenie, nic nie jest tworzone od nowa.
+"""
+
+
+class IndentGuides:
+    """
+    Pionowe prowadnice wcięć dla widocznych linii.
+
+    `indent_width` to liczba spacji na poziom wcięcia, `step` - odstęp
+    między prowadnicami w pikselach.
+    """
+
+    def __init__(self, canvas, text_widget, indent_width=4, step=8, color="#444"):
+        self.canvas = canvas
+        self.text = text_widget
+        self.indent_width = indent_width
+        self.step = step
+        self.color = color
+        self._levels = [None] * int(text_widget.index("end-1c").split(".")[0])
+        self._items = []
+        self._coords = []
+        self._used = 0
+        self._state = None
+        self._version = 0
+
+    def on_change(self, start, end, text):
+        """Słuchacz edycji: unieważnia poziomy wcięć zmienionych linii."""
+        first, last = start[0], end[0]
+        self._levels[first - 1:last] = [None] * (text.count("\n") + 1)
+        self._version += 1
+
+    def _ensure_levels(self, first, last):
+        """Liczy brakujące poziomy wcięć dla linii od `first` do `last`."""
+        line = first
+        while line <= last:
+            if self._levels[line - 1] is not None:
+                line += 1
+                continue
+            run_end = line
+            while run_end < last and self._levels[run_end] is None:
+                run_end += 1
+            block = self.text.get(f"{line}.0", f"{run_end}.end").split("\n")
+            for offset, content in enumerate(block):
+                spaces = len(content) - len(content.lstrip(" "))
+                self._levels[line - 1 + offset] = spaces // self.indent_width
+            line = run_end + 1
+
+    def redraw(self, force=False):
+        """Rysuje prowadnice widocznych linii, jeśli widok lub tekst się zmienił."""
+        first = int(self.text.index("@0,0").split(".")[0])
+        count = int(self.text.index("end-1c").split(".")[0])
+        info = self.text.dlineinfo(f"{first}.0")
+        state = (first, info[1] if info else None, count, self.text.winfo_height(), self._version)
+        if state == self._state and not force:
+            return
+        self._state = state
+
+        visible = []
+        line = first
+        while line <= count:
+            info = self.text.dlineinfo(f"{line}.0")
+            if info is None:
+                break
+            visible.append((line, info[1], info[3]))
+            line += 1
+        if visible:
+            self._ensure_levels(first, line - 1)
+
+        used = 0
+        for line, y, height in visible:
+            for level in range(self._levels[line - 1]):
+                x = 5 + level * self.step
+                coords = (x, y, x, y + height)
+                if used == len(self._items):
+                    self._items.append(self.canvas.create_line(*coords, fill=self.color))
+                    self._coords.append(coords)
+                elif self._coords[used] != coords or used >= self._used:
+                    self.canvas.coords(self._items[used], *coords)
+                    self.canvas.itemconfigure(self._items[used], state="normal")
+                    self._coords[used] = coords
+                used += 1
+        for item in self._items[used:self._used]:
+            self.canvas.itemconfigure(item, state="hidden")
+        self._used = used
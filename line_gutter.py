@@ -0,0 +1,116 @@
+"""
+Pasek numerów linii na Canvas dla edytorów opartych na tk.Text.
+
+Rysowane są tylko numery widocznych linii, a elementy Canvas są tworzone
+raz i ponownie używane (zmienia się tylko ich tekst i położenie). Pasek
+przerysowuje się wyłącznie wtedy, gdy zmieni się pierwsza widoczna linia,
+jej przesunięcie, liczba linii albo wysokość okna.
+"""
+import tkinter as tk
+from tkinter import font as tkfont
+
+
+class LineNumberGutter(tk.Canvas):
+    """
+    Wirtualizowany pasek numerów linii ze znacznikami.
+
+    `markers` to słownik {nazwa_znacznika_tekstu: kolor} w kolejności
+    ważności (np. błędy, punkty przerwania, wyniki wyszukiwania). Znaczniki
+    tekstu przesuwają się razem z edytowanym tekstem, a pasek sprawdza je
+    tylko w widocznych liniach - bez przeglądania całego bufora. Po zmianie
+    znaczników należy wywołać `redraw(force=True)`.
+    """
+
+    def __init__(self, master, text_widget, markers=None, fg="#ffffff", font=None, **kwargs):
+        kwargs.setdefault("highlightthickness", 0)
+        kwargs.setdefault("bd", 0)
+        super().__init__(master, **kwargs)
+        self.text = text_widget
+        self.fg = fg
+        self.font = tkfont.Font(font=font or text_widget.cget("font"))
+        self.markers = dict(markers or {})
+        self._numbers = []
+        self._marks = []
+        self._shown = []
+        self._state = None
+        self._digits = 0
+        self._job = None
+        text_widget.bind("<Configure>", lambda event: self.schedule(), add="+")
+
+    def schedule(self):
+        """Odkłada przerysowanie do chwili bezczynności (łączy kilka żądań w jedno)."""
+        if self._job is None:
+            self._job = self.after_idle(self.redraw)
+
+    def redraw(self, force=False):
+        """Rysuje numery widocznych linii, jeśli widok się zmienił."""
+        self._job = None
+        first = int(self.text.index("@0,0").split(".")[0])
+        count = int(self.text.index("end-1c").split(".")[0])
+        info = self.text.dlineinfo(f"{first}.0")
+        state = (first, info[1] if info else None, count, self.text.winfo_height())
+        if state == self._state and not force:
+            return
+        self._state = state
+
+        digits = max(2, len(str(count)))
+        if digits != self._digits:
+            self._digits = digits
+            self.config(width=self.font.measure("0" * digits) + 14)
+        right = int(self.cget("width")) - 4
+
+        lines = []
+        line = first
+        while line <= count:
+            info = self.text.dlineinfo(f"{line}.0")
+            if info is None:
+                break
+            lines.append((line, info[1], info[3]))
+            line += 1
+        marked = self._visible_markers(first, line - 1) if lines else {}
+
+        for i, (line, y, height) in enumerate(lines):
+            if i == len(self._numbers):
+                self._numbers.append(self.create_text(0, 0, anchor="ne", fill=self.fg, font=self.font))
+                self._marks.append(self.create_rectangle(0, 0, 0, 0, width=0, state="hidden"))
+                self._shown.append(None)
+            shown = (line, y, height, right, marked.get(line))
+            if self._shown[i] == shown:
+                continue
+            self._shown[i] = shown
+            self.coords(self._numbers[i], right, y)
+            self.itemconfigure(self._numbers[i], text=str(line), state="normal")
+            if shown[4]:
+                self.coords(self._marks[i], 1, y + 2, 5, y + height - 2)
+                self.itemconfigure(self._marks[i], fill=shown[4], state="normal")
+            else:
+                self.itemconfigure(self._marks[i], state="hidden")
+        for i in range(len(lines), len(self._numbers)):
+            if self._shown[i] is not None:
+                self._shown[i] = None
+                self.itemconfigure(self._numbers[i], state="hidden")
+                self.itemconfigure(self._marks[i], state="hidden")
+
+    def _visible_markers(self, first, last):
+        """Zwraca {linia: kolor} dla znaczników w liniach od `first` do `last`."""
+        marked = {}
+        for tag, color in self.markers.items():
+            ranges = []
+            previous = self.text.tag_prevrange(tag, f"{first}.0")
+            if previous:
+                ranges.append(previous)
+            index = f"{first}.0"
+            while True:
+                found = self.text.tag_nextrange(tag, index, f"{last}.end")
+                if not found:
+                    break
+                ranges.append(found)
+                index = found[1]
+            for start, end in ranges:
+                start_line = int(str(start).split(".")[0])
+                end_line, end_col = map(int, str(end).split("."))
+                if end_col == 0:
+                    end_line -= 1
+                for line in range(max(first, start_line), min(last, end_line) + 1):
+                    marked.setdefault(line, color)
+        return marked
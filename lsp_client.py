@@ -0,0 +1,294 @@
+"""
+Klient serwera języka (LSP) uruchamianego jako podproces przez stdio.
+
+Ciężka analiza (podpowiedzi, diagnostyka, przejście do definicji) odbywa
+się w osobnym procesie, więc nie konkuruje z pętlą Tk o GIL. Dokument jest
+synchronizowany przyrostowo - każda edycja widgetu trafia do serwera jako
+zakres i nowy tekst (`textDocument/didChange`), a nie cała zawartość.
+
+Pozycje w widgecie Tk liczone są w znakach; dla tekstu z podstawowej
+płaszczyzny Unicode pokrywa się to z jednostkami UTF-16 wymaganymi przez LSP.
+"""
+import json
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+from collections import deque, namedtuple
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+from urllib.request import url2pathname
+
+from tk_dispatch import TkDispatcher
+
+# Polecenia serwerów sprawdzane kolejno, gdy nie podano własnego
+DEFAULT_SERVERS = (["pylsp"], ["jedi-language-server"])
+
+# Liczba ostatnich pomiarów, z których liczone są percentyle opóźnień
+LATENCY_WINDOW = 200
+
+# Podpowiedź w formie zgodnej z jedi.Completion (używane jest tylko .name)
+Completion = namedtuple("Completion", "name")
+
+
+def find_server(command=None):
+    """Zwraca polecenie serwera (listę argumentów) albo None, gdy żaden nie jest dostępny."""
+    candidates = [command.split()] if command else DEFAULT_SERVERS
+    for candidate in candidates:
+        if candidate and shutil.which(candidate[0]):
+            return candidate
+    return None
+
+
+def path_to_uri(path):
+    return Path(path).resolve().as_uri()
+
+
+def uri_to_path(uri):
+    return url2pathname(unquote(urlparse(uri).path))
+
+
+class LanguageServerClient:
+    """
+    Rozmawia z serwerem LSP w formacie JSON-RPC z nagłówkami Content-Length.
+
+    Zapis do stdin i odczyt ze stdout odbywają się w osobnych wątkach;
+    odpowiedzi i diagnostyka wracają do wątku Tk przez TkDispatcher
+    (obiekt trzeba utworzyć w wątku Tk).
+    Interfejs `request()`/`latency_text()` jest taki sam jak w
+    CompletionService, więc edytor może użyć dowolnej z usług.
+    """
+
+    def __init__(self, widget, command, get_text, on_diagnostics=None, root_path=None):
+        self.widget = widget
+        self._tk = TkDispatcher(widget)
+        self.get_text = get_text
+        self.on_diagnostics = on_diagnostics
+        self.uri = None
+        self.version = 0
+        self._next_id = 0
+        self._callbacks = {}
+        self._completion_id = None
+        self._changes = []
+        self._flush_job = None
+        self._incremental = True
+        self._ready = False
+        self._backlog = []
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+        self._outgoing = queue.Queue()
+        self.process = subprocess.Popen(
+            command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        threading.Thread(target=self._writer, daemon=True).start()
+        threading.Thread(target=self._reader, daemon=True).start()
+        root = Path(root_path or os.getcwd()).resolve()
+        self._send({
+            "jsonrpc": "2.0", "id": self._new_id(self._on_initialized), "method": "initialize",
+            "params": {
+                "processId": os.getpid(),
+                "rootUri": root.as_uri(),
+                "capabilities": {
+                    "textDocument": {
+                        "synchronization": {"didSave": False},
+                        "completion": {"completionItem": {"snippetSupport": False}},
+                        "definition": {},
+                        "publishDiagnostics": {},
+                    },
+                },
+            },
+        }, force=True)
+
+    # ==== Transport ====
+    def _new_id(self, callback):
+        with self._lock:
+            self._next_id += 1
+            self._callbacks[self._next_id] = callback
+            return self._next_id
+
+    def _send(self, message, force=False):
+        """Wysyła wiadomość; przed odpowiedzią na initialize odkłada ją do kolejki."""
+        with self._lock:
+            if not self._ready and not force:
+                self._backlog.append(message)
+                return
+        body = json.dumps(message).encode("utf-8")
+        self._outgoing.put(b"Content-Length: %d\r\n\r\n" % len(body) + body)
+
+    def _writer(self):
+        while True:
+            data = self._outgoing.get()
+            if data is None:
+                break
+            try:
+                self.process.stdin.write(data)
+                self.process.stdin.flush()
+            except (OSError, ValueError):
+                break
+
+    def _reader(self):
+        stream = self.process.stdout
+        while True:
+            length = None
+            while True:
+                header = stream.readline()
+                if not header:
+                    return
+                header = header.strip()
+                if not header:
+                    break
+                name, _, value = header.decode("ascii", "replace").partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            if length is None:
+                continue
+            try:
+                message = json.loads(stream.read(length))
+            except ValueError:
+                continue
+            self._handle(message)
+
+    def _handle(self, message):
+        """Obsługuje wiadomość serwera (w wątku czytającym)."""
+        if "method" in message:
+            if "id" in message:
+                # Żądania serwera (np. konfiguracja) - odpowiedź pusta wystarcza
+                self._send({"jsonrpc": "2.0", "id": message["id"], "result": None}, force=True)
+            elif message["method"] == "textDocument/publishDiagnostics" and self.on_diagnostics:
+                params = message.get("params", {})
+                if params.get("uri") == self.uri:
+                    self._tk.call(self.on_diagnostics, params.get("diagnostics", []))
+            return
+        with self._lock:
+            callback = self._callbacks.pop(message.get("id"), None)
+        if callback:
+            try:
+                callback(message.get("result"))
+            except Exception:
+                # Nietypowa odpowiedź (np. lokalizacja bez zakresu) przepada - wątek czytający działa dalej
+                pass
+
+    def _on_initialized(self, result):
+        sync = ((result or {}).get("capabilities") or {}).get("textDocumentSync", 2)
+        if isinstance(sync, dict):
+            sync = sync.get("change", 2)
+        self._incremental = sync == 2
+        self._send({"jsonrpc": "2.0", "method": "initialized", "params": {}}, force=True)
+        with self._lock:
+            self._ready = True
+            backlog, self._backlog = self._backlog, []
+        for message in backlog:
+            self._send(message)
+
+    # ==== Dokument ====
+    def open_document(self, path, text):
+        """Otwiera dokument w serwerze (np. po wczytaniu pliku); zamyka poprzedni."""
+        self._changes = []
+        if self.uri:
+            self._send({"jsonrpc": "2.0", "method": "textDocument/didClose",
+                        "params": {"textDocument": {"uri": self.uri}}})
+        self.uri = path_to_uri(path or os.path.join(os.getcwd(), "untitled.py"))
+        self.version += 1
+        self._send({"jsonrpc": "2.0", "method": "textDocument/didOpen", "params": {"textDocument": {
+            "uri": self.uri, "languageId": "python", "version": self.version, "text": text}}})
+
+    def did_change(self, start, end, text):
+        """Odnotowuje zastąpienie zakresu [start, end) tekstem (pozycje Tk: linia od 1)."""
+        if not self._incremental:
+            self._changes = [None]
+        else:
+            self._changes.append({
+                "range": {"start": {"line": start[0] - 1, "character": start[1]},
+                          "end": {"line": end[0] - 1, "character": end[1]}},
+                "text": text,
+            })
+        if self._flush_job is None:
+            self._flush_job = self.widget.after_idle(self.flush_changes)
+
+    def flush_changes(self):
+        """Wysyła zebrane zmiany jednym powiadomieniem didChange."""
+        self._flush_job = None
+        if not self._changes or not self.uri:
+            return
+        changes = self._changes if self._incremental else [{"text": self.get_text()}]
+        self._changes = []
+        self.version += 1
+        self._send({"jsonrpc": "2.0", "method": "textDocument/didChange", "params": {
+            "textDocument": {"uri": self.uri, "version": self.version},
+            "contentChanges": changes}})
+
+    # ==== Zapytania ====
+    def _position(self, line, col):
+        return {"textDocument": {"uri": self.uri}, "position": {"line": line - 1, "character": col}}
+
+    def request(self, code, line, col, callback, version=None, path=None):
+        """Zleca podpowiedzi; poprzednie niezakończone zlecenie jest anulowane."""
+        # pylint: disable=unused-argument
+        self.flush_changes()
+        with self._lock:
+            previous, self._completion_id = self._completion_id, None
+            if previous is not None:
+                self._callbacks.pop(previous, None)
+        if previous is not None:
+            self._send({"jsonrpc": "2.0", "method": "$/cancelRequest", "params": {"id": previous}})
+        started = time.perf_counter()
+
+        def on_result(result):
+            # Wątek czytający: odpowiedź na zlecenie zastąpione nowszym jest pomijana
+            with self._lock:
+                if self._completion_id != request_id:
+                    return
+                self._completion_id = None
+            self._latencies.append(time.perf_counter() - started)
+            items = result.get("items", []) if isinstance(result, dict) else result or []
+            completions = [Completion(item.get("insertText") or item["label"]) for item in items]
+            self._tk.call(callback, completions)
+
+        request_id = self._new_id(on_result)
+        with self._lock:
+            self._completion_id = request_id
+        self._send({"jsonrpc": "2.0", "id": request_id,
+                    "method": "textDocument/completion", "params": self._position(line, col)})
+
+    def request_definition(self, line, col, callback):
+        """Wywołuje `callback(ścieżka, linia, kolumna)` (linia od 1) dla pierwszej definicji."""
+        self.flush_changes()
+
+        def on_result(result):
+            locations = result if isinstance(result, list) else [result] if result else []
+            if not locations:
+                return
+            location = locations[0]
+            uri = location.get("uri") or location.get("targetUri")
+            target = location.get("range") or location.get("targetSelectionRange")
+            start = target["start"]
+            self._tk.call(callback, uri_to_path(uri), start["line"] + 1, start["character"])
+
+        self._send({"jsonrpc": "2.0", "id": self._new_id(on_result),
+                    "method": "textDocument/definition", "params": self._position(line, col)})
+
+    def latency(self):
+        """Zwraca (p50, p99) czasu odpowiedzi na podpowiedzi w ms albo None."""
+        samples = sorted(self._latencies)
+        if not samples:
+            return None
+        p50 = samples[len(samples) // 2]
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        return p50 * 1000, p99 * 1000
+
+    def latency_text(self):
+        latency = self.latency()
+        if latency is None:
+            return "Podpowiedzi (LSP): brak pomiarów"
+        return f"Podpowiedzi (LSP): p50 {latency[0]:.0f} ms, p99 {latency[1]:.0f} ms"
+
+    def close(self):
+        """Kończy pracę serwera."""
+        self._send({"jsonrpc": "2.0", "id": self._new_id(None), "method": "shutdown"}, force=True)
+        self._send({"jsonrpc": "2.0", "method": "exit"}, force=True)
+        self._outgoing.put(None)
+        try:
+            self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
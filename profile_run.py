@@ -0,0 +1,221 @@
+"""
+Uruchamianie skryptu pod profilerem i odczyt wyników dla edytora.
+
+Uruchomiony jako program (`profile_args` buduje listę argumentów dla
+RunConsole) wykonuje skrypt pod cProfile, a opcjonalnie także
+z próbkowaniem linii: osobny wątek co `SAMPLE_INTERVAL` s odczytuje stos
+wątku głównego i przypisuje czas od poprzedniej próbki linii
+profilowanego pliku, która jest na nim najgłębiej (czas bibliotek trafia
+do linii skryptu, która je wywołała). Wątek dostaje GIL rzadziej, gdy
+skrypt liczy, niż gdy czeka - dlatego liczy się czas, a nie liczba próbek.
+Wyniki zapisywane są do katalogu `out_dir` także po błędzie skryptu.
+
+`load_report` (bez Tk, do wywołania w wątku roboczym) czyta wyniki,
+`format_table` składa tabelę najdroższych funkcji, a `heat_levels`
+przypisuje liniom poziomy mapy ciepła dla paska numerów linii.
+"""
+import json
+import os
+import pstats
+import queue
+import runpy
+import sys
+import threading
+import time
+
+# Odstęp próbkowania linii (s); faktyczny zależy też od przełączania wątków interpretera
+SAMPLE_INTERVAL = 0.001
+# Liczba poziomów mapy ciepła i najmniejszy udział linii, który jest zaznaczany
+HEAT_LEVELS = 5
+HEAT_THRESHOLD = 0.01
+# Liczba wierszy tabeli najdroższych funkcji
+TABLE_ROWS = 30
+# Kolumny tabeli: (klucz sortowania, nagłówek, szerokość)
+COLUMNS = (("ncalls", "wywołania", 12), ("tottime", "własny [s]", 12),
+           ("cumtime", "łączny [s]", 12), ("function", "funkcja", 0))
+
+STATS_FILE = "stats.prof"
+LINES_FILE = "lines.json"
+
+
+def profile_args(interpreter, script, out_dir, sample_lines=True, args=()):
+    """Argumenty procesu uruchamiającego `script` pod profilerem (wyniki w `out_dir`)."""
+    command = [interpreter, "-u", os.path.abspath(__file__), "--out", out_dir]
+    if sample_lines:
+        command.append("--lines")
+    return command + [script, *args]
+
+
+# ==== Proces profilowany ====
+class _LineSampler(threading.Thread):
+    """Sumuje czas linii pliku `filename` na stosie wątku `target`."""
+
+    def __init__(self, target, filename, interval=SAMPLE_INTERVAL):
+        super().__init__(daemon=True)
+        self.target = target
+        self.filename = filename
+        self.interval = interval
+        self.seconds = {}
+        self.total = 0
+        self._done = threading.Event()
+
+    def run(self):
+        previous = time.perf_counter()
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self.target)
+            now = time.perf_counter()
+            elapsed, previous = now - previous, now
+            self.total += 1
+            while frame is not None and frame.f_code.co_filename != self.filename:
+                frame = frame.f_back
+            if frame is not None:
+                self.seconds[frame.f_lineno] = self.seconds.get(frame.f_lineno, 0.0) + elapsed
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+def _run(argv):
+    import cProfile
+    out_dir = argv[argv.index("--out") + 1]
+    sample_lines = "--lines" in argv
+    args = [arg for arg in argv[argv.index("--out") + 2:] if arg != "--lines"]
+    script = os.path.abspath(args[0])
+    sys.argv = args
+    sys.path[0] = os.path.dirname(script)
+
+    profiler = cProfile.Profile()
+    sampler = _LineSampler(threading.get_ident(), script) if sample_lines else None
+    code = 0
+    error = None
+    started = time.perf_counter()
+    if sampler:
+        sampler.start()
+    profiler.enable()
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit as e:
+        code = e.code
+    except BaseException:
+        error = sys.exc_info()
+        code = 1
+    profiler.disable()
+    elapsed = time.perf_counter() - started
+    if sampler:
+        sampler.stop()
+    profiler.dump_stats(os.path.join(out_dir, STATS_FILE))
+    with open(os.path.join(out_dir, LINES_FILE), "w", encoding="utf-8") as f:
+        json.dump({"file": script, "elapsed": elapsed,
+                   "lines": sampler.seconds if sampler else {},
+                   "total": sampler.total if sampler else 0}, f)
+    if error:
+        import traceback
+        # Ślad bez ramek profilera i runpy - zaczyna się w kodzie użytkownika
+        error_type, value, tb = error
+        while tb.tb_next and tb.tb_frame.f_code.co_filename != script:
+            tb = tb.tb_next
+        traceback.print_exception(error_type, value, tb)
+    sys.exit(code)
+
+
+# ==== Odczyt wyników ====
+class ProfileReport:
+    """
+    Wyniki profilowania.
+
+    `rows` to słowniki z kluczami z COLUMNS oraz `file` i `line`;
+    `line_costs` to {numer_linii: czas w s} dla profilowanego pliku.
+    """
+
+    def __init__(self, rows, line_costs, elapsed, sampled):
+        self.rows = rows
+        self.line_costs = line_costs
+        self.elapsed = elapsed
+        self.sampled = sampled
+
+
+def load_report(out_dir):
+    """Wczytuje wyniki z `out_dir`; zgłasza OSError, gdy profilowanie nie zapisało wyników."""
+    with open(os.path.join(out_dir, LINES_FILE), encoding="utf-8") as f:
+        lines = json.load(f)
+    script = lines["file"]
+    stats = pstats.Stats(os.path.join(out_dir, STATS_FILE))
+    # Ramki samego uruchamiania (ten moduł, runpy - od 3.11 jako "<frozen runpy>") nie są kodem użytkownika
+    skipped = {os.path.abspath(__file__), os.path.abspath(runpy.__file__)}
+
+    def launcher(filename):
+        return filename in skipped or filename.startswith("<frozen runpy")
+
+    rows = []
+    for (filename, line, name), (_, ncalls, tottime, cumtime, callers) in stats.stats.items():
+        if launcher(filename):
+            continue
+        if any(launcher(caller[0]) for caller in callers):
+            # Tylko wywołania spoza ramek uruchamiania (np. exec, którym runpy wykonuje skrypt)
+            own = [value for caller, value in callers.items() if not launcher(caller[0])]
+            if not own:
+                continue
+            ncalls, tottime, cumtime = (sum(value[i] for value in own) for i in (1, 2, 3))
+        if filename == "~":
+            label = name
+        else:
+            label = f"{name} ({os.path.basename(filename)}:{line})"
+        rows.append({"ncalls": ncalls, "tottime": tottime, "cumtime": cumtime, "function": label,
+                     "file": filename, "line": line})
+
+    total = lines["total"]
+    if total:
+        line_costs = {int(line): seconds for line, seconds in lines["lines"].items()}
+    else:
+        # Bez próbkowania: czas własny funkcji przypisany linii jej definicji
+        line_costs = {}
+        for row in rows:
+            if row["file"] == script:
+                line_costs[row["line"]] = line_costs.get(row["line"], 0.0) + row["tottime"]
+    return ProfileReport(rows, line_costs, lines["elapsed"], bool(total))
+
+
+def load_report_async(widget, out_dir, on_done):
+    """Wczytuje wyniki w wątku roboczym; `on_done(raport albo wyjątek)` wywoływane w wątku Tk."""
+    results = queue.Queue(1)
+
+    def work():
+        try:
+            results.put(load_report(out_dir))
+        except Exception as e:
+            results.put(e)
+
+    def poll():
+        try:
+            result = results.get_nowait()
+        except queue.Empty:
+            widget.after(50, poll)
+            return
+        on_done(result)
+
+    threading.Thread(target=work, daemon=True).start()
+    widget.after(50, poll)
+
+
+def format_table(rows, sort="cumtime", limit=TABLE_ROWS):
+    """Wiersze tabeli (bez nagłówka) posortowane malejąco według kolumny `sort`."""
+    ordered = sorted(rows, key=lambda row: row[sort], reverse=sort != "function")
+    lines = []
+    for row in ordered[:limit]:
+        lines.append(f"{row['ncalls']:>12} {row['tottime']:>12.4f} {row['cumtime']:>12.4f}  {row['function']}")
+    return lines
+
+
+def heat_levels(line_costs, levels=HEAT_LEVELS, threshold=HEAT_THRESHOLD):
+    """{numer_linii: poziom 0..levels-1} dla linii o udziale co najmniej `threshold` w łącznym koszcie."""
+    total = sum(line_costs.values())
+    if not total:
+        return {}
+    hottest = max(line_costs.values())
+    return {line: min(levels - 1, int(cost / hottest * levels))
+            for line, cost in line_costs.items() if cost / total >= threshold}
+
+
+if __name__ == "__main__" and "--out" in sys.argv:
+    _run(sys.argv)
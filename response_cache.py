@@ -0,0 +1,118 @@
+"""
+Pamięć podręczna odpowiedzi serwera LM dla powtarzanych zapytań.
+
+Kluczem jest skrót SHA-256 ścieżki endpointu i treści żądania (model,
+wiadomości, parametry próbkowania) w postaci kanonicznej, więc to samo
+zapytanie trafia w ten sam wpis niezależnie od kolejności pól. Zapisywane
+są wyłącznie odpowiedzi deterministyczne (`temperature` równe 0) - przy
+losowym próbkowaniu powtórka z pamięci zmieniałaby wyniki testów.
+Frontendy w trybie deterministycznym wysyłają żądania modelu przez
+`deterministic`; żądania bez modelu (np. agent) nie są zapamiętywane.
+
+Wpisy leżą w bazie SQLite; starsze niż `ttl` sekund są pomijane i
+usuwane, a po przekroczeniu `max_bytes` usuwane są najdawniej używane.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+DEFAULT_PATH = Path.home() / ".proxy_lm_studio" / "response_cache.sqlite"
+# Czas życia wpisu (s) i największy łączny rozmiar zapisanych odpowiedzi (bajty)
+TTL = 7 * 24 * 3600
+MAX_BYTES = 64 * 1024 * 1024
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+class ResponseCache:
+    """
+    Trwała pamięć odpowiedzi; metody można wywoływać z dowolnego wątku.
+
+    Liczniki `hits` i `misses` obejmują tylko zapytania deterministyczne.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, ttl=TTL, max_bytes=MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS responses ("
+                         "key TEXT PRIMARY KEY, created REAL, used REAL, size INTEGER, value TEXT)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_used ON responses (used)")
+        self._db.commit()
+
+    @staticmethod
+    def cacheable(body):
+        """Czy odpowiedź na to żądanie jest deterministyczna (temperature 0)."""
+        return body.get("temperature") == 0
+
+    @staticmethod
+    def key(url, body):
+        """Skrót endpointu i treści żądania (bez flagi `stream` - nie zmienia odpowiedzi)."""
+        request = {"endpoint": urlsplit(url).path, "body": {k: v for k, v in body.items() if k != "stream"}}
+        canonical = json.dumps(request, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, url, body):
+        """Zwraca zapamiętaną odpowiedź albo None."""
+        if not self.cacheable(body):
+            return None
+        key = self.key(url, body)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT created, value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row and now - row[0] <= self.ttl:
+                self._db.execute("UPDATE responses SET used = ? WHERE key = ?", (now, key))
+                self._db.commit()
+                self.hits += 1
+                return json.loads(row[1])
+            self.misses += 1
+        return None
+
+    def put(self, url, body, value):
+        """Zapamiętuje odpowiedź (wartość serializowalną do JSON) i usuwa nadmiarowe wpisy."""
+        if not self.cacheable(body):
+            return
+        data = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                             (self.key(url, body), now, now, len(data), data))
+            self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                # Usuwaj najdawniej używane, aż rozmiar zmieści się w limicie
+                excess = total - self.max_bytes
+                for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY used").fetchall():
+                    if excess <= 0:
+                        break
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    excess -= size
+            self._db.commit()
+
+    def stats_text(self):
+        return f"Cache: trafienia {self.hits}, chybienia {self.misses}"
+
+
+def deterministic(body):
+    """Żądanie modelu z `temperature` 0 (kopia); żądanie bez pola `model` (np. agenta) bez zmian."""
+    return dict(body, temperature=0) if "model" in body else body
+
+
+def get_cache(enabled):
+    """Wspólna pamięć odpowiedzi (tworzona przy pierwszym użyciu) albo None, gdy jest wyłączona."""
+    global _shared
+    if not enabled:
+        return None
+    with _shared_lock:
+        if _shared is None:
+            _shared = ResponseCache()
+        return _shared
@@ -0,0 +1,297 @@
+"""
+Konsola uruchamianego programu strumieniująca wyjście do tk.Text.
+
+Wątki czytające pobierają stdout/stderr porcjami i wkładają je do
+ograniczonej kolejki - gdy kolejka jest pełna, wątek czeka, a proces
+potomny zatrzymuje się na zapisie do potoku (przeciwciśnienie). Wątek Tk
+co `interval` ms opróżnia kolejkę i wstawia całą porcję jednym
+wywołaniem insert. Widget przechowuje najwyżej `max_lines` ostatnich
+linii (bufor pierścieniowy), więc program drukujący miliony linii nie
+zamraża edytora ani nie wyczerpuje pamięci.
+
+Oba strumienie trafiają do jednej kolejki w kolejności odczytu; linie
+mogą dostać znacznik czasu odczytu (`timestamps`). W trybie
+interaktywnym (`start(..., interactive=True)`) wejście programu jest
+dostępne przez `send` - zapis wykonuje osobny wątek, więc program, który
+nie czyta wejścia, nie blokuje edytora.
+
+`launcher` pozwala podmienić subprocess.Popen (np. na ciepły interpreter
+z warm_kernel); z `report_time` po każdym uruchomieniu wypisywany jest
+czas wraz z ostatnim czasem drugiego trybu (zimny/ciepły start).
+
+Uruchomienie modułu to test obciążeniowy: program potomny wypisuje
+100 MB, a mierzona jest najdłuższa przerwa w pętli zdarzeń Tk.
+"""
+import codecs
+import queue
+import subprocess
+import sys
+import threading
+import time
+import tkinter as tk
+
+# Rozmiar porcji odczytu z potoku (bajty)
+CHUNK_SIZE = 64 * 1024
+# Pojemność kolejki między wątkami czytającymi a wątkiem Tk (porcje)
+QUEUE_SIZE = 64
+# Odstęp między kolejnymi wstawieniami do widgetu (ms)
+FLUSH_INTERVAL = 50
+# Najdłuższy czas odbierania porcji w jednym cyklu, gdy kolejka jest pełna (s)
+DRAIN_BUDGET = 0.015
+# Największa liczba linii przechowywanych w widgecie
+MAX_LINES = 10_000
+
+
+class RunConsole:
+    """
+    Uruchamia proces i przekazuje jego wyjście do widgetu tekstowego.
+
+    `stdout_tag` i `stderr_tag` to znaczniki nakładane na tekst z obu
+    strumieni. `on_exit` wywoływane jest w wątku Tk z kodem wyjścia procesu.
+    """
+
+    def __init__(self, text_widget, stderr_tag=None, on_exit=None,
+                 max_lines=MAX_LINES, interval=FLUSH_INTERVAL, stdout_tag=None, timestamps=False,
+                 launcher=None, report_time=False):
+        self.text = text_widget
+        self.stdout_tag = stdout_tag
+        self.stderr_tag = stderr_tag
+        self.on_exit = on_exit
+        self.max_lines = max_lines
+        self.interval = interval
+        self.timestamps = timestamps
+        self.launcher = launcher
+        self.report_time = report_time
+        # Ostatni czas uruchomienia w każdym trybie: "zimny start" / "ciepły interpreter"
+        self.run_times = {}
+        self._started = 0.0
+        self._mode = None
+        self.process = None
+        self._abandoned = threading.Event()
+        self._open_streams = 0
+        self._stdin = None
+        self._line_start = True
+
+    @property
+    def running(self):
+        return self.process is not None
+
+    def start(self, args, interactive=False, **popen_kwargs):
+        """
+        Uruchamia proces; zwraca obiekt Popen. Zgłasza OSError, gdy start się nie powiedzie.
+
+        `interactive` podłącza wejście procesu do `send`.
+        """
+        self.stop()
+        # Wątki poprzedniego uruchomienia nie czekają już na miejsce w kolejce
+        self._abandoned.set()
+        self.close_stdin()
+        # Gdy start się nie powiedzie, pętla _flush poprzedniego procesu ma się zakończyć
+        self.process = None
+        if interactive:
+            popen_kwargs["stdin"] = subprocess.PIPE
+        self._mode = "ciepły interpreter" if self.launcher else "zimny start"
+        self._started = time.perf_counter()
+        popen = self.launcher or subprocess.Popen
+        self.process = popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **popen_kwargs)
+        self._abandoned = threading.Event()
+        self._open_streams = 2
+        self._line_start = True
+        chunks = queue.Queue(QUEUE_SIZE)
+        for stream, tag in ((self.process.stdout, self.stdout_tag), (self.process.stderr, self.stderr_tag)):
+            threading.Thread(target=self._read, args=(stream, tag, chunks, self._abandoned), daemon=True).start()
+        if interactive:
+            self._stdin = queue.Queue()
+            threading.Thread(target=self._write_stdin, args=(self.process.stdin, self._stdin), daemon=True).start()
+        self.text.after(self.interval, self._flush, self.process, chunks)
+        return self.process
+
+    def stop(self):
+        """Zabija działający proces (wyjście zebrane do tej pory zostanie wyświetlone)."""
+        if self.process and self.process.poll() is None:
+            self.process.kill()
+
+    def write(self, text, tag=None):
+        """Dopisuje tekst do konsoli (wywoływać w wątku Tk)."""
+        self._insert([text, tag or ()])
+        self._line_start = text.endswith("\n")
+
+    def send(self, text):
+        """Przekazuje tekst na wejście procesu; zwraca False, gdy wejście nie jest dostępne."""
+        if self._stdin is None or not self.running:
+            return False
+        self._stdin.put(text)
+        return True
+
+    def close_stdin(self):
+        """Zamyka wejście procesu (koniec pliku, jak Ctrl+D w terminalu)."""
+        if self._stdin is not None:
+            self._stdin.put(None)
+            self._stdin = None
+
+    @staticmethod
+    def _write_stdin(stream, pending):
+        """Wątek zapisujący: przekazuje tekst z kolejki na wejście procesu."""
+        encoder = codecs.getincrementalencoder("utf-8")()
+        while True:
+            text = pending.get()
+            try:
+                if text is None:
+                    stream.close()
+                    return
+                stream.write(encoder.encode(text))
+                stream.flush()
+            except (OSError, ValueError):
+                # Proces zakończył się albo zamknął wejście
+                return
+
+    @staticmethod
+    def _put(chunks, item, abandoned):
+        """Czeka na miejsce w kolejce; zwraca False, gdy uruchomienie porzucono."""
+        while not abandoned.is_set():
+            try:
+                chunks.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    @classmethod
+    def _read(cls, stream, tag, chunks, abandoned):
+        """Wątek czytający: dekoduje porcje strumienia i wkłada je do kolejki."""
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        carry = ""
+        while True:
+            data = stream.read1(CHUNK_SIZE)
+            received = time.time()
+            text = carry + decoder.decode(data, final=not data)
+            # "\r" na końcu porcji może być początkiem "\r\n" z następnej porcji
+            carry = "\r" if data and text.endswith("\r") else ""
+            text = text[:-1] if carry else text
+            text = text.replace("\r\n", "\n")
+            if text and not cls._put(chunks, (text, tag, received), abandoned):
+                break
+            if not data:
+                break
+        stream.close()
+        cls._put(chunks, None, abandoned)
+
+    def _flush(self, process, chunks):
+        """Wstawia zebrane porcje jednym wywołaniem i przycina widget do `max_lines`."""
+        if process is not self.process:
+            return
+        try:
+            exists = self.text.winfo_exists()
+        except tk.TclError:
+            exists = False
+        if not exists:
+            self._abandoned.set()
+            self.process = None
+            process.kill()
+            return
+        parts = []
+        lines = 0
+        # Przy pełnej kolejce proces produkuje szybciej, niż trwa cykl - odbieraj dalej przez DRAIN_BUDGET
+        deadline = time.perf_counter() + DRAIN_BUDGET if chunks.full() else None
+        while True:
+            try:
+                if deadline is None:
+                    item = chunks.get_nowait()
+                else:
+                    item = chunks.get(timeout=max(0.0, deadline - time.perf_counter()))
+            except queue.Empty:
+                break
+            if item is None:
+                self._open_streams -= 1
+                continue
+            text, tag, received = item
+            parts.append([text, tag or (), received])
+            lines += text.count("\n")
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+        # Tekst, który i tak wypadłby z bufora pierścieniowego, nie trafia do widgetu
+        while len(parts) > 1 and lines - parts[0][0].count("\n") >= self.max_lines:
+            lines -= parts.pop(0)[0].count("\n")
+        if parts:
+            if self.timestamps:
+                self._stamp(parts)
+            self._line_start = parts[-1][0].endswith("\n")
+            self._insert([value for text, tag, _ in parts for value in (text, tag)])
+
+        if self._open_streams > 0 or process.poll() is None:
+            self.text.after(self.interval, self._flush, process, chunks)
+            return
+        self.process = None
+        self.close_stdin()
+        if self.report_time:
+            self._report_time()
+        if self.on_exit:
+            self.on_exit(process.returncode)
+
+    def _report_time(self):
+        elapsed = time.perf_counter() - self._started
+        others = [f"ostatni {mode}: {seconds:.2f} s" for mode, seconds in self.run_times.items() if mode != self._mode]
+        self.run_times[self._mode] = elapsed
+        self.write(f"\n[Czas: {elapsed:.2f} s ({self._mode}){'; ' + ', '.join(others) if others else ''}]\n")
+
+    def _stamp(self, parts):
+        """Poprzedza każdą linię czasem odczytu jej porcji z potoku."""
+        line_start = self._line_start
+        for part in parts:
+            text, _, received = part
+            stamp = time.strftime("[%H:%M:%S", time.localtime(received)) + f".{int(received * 1000) % 1000:03d}] "
+            if text.endswith("\n"):
+                text = text[:-1].replace("\n", "\n" + stamp) + "\n"
+            else:
+                text = text.replace("\n", "\n" + stamp)
+            part[0] = stamp + text if line_start else text
+            line_start = text.endswith("\n")
+
+    def _insert(self, args):
+        disabled = self.text.cget("state") == "disabled"
+        if disabled:
+            self.text.config(state="normal")
+        self.text.insert(tk.END, *args)
+        excess = int(self.text.index("end-1c").split(".")[0]) - self.max_lines
+        if excess > 0:
+            self.text.delete("1.0", f"{excess + 1}.0")
+        if disabled:
+            self.text.config(state="disabled")
+        self.text.see(tk.END)
+
+
+def _stress_test(megabytes=100):
+    """Program potomny wypisuje `megabytes` MB na stdout i stderr; mierzy czas i płynność pętli Tk."""
+    child = ("import sys\n"
+             "line = 'x' * 99 + '\\n'\n"
+             f"for i in range({megabytes} * 10_000):\n"
+             "    (sys.stderr if i % 100 == 0 else sys.stdout).write(line)\n")
+    root = tk.Tk()
+    text = tk.Text(root)
+    text.pack()
+    started = time.perf_counter()
+    gaps = []
+    last = [started]
+
+    def heartbeat():
+        # Najdłuższa przerwa między kolejnymi wywołaniami mówi, jak długo zamrożony był interfejs
+        now = time.perf_counter()
+        gaps.append(now - last[0])
+        last[0] = now
+        root.after(10, heartbeat)
+
+    def on_exit(code):
+        elapsed = time.perf_counter() - started
+        print(f"{megabytes} MB w {elapsed:.1f} s ({megabytes / elapsed:.0f} MB/s), kod wyjścia {code}")
+        print(f"najdłuższa przerwa pętli Tk: {max(gaps) * 1000:.0f} ms, "
+              f"linii w widgecie: {int(text.index('end-1c').split('.')[0])}")
+        root.destroy()
+
+    console = RunConsole(text, stderr_tag="error", on_exit=on_exit)
+    console.start([sys.executable, "-c", child])
+    heartbeat()
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    _stress_test(int(sys.argv[1]) if len(sys.argv) > 1 else 100)
@@ -0,0 +1,194 @@
+"""
+Przyrostowy parser strumienia Server-Sent Events (SSE).
+
+Parser przyjmuje surowe porcje bajtów w dowolnym podziale (także w
+środku linii czy znaku UTF-8) i nie dekoduje każdej linii osobno - dekoduje
+całą porcję raz i dzieli bufor od razu na całe zdarzenia. Obsługuje pola
+`data:` (także wieloliniowe), `id:`, komentarze, każde zakończenie linii
+dopuszczone przez specyfikację (CRLF, LF, samo CR) i zakończenie strumienia
+OpenAI (`data: [DONE]`). Typ zdarzenia (`event:`) jest pomijany - strumienie
+OpenAI go nie używają. Do parsowania JSON używany jest orjson, jeśli jest
+zainstalowany, a bez niego wprost json.loads.
+
+Uruchomienie modułu mierzy przepustowość na nagraniu strumienia
+(`python sse_parser.py [plik]`; bez pliku - syntetyczne 100 000 zdarzeń).
+"""
+import codecs
+import json
+import sys
+import time
+
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:
+    orjson = None
+    loads = json.loads
+
+DONE = "[DONE]"
+
+
+class SSEParser:
+    """
+    Składa zdarzenia SSE z kolejnych porcji bajtów (`feed`).
+
+    Zdarzenie to jego dane (tekst pola `data`); ostatnie `id:` jest
+    w `last_id`.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        self._skip_lf = False
+        self.last_id = None
+        self.done = False
+
+    def feed(self, chunk):
+        """Dodaje porcję bajtów; zwraca listę danych zdarzeń zakończonych w tej porcji."""
+        # Cała porcja dekodowana raz (znak UTF-8 przecięty na granicy czeka w dekoderze)
+        chunk = self._decoder.decode(chunk)
+        if self._skip_lf and chunk:
+            # Poprzednia porcja skończyła się CR - LF na początku tej należy do tego samego CRLF
+            self._skip_lf = False
+            if chunk.startswith("\n"):
+                chunk = chunk[1:]
+        buffer = self._buffer + chunk if self._buffer else chunk
+        if "\r" in buffer:
+            self._skip_lf = buffer.endswith("\r")
+            buffer = buffer.replace("\r\n", "\n").replace("\r", "\n")
+        if "\n\n" not in buffer:
+            self._buffer = buffer
+            return []
+        # Pusta linia kończy zdarzenie - dzielimy od razu na całe zdarzenia
+        blocks = buffer.split("\n\n")
+        self._buffer = blocks.pop()
+        events = []
+        for block in blocks:
+            if block.startswith("data: ") and "\n" not in block:
+                # Najczęstszy przypadek: jedno pole data w jednej linii
+                payload = block[6:]
+            else:
+                payload = self._parse_block(block)
+                if payload is None:
+                    continue
+            if payload == DONE:
+                self.done = True
+            events.append(payload)
+        return events
+
+    def _parse_block(self, block):
+        """Zwraca dane zdarzenia złożonego z kilku linii albo None, gdy brak pola data."""
+        data = []
+        for line in block.split("\n"):
+            field, colon, value = line.partition(":")
+            if not field:
+                # Pusta linia albo komentarz
+                continue
+            if value.startswith(" "):
+                value = value[1:]
+            if field == "data":
+                data.append(value)
+            elif field == "id":
+                self.last_id = value
+            # Pozostałe pola (event, retry, nieznane) są pomijane
+        return "\n".join(data) if data else None
+
+
+def chat_deltas(chunks, parser=None):
+    """
+    Zwraca kolejne fragmenty treści (`choices[0].delta.content`) strumienia
+    chat/completions z iteratora porcji bajtów; kończy na `[DONE]`.
+
+    Przekazany `parser` pozwala po pętli sprawdzić, czy strumień doszedł
+    do końca (`parser.done`).
+    """
+    parser = parser or SSEParser()
+    for chunk in chunks:
+        for data in parser.feed(chunk):
+            if data == DONE:
+                return
+            content = delta_content(data)
+            if content:
+                yield content
+
+
+def delta_content(data):
+    """Treść fragmentu odpowiedzi z danych jednego zdarzenia albo None (także dla innego JSON)."""
+    try:
+        return loads(data)["choices"][0]["delta"]["content"]
+    except (ValueError, LookupError, TypeError):
+        return None
+
+
+def _naive_deltas(stream):
+    """Dotychczasowa pętla v5 (requests iter_lines po 512 B, decode i json.loads na linię) - do porównania."""
+    pending = None
+    for i in range(0, len(stream), 512):
+        chunk = stream[i:i + 512]
+        if pending is not None:
+            chunk = pending + chunk
+        lines = chunk.splitlines()
+        if lines and lines[-1] and chunk and lines[-1][-1] == chunk[-1]:
+            pending = lines.pop()
+        else:
+            pending = None
+        for line in lines:
+            if line:
+                line = line.decode("utf-8")
+                if line.startswith("data: "):
+                    data_str = line[6:]
+                    if data_str.strip() == "[DONE]":
+                        return
+                    try:
+                        data = json.loads(data_str)
+                    except json.JSONDecodeError:
+                        continue
+                    if "choices" in data and len(data["choices"]) > 0:
+                        delta = data["choices"][0].get("delta", {})
+                        if "content" in delta:
+                            yield delta["content"]
+
+
+def _benchmark(path=None, chunk_size=65536):
+    """Porównuje przepustowość parsowania nagranego (albo syntetycznego) strumienia."""
+    if path:
+        with open(path, "rb") as f:
+            stream = f.read()
+    else:
+        event = {"id": "chatcmpl-1", "object": "chat.completion.chunk", "created": 1700000000,
+                 "model": "deepseek-coder-v2-lite-instruct",
+                 "choices": [{"index": 0, "delta": {"content": None}, "finish_reason": None}]}
+        events = []
+        for i in range(100_000):
+            event["choices"][0]["delta"]["content"] = f" token{i % 97}"
+            events.append(b"data: " + json.dumps(event).encode("utf-8") + b"\n\n")
+        stream = b"".join(events) + b"data: [DONE]\n\n"
+    chunks = [stream[i:i + chunk_size] for i in range(0, len(stream), chunk_size)]
+    print(f"strumień {len(stream) / 1e6:.1f} MB, porcje po {chunk_size} B")
+    global loads
+    parse_chunks = lambda: chat_deltas(iter(chunks))
+    variants = [("iter_lines + json (dotychczas)", lambda: _naive_deltas(stream), json.loads),
+                ("SSEParser + json", parse_chunks, json.loads)]
+    if orjson:
+        variants.append(("SSEParser + orjson", parse_chunks, orjson.loads))
+    started = time.perf_counter()
+    parser = SSEParser()
+    count = sum(len(parser.feed(chunk)) for chunk in chunks)
+    elapsed = time.perf_counter() - started
+    print(f"{'SSEParser (samo dzielenie)':32}: {count} zdarzeń, {elapsed * 1000:.0f} ms, "
+          f"{count / elapsed / 1000:.0f} tys. zdarzeń/s")
+    default_loads = loads
+    try:
+        for name, parse, parse_json in variants:
+            loads = parse_json
+            started = time.perf_counter()
+            count = sum(1 for _ in parse())
+            elapsed = time.perf_counter() - started
+            print(f"{name:32}: {count} fragmentów, {elapsed * 1000:.0f} ms, "
+                  f"{count / elapsed / 1000:.0f} tys. zdarzeń/s")
+    finally:
+        loads = default_loads
+
+
+if __name__ == "__main__":
+    _benchmark(sys.argv[1] if len(sys.argv) > 1 else None)
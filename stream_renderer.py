@@ -0,0 +1,108 @@
+"""
+Renderowanie strumieniowanej odpowiedzi do tk.Text w rytmie klatek.
+
+Wątek sieciowy tylko dopisuje fragmenty do kolejki (`write`), a pętla
+klatek uruchomiona w wątku Tk co `interval` ms zabiera wszystko, co się
+zebrało, i wstawia to jednym wywołaniem insert. Widget (także `after`) nie
+jest dotykany spoza wątku Tk, a szybkość
+wyświetlania nie jest ograniczona przez liczbę znaków czy fragmentów.
+
+Opcjonalne tempo (`pace` - znaków na klatkę) daje efekt pisania bez
+usypiania żadnego wątku; gdy zaległość przekroczy `BACKLOG_LIMIT` znaków,
+reszta jest wyświetlana od razu.
+
+Po każdej klatce, w której przybył tekst, wywoływane jest `on_frame()`
+(np. kolorowanie domkniętych bloków kodu).
+"""
+import threading
+import tkinter as tk
+from collections import deque
+
+# Odstęp między klatkami (ms) - ok. 60 klatek na sekundę
+FRAME_INTERVAL = 16
+# Zaległość (znaki), powyżej której tempo jest pomijane
+BACKLOG_LIMIT = 4000
+
+
+class StreamRenderer:
+    """
+    Kolejka fragmentów tekstu i akcji opróżniana w wątku Tk.
+
+    `write` i `call` można wywoływać z dowolnego wątku; fragmenty i akcje
+    są wykonywane w kolejności dodania. Obiekt trzeba utworzyć w wątku Tk -
+    konstruktor uruchamia pętlę klatek.
+    """
+
+    def __init__(self, text_widget, interval=FRAME_INTERVAL, pace=None):
+        self.text = text_widget
+        self.interval = interval
+        self.pace = pace
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._backlog = 0
+        self._catch_up = False
+        self.on_frame = None
+        self.text.after(self.interval, self._render)
+
+    def write(self, text, tag=None):
+        """Dodaje fragment tekstu do wyświetlenia w najbliższej klatce."""
+        if text:
+            with self._lock:
+                self._backlog += len(text)
+                self._pending.append((text, tag or ()))
+
+    def call(self, func, *args):
+        """Wykonuje `func(*args)` w wątku Tk po wyświetleniu wcześniejszych fragmentów."""
+        with self._lock:
+            self._pending.append((func, args))
+
+    def skip_pacing(self):
+        """Wyświetla całą bieżącą zaległość w najbliższej klatce."""
+        self._catch_up = True
+
+    def _render(self):
+        """Klatka: wstawia zebrane fragmenty jednym insertem, wykonuje akcje i planuje następną."""
+        try:
+            if not self.text.winfo_exists():
+                return
+        except tk.TclError:
+            return
+        # Następna klatka planowana od razu - błąd w akcji nie zatrzymuje pętli
+        self.text.after(self.interval, self._render)
+        if self.pace is None or self._catch_up or self._backlog > BACKLOG_LIMIT:
+            self._catch_up = False
+            budget = None
+        else:
+            budget = self.pace
+        chunks = []
+        inserted = False
+        while self._pending:
+            if budget is not None and budget <= 0:
+                break
+            item, extra = self._pending.popleft()
+            if isinstance(item, str):
+                if budget is not None:
+                    if len(item) > budget:
+                        # Reszta fragmentu czeka na następną klatkę
+                        self._pending.appendleft((item[budget:], extra))
+                        item = item[:budget]
+                    budget -= len(item)
+                with self._lock:
+                    self._backlog -= len(item)
+                chunks += (item, extra)
+                inserted = True
+                continue
+            self._insert(chunks)
+            chunks = []
+            item(*extra)
+        self._insert(chunks)
+        if inserted and self.on_frame:
+            self.on_frame()
+
+    def _insert(self, chunks):
+        if not chunks:
+            return
+        self.text.configure(state=tk.NORMAL)
+        self.text.insert(tk.END, *chunks)
+        self.text.configure(state=tk.DISABLED)
+        self.text.see(tk.END)
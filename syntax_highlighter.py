@@ -0,0 +1,595 @@
+"""
+Wspólny silnik podświetlania składni Pythona dla edytorów opartych na tk.Text.
+
+Lekser (stdlib `tokenize` z odtwarzaniem po błędach) w jednym przebiegu
+zwraca fragmenty (linia, kolumna, długość, typ_tokenu). Warstwa TagBatch
+grupuje wywołania tag_add/tag_remove - jedno wywołanie Tcl na znacznik.
+
+IncrementalHighlighter śledzi zmienione zakresy linii (przechwytując
+polecenia insert/delete widgetu), ponownie analizuje tylko uszkodzone linie
+oraz linie, których stan (np. otwarty napis wieloliniowy) uległ zmianie,
+i nakłada wyłącznie różnice znaczników. Czas reakcji na naciśnięcie
+klawisza nie zależy od rozmiaru pliku. W trybie leniwym analizowany
+jest tylko widoczny fragment, więc otwarcie bardzo dużego pliku jest
+natychmiastowe.
+"""
+import keyword
+import re
+import time
+import tkinter as tk
+import tokenize
+from collections import defaultdict
+
+# Typy tokenów zwracane przez lekser: keyword, string, comment, number,
+# function, class, self, bracket, operator
+HIGHLIGHT_TAGS = ("keyword", "string", "comment", "number", "function", "class", "self")
+
+# Rozmiar porcji linii analizowanych za zakresem zmian, gdy zmienił się stan
+CONTINUATION_CHUNK = 64
+
+# Tryb leniwy: margines linii poza widocznym oknem, porcja linii dociąganych
+# w czasie bezczynności i największa zaległość nadrabiana od razu
+VIEWPORT_MARGIN = 100
+LAZY_IDLE_CHUNK = 500
+LAZY_CATCHUP_LINES = 500
+
+_FSTRING_START = getattr(tokenize, "FSTRING_START", None)
+_FSTRING_MIDDLE = getattr(tokenize, "FSTRING_MIDDLE", None)
+_FSTRING_END = getattr(tokenize, "FSTRING_END", None)
+_STRING_TYPES = {tokenize.STRING, _FSTRING_START, _FSTRING_MIDDLE, _FSTRING_END} - {None}
+_BRACKETS = frozenset("()[]{}")
+
+_KEYWORDS = frozenset(keyword.kwlist)
+
+_TOKEN_RE = re.compile(
+    r"(?P<comment>#.*)"
+    r"|(?P<string>(?:[rR][bBfF]?|[bBfF][rR]?|[uU])?(?:(?P<triple>'''|\"\"\")|'(?:\\.|[^'\\])*'?|\"(?:\\.|[^\"\\])*\"?))"
+    r"|(?P<number>\b0[xXoObB][\da-fA-F_]+|\b\d[\d_]*(?:\.\d*)?(?:[eE][+-]?\d+)?[jJ]?)"
+    r"|(?P<name>[A-Za-z_]\w*)"
+    r"|(?P<operator>[^\s\w])"
+)
+_CALL_RE = re.compile(r"\s*\(")
+_STRING_END_RE = {
+    "'''": re.compile(r"(?:\\.|[^\\])*?'''"),
+    '"""': re.compile(r'(?:\\.|[^\\])*?"""'),
+}
+
+
+def lex_line(line, state=None):
+    """
+    Lekser zapasowy: dzieli jedną linię na fragmenty (kolumna, długość, typ).
+
+    Używany dla linii, na których `tokenize` zgłosił błąd, oraz dla wnętrza
+    napisów wieloliniowych, od których zaczyna się analizowany blok.
+
+    `state` to otwarty cudzysłów napisu wieloliniowego z poprzedniej linii
+    (albo None). Zwraca (fragmenty, stan_na_końcu_linii).
+    """
+    spans = []
+    pos = 0
+    if state:
+        match = _STRING_END_RE[state].match(line)
+        if not match:
+            if line:
+                spans.append((0, len(line), "string"))
+            return spans, state
+        spans.append((0, match.end(), "string"))
+        pos = match.end()
+        state = None
+
+    previous_name = None
+    for match in _TOKEN_RE.finditer(line, pos):
+        kind = match.lastgroup
+        start = match.start()
+        if match.group("triple"):
+            quote = match.group("triple")
+            closing = _STRING_END_RE[quote].match(line, match.end())
+            if closing:
+                spans.append((start, closing.end() - start, "string"))
+                # finditer nie wie o przesunięciu - pomijamy resztę napisu ręcznie
+                return _lex_rest(line, closing.end(), spans)
+            spans.append((start, len(line) - start, "string"))
+            return spans, quote
+        if kind == "name":
+            word = match.group()
+            if word in _KEYWORDS:
+                tag = "keyword"
+            elif word in ("self", "cls"):
+                tag = "self"
+            elif previous_name == "class":
+                tag = "class"
+            elif previous_name == "def" or _CALL_RE.match(line, match.end()):
+                tag = "function"
+            else:
+                tag = None
+            previous_name = word
+            if tag:
+                spans.append((start, match.end() - start, tag))
+            continue
+        previous_name = None
+        if kind == "operator" and match.group() in _BRACKETS:
+            kind = "bracket"
+        spans.append((start, match.end() - start, kind))
+    return spans, None
+
+
+def _lex_rest(line, pos, spans):
+    """Kontynuuje analizę linii od pozycji `pos` (po zamkniętym napisie potrójnym)."""
+    rest_spans, state = lex_line(line[pos:])
+    spans.extend((col + pos, length, tag) for col, length, tag in rest_spans)
+    return spans, state
+
+
+def _string_quote(token_text):
+    """Zwraca potrójny cudzysłów otwierający napis (pomijając prefiksy r/b/f/u)."""
+    return token_text.lstrip("rRbBuUfF")[:3]
+
+
+def lex_lines(lines, state=None):
+    """
+    Tokenizuje blok linii (bez znaków nowej linii) w jednym przebiegu.
+
+    Zwraca (fragmenty, stany): dla każdej linii listę (kolumna, długość, typ)
+    oraz otwarty cudzysłów napisu wieloliniowego na jej końcu (albo None).
+    Linia, na której `tokenize` zgłosi błąd, jest analizowana lekserem
+    zapasowym, po czym tokenizacja jest wznawiana od następnej linii.
+    """
+    count = len(lines)
+    spans = [[] for _ in range(count)]
+    states = [None] * count
+    row = 0
+    while row < count:
+        if state:
+            # Wnętrze napisu wieloliniowego - lekser liniowy aż do jego zamknięcia
+            spans[row], state = lex_line(lines[row], state)
+            states[row] = state
+            row += 1
+            continue
+        row, state = _tokenize_block(lines, row, spans, states)
+    return spans, states
+
+
+def lex_source(source):
+    """Zwraca listę fragmentów (linia, kolumna, długość, typ) dla całego tekstu; linie liczone od 1."""
+    spans, _ = lex_lines(source.split("\n"))
+    return [(line, col, length, kind)
+            for line, line_spans in enumerate(spans, 1)
+            for col, length, kind in line_spans]
+
+
+def _tokenize_block(lines, row, spans, states):
+    """Tokenizuje linie od `row`; zwraca (następna_linia, stan) po końcu bloku lub błędzie."""
+    remaining = iter(lines[row:])
+
+    def readline():
+        line = next(remaining, None)
+        return "" if line is None else line + "\n"
+
+    tokens = []
+    error_row = None
+    try:
+        for token in tokenize.generate_tokens(readline):
+            if token.type == tokenize.ERRORTOKEN and token.string[:1] in ("'", '"'):
+                # Niezamknięty napis jednoliniowy (Python < 3.12 nie zgłasza błędu)
+                error_row = token.start[0]
+                break
+            tokens.append(token)
+    except tokenize.TokenError as error:
+        position = error.args[1] if len(error.args) > 1 else None
+        error_row = position[0] if position else (tokens[-1].end[0] if tokens else 1)
+    except SyntaxError as error:
+        error_row = error.lineno or (tokens[-1].end[0] if tokens else 1)
+
+    _emit_tokens(tokens, lines, row - 1, spans, states)
+
+    if error_row is None:
+        return len(lines), None
+    failed = row + max(error_row, 1) - 1
+    if failed >= len(lines):
+        # Np. niezamknięty nawias na końcu bloku - wszystkie tokeny już są
+        return len(lines), None
+    entry_state = states[failed - 1] if failed > row else None
+    spans[failed], state = lex_line(lines[failed], entry_state)
+    states[failed] = state
+    return failed + 1, state
+
+
+def _emit_tokens(tokens, lines, offset, spans, states):
+    """Zamienia tokeny na fragmenty linii; `offset` przelicza numery linii bloku na indeksy."""
+    previous_name = None
+    open_fstrings = []
+    for index, token in enumerate(tokens):
+        kind = None
+        token_type, text = token.type, token.string
+        start_row, start_col = token.start
+        end_row, end_col = token.end
+        start_row += offset
+        end_row += offset
+
+        if token_type == tokenize.NAME:
+            if keyword.iskeyword(text):
+                kind = "keyword"
+            elif text in ("self", "cls"):
+                kind = "self"
+            elif previous_name == "class":
+                kind = "class"
+            elif previous_name == "def" or (index + 1 < len(tokens) and tokens[index + 1].string == "("):
+                kind = "function"
+        elif token_type in _STRING_TYPES:
+            kind = "string"
+            if token_type == tokenize.STRING and end_row > start_row:
+                quote = _string_quote(text)
+                for row in range(start_row, end_row):
+                    states[row] = quote
+            elif token_type == _FSTRING_START:
+                open_fstrings.append((_string_quote(text), start_row))
+            elif token_type == _FSTRING_END and open_fstrings:
+                quote, opened_row = open_fstrings.pop()
+                if len(quote) == 3 and quote[0] == quote[1] == quote[2]:
+                    for row in range(opened_row, end_row):
+                        states[row] = quote
+        elif token_type == tokenize.NUMBER:
+            kind = "number"
+        elif token_type == tokenize.COMMENT:
+            kind = "comment"
+        elif token_type == tokenize.OP:
+            kind = "bracket" if text in _BRACKETS else "operator"
+
+        if token_type == tokenize.NAME:
+            previous_name = text
+        else:
+            # Kontekst (def/class) tylko w obrębie linii - wynik nie zależy od granic bloku
+            previous_name = None
+        if kind is None:
+            continue
+        if start_row == end_row:
+            if end_col > start_col:
+                spans[start_row].append((start_col, end_col - start_col, kind))
+            continue
+        spans[start_row].append((start_col, len(lines[start_row]) - start_col, kind))
+        for row in range(start_row + 1, end_row):
+            if lines[row]:
+                spans[row].append((0, len(lines[row]), kind))
+        if end_col:
+            spans[end_row].append((0, end_col, kind))
+
+
+class TagBatch:
+    """
+    Zbiera zmiany znaczników i nakłada je jednym wywołaniem Tcl na znacznik.
+
+    `command` to funkcja wywołująca polecenie widgetu (np. text.tk.call z
+    nazwą widgetu), dzięki czemu partie omijają przechwytywanie poleceń.
+    """
+
+    def __init__(self, command, tags):
+        self._command = command
+        self._tags = tuple(tags)
+        self._cleared = []
+        self._added = defaultdict(list)
+
+    def clear_line(self, line):
+        """Usuwa wszystkie znaczniki z linii (linie należy podawać rosnąco)."""
+        self._cleared.append(line)
+
+    def add(self, tag, line, col, length):
+        self._added[tag].extend((f"{line}.{col}", f"{line}.{col + length}"))
+
+    def flush(self):
+        """Usuwa znaczniki z wyczyszczonych linii i dodaje nowe."""
+        if self._cleared:
+            ranges = []
+            run_start = run_end = self._cleared[0]
+            for line in self._cleared[1:]:
+                if line == run_end + 1:
+                    run_end = line
+                    continue
+                ranges.extend((f"{run_start}.0", f"{run_end + 1}.0"))
+                run_start = run_end = line
+            ranges.extend((f"{run_start}.0", f"{run_end + 1}.0"))
+            for tag in self._tags:
+                self._command("tag", "remove", tag, *ranges)
+        for tag, ranges in self._added.items():
+            self._command("tag", "add", tag, *ranges)
+        self._cleared = []
+        self._added = defaultdict(list)
+
+
+class IncrementalHighlighter:
+    """
+    Podświetla składnię w tk.Text, przetwarzając tylko zmienione linie.
+
+    Dla każdej linii przechowywany jest stan leksera na jej końcu oraz lista
+    nałożonych fragmentów. Po edycji analiza zaczyna się od pierwszej
+    uszkodzonej linii i kończy, gdy stan kolejnej niezmienionej linii
+    zgadza się z zapamiętanym.
+
+    Tryb leniwy (`lazy=True`) ogranicza pracę do widocznego fragmentu
+    (od @0,0 do dolnej krawędzi okna plus margines). Linie od początku pliku
+    do `_valid` mają potwierdzony stan; resztę dociąga się w porcjach w czasie
+    bezczynności. Odległy fragment widoczny po skoku jest podświetlany
+    od razu „na próbę” i poprawiany, gdy dotrze do niego granica.
+    Lista fragmentów linii działa jak pamięć podręczna - przewinięcie
+    do już podświetlonych linii nie wymaga żadnej pracy.
+
+    `tags` to lista typów tokenów do podświetlenia (nazwa znacznika = typ)
+    albo słownik {typ_tokenu: nazwa_znacznika} dla edytorów z własnymi
+    nazwami znaczników.
+
+    `version` rośnie przy każdej edycji bufora i może służyć innym
+    modułom (np. podpowiedziom) jako numer wersji zawartości. Funkcje
+    z listy `listeners` dostają każdą edycję jako (początek, koniec, tekst)
+    - zastąpienie zakresu pozycji (linia, kolumna) sprzed zmiany tekstem.
+    """
+
+    def __init__(self, text_widget, tags=HIGHLIGHT_TAGS, indent_tag=None, lazy=False):
+        self.text = text_widget
+        self._tag_map = dict(tags) if isinstance(tags, dict) else {tag: tag for tag in tags}
+        self.indent_tag = indent_tag
+        self.lazy = lazy
+        all_tags = set(self._tag_map.values()) | ({indent_tag} if indent_tag else set())
+        self._batch = TagBatch(self._call, sorted(all_tags))
+        self._states = [None]
+        self._spans = [None]
+        self._valid = 0
+        self._dirty = None
+        self._idle_job = None
+        self.version = 0
+        self.listeners = []
+        self._orig = f"{text_widget._w}_orig"
+        text_widget.tk.call("rename", text_widget._w, self._orig)
+        text_widget.tk.createcommand(text_widget._w, self._dispatch)
+        if lazy:
+            text_widget.bind("<Configure>", lambda event: self._schedule_idle(), add="+")
+        self.reset()
+
+    def _call(self, *args):
+        """Wywołuje oryginalne polecenie widgetu z pominięciem przechwytywania."""
+        return self.text.tk.call((self._orig,) + args)
+
+    def _line_of(self, index):
+        return int(str(self._call("index", index)).split(".")[0])
+
+    def _dispatch(self, operation, *args):
+        """Przechwytuje polecenia widgetu i rejestruje zmienione linie."""
+        try:
+            if operation == "insert" and len(args) >= 2:
+                self.version += 1
+                self._notify(args[0], args[0], args[1::2])
+                self._record_insert(args[0], args[1::2])
+            elif operation == "delete" and args:
+                self.version += 1
+                end = args[1] if len(args) > 1 else f"{args[0]}+1c"
+                self._notify(args[0], end, ())
+                self._record_delete(args[0], end)
+            elif operation == "replace" and len(args) >= 3:
+                self.version += 1
+                self._notify(args[0], args[1], args[2::2])
+                self._record_delete(args[0], args[1])
+                self._record_insert(args[0], args[2::2])
+            elif self.lazy and args and operation in ("yview", "see"):
+                self._schedule_idle()
+            return self._call(operation, *args)
+        except tk.TclError:
+            return ""
+
+    def _notify(self, index1, index2, chunks):
+        """Przekazuje edycję słuchaczom, zanim zostanie wykonana."""
+        if not self.listeners:
+            return
+        last = tuple(map(int, str(self._call("index", "end-1c")).split(".")))
+        start = min(tuple(map(int, str(self._call("index", index1)).split("."))), last)
+        end = min(tuple(map(int, str(self._call("index", index2)).split("."))), last)
+        text = "".join(str(chunk) for chunk in chunks)
+        if end < start or (end == start and not text):
+            return
+        for listener in self.listeners:
+            listener(start, end, text)
+
+    def _record_insert(self, index, chunks):
+        line = min(self._line_of(index), len(self._states))
+        added = sum(str(chunk).count("\n") for chunk in chunks)
+        if added:
+            # Stan końca linii przechodzi na ostatnią z nowo powstałych linii
+            self._states[line - 1:line - 1] = [None] * added
+            self._spans[line - 1:line - 1] = [None] * added
+            if self._dirty and self._dirty[1] >= line:
+                self._dirty[1] += added
+            if self._valid >= line:
+                self._valid += added
+        self._spans[line - 1] = None
+        self._spans[line - 1 + added] = None
+        self.mark_dirty(line, line + added)
+
+    def _record_delete(self, index1, index2):
+        first = min(self._line_of(index1), len(self._states))
+        last = min(self._line_of(index2), len(self._states))
+        removed = max(0, last - first)
+        if removed:
+            # Scalona linia kończy się tak, jak dotychczasowa ostatnia linia zakresu
+            del self._states[first - 1:first - 1 + removed]
+            del self._spans[first - 1:first - 1 + removed]
+            if self._dirty:
+                lo, hi = self._dirty
+                self._dirty = [first if lo > first else lo, max(first, hi - removed) if hi > first else hi]
+            if self._valid > first:
+                self._valid = max(first, self._valid - removed)
+        self._spans[first - 1] = None
+        self.mark_dirty(first, first)
+
+    def mark_dirty(self, first, last):
+        """Dołącza zakres linii do obszaru wymagającego ponownej analizy."""
+        if self._dirty is None:
+            self._dirty = [first, last]
+        else:
+            self._dirty = [min(self._dirty[0], first), max(self._dirty[1], last)]
+
+    def reset(self):
+        """Unieważnia całą pamięć podręczną (np. po zmianie motywu)."""
+        count = self._line_of("end-1c")
+        self._states = [None] * count
+        self._spans = [None] * count
+        self._valid = 0
+        self._dirty = None
+
+    def _visible_range(self):
+        """Zwraca pierwszą i ostatnią linię widoczną w oknie widgetu."""
+        first = self._line_of("@0,0")
+        last = self._line_of(f"@0,{self.text.winfo_height()}")
+        return first, last
+
+    def _apply(self, line, content, spans):
+        """Porównuje fragmenty linii z zapamiętanymi i kolejkuje różnice znaczników."""
+        spans = [(col, length, self._tag_map[kind])
+                 for col, length, kind in spans if kind in self._tag_map]
+        if self.indent_tag:
+            indent = len(content) - len(content.lstrip())
+            if indent:
+                spans.append((0, indent, self.indent_tag))
+        if spans != self._spans[line - 1]:
+            self._spans[line - 1] = spans
+            self._batch.clear_line(line)
+            for col, length, tag in spans:
+                self._batch.add(tag, line, col, length)
+
+    def _relex(self, first, limit, settle_from=None, settle_upto=0):
+        """
+        Analizuje linie od `first` do `limit` włącznie.
+
+        Kończy wcześniej, gdy stan na końcu linii z przedziału
+        [settle_from, settle_upto] zgadza się z zapamiętanym. Zwraca numer
+        ostatniej przeanalizowanej linii i informację, czy stan się ustalił.
+        """
+        state = self._states[first - 2] if first > 1 else None
+        line = first
+        block_end = limit if settle_from is None else min(limit, max(first, settle_from))
+        while line <= limit:
+            block = str(self._call("get", f"{line}.0", f"{block_end}.end")).split("\n")
+            block_spans, block_states = lex_lines(block, state)
+            for content, spans, end_state in zip(block, block_spans, block_states):
+                self._apply(line, content, spans)
+                previous_state = self._states[line - 1]
+                self._states[line - 1] = end_state
+                if settle_from is not None and settle_from <= line <= settle_upto \
+                        and end_state == previous_state:
+                    return line, True
+                state = end_state
+                line += 1
+            block_end = min(limit, line + CONTINUATION_CHUNK - 1)
+        return limit, False
+
+    def _highlight_provisional(self, first, last):
+        """Podświetla na próbę niepodświetlone linie odległego, widocznego fragmentu."""
+        processed = 0
+        line = first
+        while line <= last:
+            if self._spans[line - 1] is not None:
+                line += 1
+                continue
+            run_end = line
+            while run_end < last and self._spans[run_end] is None:
+                run_end += 1
+            state = self._states[line - 2] if line > 1 and self._spans[line - 2] is not None else None
+            block = str(self._call("get", f"{line}.0", f"{run_end}.end")).split("\n")
+            block_spans, block_states = lex_lines(block, state)
+            for content, spans, end_state in zip(block, block_spans, block_states):
+                self._apply(line, content, spans)
+                self._states[line - 1] = end_state
+                line += 1
+            processed += len(block)
+        return processed
+
+    def _schedule_idle(self):
+        if self._idle_job is None:
+            self._idle_job = self.text.after_idle(self._idle_update)
+
+    def _idle_update(self):
+        """Przesuwa granicę potwierdzonych linii o jedną porcję w czasie bezczynności."""
+        self._idle_job = None
+        self.update(budget=LAZY_IDLE_CHUNK)
+
+    def update(self, budget=None):
+        """
+        Analizuje uszkodzone linie i nakłada różnice znaczników.
+
+        W trybie leniwym obejmuje tylko widoczny fragment z marginesem,
+        a zaległe linie przed nim dociąga w porcjach `after_idle`. `budget`
+        ogranicza liczbę linii, o którą może przesunąć się granica. Zwraca
+        liczbę przeanalizowanych linii.
+        """
+        count = len(self._states)
+        target = count
+        top = 1
+        if self.lazy:
+            top, bottom = self._visible_range()
+            top = max(1, top - VIEWPORT_MARGIN)
+            target = min(count, bottom + VIEWPORT_MARGIN)
+        processed = 0
+
+        if self._dirty is not None:
+            first, last = self._dirty
+            self._dirty = None
+            last = min(last, count)
+            first = min(first, last)
+            if first <= self._valid:
+                if target < first:
+                    self._valid = first - 1
+                else:
+                    line, settled = self._relex(first, target, last, self._valid)
+                    processed += line - first + 1
+                    if not settled:
+                        self._valid = line
+            elif first <= target:
+                # Edycja we fragmencie podświetlonym na próbę
+                line, _ = self._relex(first, target, last, target)
+                processed += line - first + 1
+            # Kolejne przebiegi mogą dotyczyć tych samych linii
+            self._batch.flush()
+
+        if self._valid < target:
+            far = self.lazy and top - self._valid > LAZY_CATCHUP_LINES
+            if far:
+                # Odległy widok (klawisz, przewinięcie, skok): od razu na próbę, granica dochodzi w tle
+                processed += self._highlight_provisional(top, target)
+            if budget is not None or not far:
+                limit = target if budget is None else min(target, self._valid + budget)
+                line, _ = self._relex(self._valid + 1, limit)
+                processed += line - self._valid
+                self._valid = line
+            if self._valid < target:
+                self._schedule_idle()
+
+        self._batch.flush()
+        return processed
+
+
+def _benchmark():
+    """Mierzy czas reakcji na pojedynczy znak dla plików różnej wielkości."""
+    root = tk.Tk()
+    root.withdraw()
+    text = tk.Text(root)
+    highlighter = IncrementalHighlighter(text)
+    sample = 'def f(x):\n    """Opis."""\n    return x + 1  # komentarz\n'
+    for lines in (1_000, 5_000, 20_000):
+        text.delete("1.0", tk.END)
+        text.insert("1.0", sample * (lines // 3))
+        started = time.perf_counter()
+        highlighter.update()
+        full = time.perf_counter() - started
+        started = time.perf_counter()
+        for _ in range(100):
+            text.insert(f"{lines // 2}.4", "a")
+            highlighter.update()
+        keystroke = (time.perf_counter() - started) / 100
+        print(f"{lines:>6} linii: pełne {full * 1000:8.1f} ms, znak {keystroke * 1000:6.3f} ms")
+    lazy_text = tk.Text(root)
+    lazy = IncrementalHighlighter(lazy_text, lazy=True)
+    lazy_text.insert("1.0", sample * 33_334)
+    started = time.perf_counter()
+    lazy.update()
+    print(f"100000 linii (tryb leniwy): otwarcie {(time.perf_counter() - started) * 1000:8.1f} ms")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    _benchmark()
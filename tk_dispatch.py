@@ -0,0 +1,50 @@
+"""
+Przekazywanie wywołań z wątków roboczych do wątku Tk.
+
+Tk nie jest bezpieczny wątkowo - spoza wątku Tk nie wolno wywoływać
+żadnej metody widgetu, także `after`. TkDispatcher zbiera wywołania
+w kolejce (`call`, z dowolnego wątku), a pętla `after` uruchomiona
+w wątku Tk co `interval` ms wykonuje wszystkie zebrane.
+"""
+import threading
+import tkinter as tk
+from collections import deque
+
+# Odstęp odczytu kolejki wywołań (ms)
+POLL_INTERVAL = 20
+
+
+class TkDispatcher:
+    """
+    Kolejka wywołań wykonywanych w wątku Tk w kolejności dodania.
+
+    Obiekt trzeba utworzyć w wątku Tk - konstruktor uruchamia pętlę
+    odczytu, która kończy się razem z widgetem.
+    """
+
+    def __init__(self, widget, interval=POLL_INTERVAL):
+        self.widget = widget
+        self.interval = interval
+        self._calls = deque()
+        self._lock = threading.Lock()
+        self.widget.after(self.interval, self._drain)
+
+    def call(self, func, *args):
+        """Wykonuje `func(*args)` w wątku Tk (najpóźniej po `interval` ms)."""
+        with self._lock:
+            self._calls.append((func, args))
+
+    def _drain(self):
+        try:
+            if not self.widget.winfo_exists():
+                return
+        except tk.TclError:
+            return
+        # Następny odczyt planowany od razu - błąd w wywołaniu nie zatrzymuje pętli
+        self.widget.after(self.interval, self._drain)
+        while True:
+            with self._lock:
+                if not self._calls:
+                    return
+                func, args = self._calls.popleft()
+            func(*args)
@@ -0,0 +1,311 @@
+"""
+Ciepły interpreter do uruchamiania skryptów z edytorów (Linux/Unix).
+
+Zimny start uruchamia nowy interpreter i importuje wszystko od zera - dla
+skryptów z numpy czy pandas to 0,5-3 s przed pierwszą linią kodu. Tutaj
+w tle działa proces-matka, który raz importuje moduły z `WARM_MODULES`
+(oraz biblioteki importowane przez uruchamiane skrypty) i na każde
+uruchomienie wykonuje `fork`. Proces potomny dostaje potoki
+stdin/stdout/stderr edytora i wykonuje skrypt w świeżej przestrzeni nazw
+(`runpy.run_path`), więc zaimportowane moduły są gotowe, a stan
+poprzednich uruchomień nie przecieka.
+
+`WarmKernel.popen` ma interfejs zgodny z `subprocess.Popen` w zakresie
+używanym przez RunConsole (stdout, stderr, stdin, poll, kill), więc
+wystarczy podać go jako `launcher`. Proces-matka kończy się sam po
+zamknięciu edytora (koniec połączenia).
+"""
+import importlib.util
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+
+# Moduły importowane przez proces-matkę od razu po starcie (brakujące są pomijane)
+WARM_MODULES = ("numpy", "pandas")
+
+_kernel = None
+_kernel_lock = threading.Lock()
+
+
+def supported():
+    return hasattr(os, "fork") and hasattr(socket, "AF_UNIX") and hasattr(socket, "send_fds")
+
+
+def get_kernel():
+    """Wspólny ciepły interpreter (uruchamiany przy pierwszym użyciu) albo None, gdy system nie ma fork."""
+    global _kernel
+    if not supported():
+        return None
+    with _kernel_lock:
+        if _kernel is None:
+            _kernel = WarmKernel()
+        return _kernel
+
+
+def launcher():
+    """Funkcja uruchamiająca dla RunConsole (`console.launcher`) albo None, gdy tryb jest niedostępny."""
+    kernel = get_kernel()
+    if kernel is None:
+        return None
+    kernel.start()
+    return kernel.popen
+
+
+def _parse_args(args):
+    """Z listy argumentów interpretera (`python -u plik ...` / `python -c kod`) wybiera skrypt albo kod."""
+    args = list(args[1:])
+    while args and args[0].startswith("-") and args[0] != "-c":
+        args.pop(0)
+    if not args:
+        raise ValueError("Brak skryptu do uruchomienia")
+    if args[0] == "-c":
+        return {"code": args[1], "argv": ["-c"] + args[2:]}
+    return {"path": os.path.abspath(args[0]), "argv": args}
+
+
+class WarmProcess:
+    """Uruchomienie w ciepłym interpreterze widziane jak obiekt Popen."""
+
+    def __init__(self, stdin, stdout, stderr):
+        self.stdin = stdin
+        self.stdout = stdout
+        self.stderr = stderr
+        self.pid = None
+        self.returncode = None
+        self._kill_requested = False
+
+    def poll(self):
+        return self.returncode
+
+    def kill(self):
+        if self.returncode is not None:
+            return
+        if self.pid is None:
+            # Proces-matka jeszcze nie wykonała fork - zabij zaraz po starcie
+            self._kill_requested = True
+            return
+        try:
+            os.kill(self.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    terminate = kill
+
+    def _started(self, pid):
+        self.pid = pid
+        if self._kill_requested:
+            self.kill()
+
+
+class WarmKernel:
+    """Połączenie z procesem-matką; metody wywołuje się z wątku Tk."""
+
+    def __init__(self, modules=WARM_MODULES):
+        self.modules = modules
+        self._server = None
+        self._socket = None
+        self._runs = {}
+        self._ids = 0
+        self._lock = threading.Lock()
+
+    def _ensure_server(self):
+        if self._server and self._server.poll() is None:
+            return
+        parent, child = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        self._server = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--serve", str(child.fileno()), *self.modules],
+            pass_fds=[child.fileno()], stdin=subprocess.DEVNULL)
+        child.close()
+        self._socket = parent
+        threading.Thread(target=self._listen, args=(parent,), daemon=True).start()
+
+    def start(self):
+        """Uruchamia proces-matkę z wyprzedzeniem (import modułów w tle)."""
+        self._ensure_server()
+
+    def popen(self, args, stdin=None, stdout=None, stderr=None, cwd=None, **_):
+        """Uruchamia skrypt z `args` (jak dla interpretera) w procesie potomnym procesu-matki."""
+        request = _parse_args(args)
+        request["cwd"] = os.path.abspath(cwd or os.getcwd())
+        self._ensure_server()
+        # Potoki tworzy edytor - proces potomny dostaje ich końce przez gniazdo
+        in_read, in_write = os.pipe() if stdin == subprocess.PIPE else (os.open(os.devnull, os.O_RDONLY), None)
+        out_read, out_write = os.pipe()
+        err_read, err_write = os.pipe()
+        process = WarmProcess(open(in_write, "wb") if in_write is not None else None,
+                              open(out_read, "rb"), open(err_read, "rb"))
+        with self._lock:
+            self._ids += 1
+            request["id"] = self._ids
+            self._runs[self._ids] = process
+        try:
+            socket.send_fds(self._socket, [json.dumps(request).encode("utf-8")], [in_read, out_write, err_write])
+        finally:
+            for fd in (in_read, out_write, err_write):
+                os.close(fd)
+        return process
+
+    def _listen(self, sock):
+        """Wątek: odbiera od procesu-matki pid uruchomień i kody wyjścia."""
+        while True:
+            try:
+                message = sock.recv(4096)
+            except OSError:
+                message = b""
+            if not message:
+                break
+            kind, run_id, value = message.decode("ascii").split()
+            with self._lock:
+                process = self._runs.get(int(run_id))
+                if kind == "exit":
+                    self._runs.pop(int(run_id), None)
+            if process is None:
+                continue
+            if kind == "started":
+                process._started(int(value))
+            else:
+                process.returncode = int(value)
+        # Proces-matka zakończył się - uruchomienia, które nie zgłosiły końca, uznaj za przerwane
+        with self._lock:
+            runs, self._runs = self._runs, {}
+        for process in runs.values():
+            process.returncode = -9
+
+    def close(self):
+        if self._socket:
+            self._socket.close()
+            self._socket = None
+
+
+# ==== Proces-matka ====
+def _preload(names, script_dir=None):
+    """Importuje moduły, pomijając brakujące i te z katalogu skryptu (kod użytkownika)."""
+    for name in names:
+        if name in sys.modules:
+            continue
+        # Moduł o tej nazwie obok skryptu przesłoniłby bibliotekę - nie importuj go w procesie-matce
+        if script_dir and (os.path.exists(os.path.join(script_dir, name + ".py"))
+                           or os.path.isdir(os.path.join(script_dir, name))):
+            continue
+        try:
+            if importlib.util.find_spec(name) is None:
+                continue
+            __import__(name)
+        except Exception:
+            continue
+
+
+def _script_imports(source):
+    """Nazwy modułów najwyższego poziomu importowanych przez skrypt."""
+    import ast
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return []
+    names = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names += [alias.name.split(".")[0] for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.append(node.module.split(".")[0])
+    return names
+
+
+def _run_child(request, fds):
+    """Proces potomny: podłącza potoki edytora i wykonuje skrypt w świeżej przestrzeni nazw."""
+    import io
+    import random
+    import runpy
+    import traceback
+    for target, fd in enumerate(fds):
+        os.dup2(fd, target)
+        os.close(fd)
+    # Odpowiednik -u: bez buforowania wyjścia
+    sys.stdin = io.TextIOWrapper(io.FileIO(0, "r", closefd=False), encoding="utf-8")
+    sys.stdout = io.TextIOWrapper(io.FileIO(1, "w", closefd=False), encoding="utf-8", write_through=True)
+    sys.stderr = io.TextIOWrapper(io.FileIO(2, "w", closefd=False), encoding="utf-8", write_through=True)
+    random.seed()
+    code = 0
+    try:
+        os.chdir(request["cwd"])
+        sys.argv = request["argv"]
+        if "code" in request:
+            sys.path[0] = ""
+            exec(compile(request["code"], "<string>", "exec"), {"__name__": "__main__", "__builtins__": __builtins__})
+        else:
+            sys.path[0] = os.path.dirname(request["path"])
+            runpy.run_path(request["path"], run_name="__main__")
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        if not isinstance(e.code, (int, type(None))):
+            print(e.code, file=sys.stderr)
+    except BaseException as e:
+        # Bez ramek samego warm_kernel - ślad zaczyna się w kodzie użytkownika
+        traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+        code = 1
+    try:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    finally:
+        os._exit(code)
+
+
+def _serve(fd, modules):
+    import selectors
+    sock = socket.socket(fileno=fd)
+    _preload(modules)
+    selector = selectors.DefaultSelector()
+    selector.register(sock, selectors.EVENT_READ)
+    runs = {}
+    while True:
+        if selector.select(timeout=0.05):
+            try:
+                message, fds, _, _ = socket.recv_fds(sock, 1 << 20, 3)
+            except OSError:
+                message = b""
+            if not message:
+                # Edytor zamknięty
+                for pid in runs:
+                    os.kill(pid, signal.SIGKILL)
+                return
+            request = json.loads(message)
+            if "path" in request:
+                try:
+                    with open(request["path"], encoding="utf-8") as f:
+                        source = f.read()
+                except OSError:
+                    source = ""
+                _preload(_script_imports(source), os.path.dirname(request["path"]))
+            else:
+                _preload(_script_imports(request["code"]), request["cwd"])
+            pid = os.fork()
+            if pid == 0:
+                selector.close()
+                sock.close()
+                signal.signal(signal.SIGINT, signal.default_int_handler)
+                _run_child(request, fds)
+            for descriptor in fds:
+                os.close(descriptor)
+            runs[pid] = request["id"]
+            sock.send(f"started {request['id']} {pid}".encode("ascii"))
+        # Zbierz zakończone procesy potomne
+        while runs:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            run_id = runs.pop(pid, None)
+            if run_id is not None:
+                sock.send(f"exit {run_id} {os.waitstatus_to_exitcode(status)}".encode("ascii"))
+
+
+if __name__ == "__main__" and len(sys.argv) > 2 and sys.argv[1] == "--serve":
+    # Edytor czyta tylko wyniki przez gniazdo; Ctrl+C w terminalu edytora nie ma kończyć procesu-matki
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _serve(int(sys.argv[2]), sys.argv[3:])
@@ -0,0 +1,170 @@
+"""
+Indeks identyfikatorów do podpowiedzi słów w edytorze.
+
+Słowa z każdej linii są pamiętane osobno, więc po edycji przelicza się
+tylko zmienione linie (zmiany przychodzą od IncrementalHighlighter jako
+słuchacz). Wszystkie znane słowa leżą w posortowanej liście - kandydatów
+na prefiks wyznacza bisect, a ranking uwzględnia ostatnio wybrane słowa
+i liczbę wystąpień w dokumencie. Gdy dopasowań prefiksowych jest mało,
+lista jest uzupełniana dopasowaniami rozmytymi (litery w tej samej
+kolejności, np. "prnt" -> "print").
+"""
+import re
+import time
+from bisect import bisect_left, insort
+from collections import Counter
+
+_WORD_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+class WordIndex:
+    """
+    Indeks słów bufora aktualizowany przyrostowo.
+
+    `get_lines(first, last)` zwraca tekst linii od `first` do `last`
+    (numerowanych od 1, włącznie). `base_words` (słowa kluczowe, nazwy
+    wbudowane) są podpowiadane zawsze, niezależnie od treści dokumentu.
+    """
+
+    def __init__(self, get_lines, base_words=(), line_count=1):
+        self.get_lines = get_lines
+        self._base = frozenset(base_words)
+        self._counts = Counter()
+        self._sorted = sorted(self._base)
+        self._used = {}
+        self._clock = 0
+        self._generation = 0
+        self._buckets = {}
+        self._line_words = [None] * line_count
+        self._dirty = [1, line_count]
+
+    def on_change(self, start, end, text):
+        """Słuchacz edycji: zakres [start, end) (linia, kolumna) zastąpiono tekstem."""
+        first, last = start[0], end[0]
+        added = text.count("\n")
+        for words in self._line_words[first - 1:last]:
+            if words:
+                self._remove_words(words)
+        self._line_words[first - 1:last] = [None] * (added + 1)
+        delta = added - (last - first)
+        if self._dirty is None:
+            self._dirty = [first, first + added]
+        else:
+            lo, hi = self._dirty
+            if hi >= first:
+                hi = max(first, hi + delta)
+            self._dirty = [min(lo, first), max(hi, first + added)]
+
+    def _add_words(self, words):
+        for word in words:
+            if self._counts[word] == 0 and word not in self._base:
+                insort(self._sorted, word)
+                self._generation += 1
+            self._counts[word] += 1
+
+    def _remove_words(self, words):
+        for word in words:
+            self._counts[word] -= 1
+            if self._counts[word] == 0:
+                del self._counts[word]
+                if word not in self._base:
+                    del self._sorted[bisect_left(self._sorted, word)]
+                    self._generation += 1
+
+    def refresh(self):
+        """Przelicza słowa linii zmienionych od ostatniego wywołania."""
+        if self._dirty is None:
+            return
+        lo, hi = self._dirty
+        self._dirty = None
+        hi = min(hi, len(self._line_words))
+        line = lo
+        while line <= hi:
+            if self._line_words[line - 1] is not None:
+                line += 1
+                continue
+            run_end = line
+            while run_end < hi and self._line_words[run_end] is None:
+                run_end += 1
+            for offset, content in enumerate(self.get_lines(line, run_end).split("\n")):
+                words = _WORD_RE.findall(content)
+                self._line_words[line - 1 + offset] = words
+                self._add_words(words)
+            line = run_end + 1
+
+    def record_use(self, word):
+        """Zapamiętuje wybór podpowiedzi - ostatnio użyte słowa są wyżej w rankingu."""
+        self._clock += 1
+        self._used[word] = self._clock
+
+    def _bucket(self, letter):
+        """Zwraca słowa na daną literę, każde poprzedzone znakiem nowej linii (do wyszukiwania regexem)."""
+        cached = self._buckets.get(letter)
+        if cached and cached[0] == self._generation:
+            return cached[1]
+        first = bisect_left(self._sorted, letter)
+        last = bisect_left(self._sorted, chr(ord(letter) + 1), first)
+        bucket = "\n" + "\n".join(self._sorted[first:last])
+        self._buckets[letter] = (self._generation, bucket)
+        return bucket
+
+    def _ranked(self, words):
+        """Sortuje słowa: częstsze w dokumencie wyżej, przy remisie krótsze i alfabetycznie."""
+        # Dwa stabilne sortowania z kluczami w C zamiast klucza-krotki liczonego w Pythonie
+        words = sorted(words, key=len)
+        words.sort(key=self._counts.__getitem__, reverse=True)
+        return words
+
+    def complete(self, prefix, limit=200):
+        """Zwraca co najwyżej `limit` najlepszych podpowiedzi dla prefiksu."""
+        self.refresh()
+        if not prefix:
+            return []
+        start = bisect_left(self._sorted, prefix)
+        stop = bisect_left(self._sorted, prefix[:-1] + chr(ord(prefix[-1]) + 1), start)
+        # Ostatnio wybrane podpowiedzi na początku listy
+        result = sorted((word for word in self._used
+                         if word.startswith(prefix) and word != prefix
+                         and (word in self._counts or word in self._base)),
+                        key=self._used.__getitem__, reverse=True)[:limit]
+        seen = set(result)
+        seen.add(prefix)
+        ranked = self._ranked(self._sorted[start:stop])
+        result += [word for word in ranked[:limit + len(seen)] if word not in seen][:limit - len(result)]
+        if len(result) < limit and len(prefix) > 1:
+            # Dopasowania rozmyte (litery w tej samej kolejności) wśród słów o tej samej pierwszej literze
+            pattern = "\n" + "[^\n]*?".join(map(re.escape, prefix)) + "[^\n]*"
+            fuzzy = [word[1:] for word in re.findall(pattern, self._bucket(prefix[0]))
+                     if not word.startswith(prefix, 1)]
+            result += self._ranked(fuzzy)[:limit - len(result)]
+        return result
+
+
+def _benchmark():
+    """Mierzy czas podpowiedzi dla bufora z 50 000 różnych identyfikatorów."""
+    import keyword
+    import random
+    random.seed(1)
+    letters = "abcdefghijklmnopqrstuvwxyz_"
+    words = {random.choice(letters) + "".join(random.choices(letters + "0123456789", k=random.randint(3, 12)))
+             for _ in range(60_000)}
+    lines = [" = ".join(chunk) for chunk in zip(*[iter(sorted(words))] * 5)]
+    index = WordIndex(lambda first, last: "\n".join(lines[first - 1:last]), keyword.kwlist, len(lines))
+    started = time.perf_counter()
+    index.refresh()
+    print(f"{len(index._sorted)} słów, budowa indeksu {(time.perf_counter() - started) * 1000:.1f} ms")
+    for prefix in ("a", "pr", "get", "prnt", "zzzz"):
+        started = time.perf_counter()
+        for _ in range(100):
+            result = index.complete(prefix, limit=20)
+        elapsed = (time.perf_counter() - started) / 100
+        print(f"prefiks {prefix!r:8}: {len(result):3} wyników, {elapsed * 1000:.3f} ms")
+    started = time.perf_counter()
+    for i in range(100):
+        index.on_change((1000, 0), (1000, 0), f"nowe_slowo_{i} ")
+        index.refresh()
+    print(f"edycja linii: {(time.perf_counter() - started) / 100 * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    _benchmark()